@@ -5,16 +5,21 @@ from rest_framework import status
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import APIException
 
-from seaserv import ccnet_api
 from seahub.base.accounts import User
-from seahub.api2.models import Token, TokenV2
+from seahub.api2.models import Token, TokenV2, get_cached_token, \
+    set_cached_token
 from seahub.api2.utils import get_client_ip
 from seahub.utils import within_time_range
+from seahub.utils.rpc import memoized_ccnet_api as ccnet_api
 from seahub.utils.user_permissions import populate_user_permissions
 try:
     from seahub.settings import MULTI_TENANCY
 except ImportError:
     MULTI_TENANCY = False
+try:
+    from seahub.settings import API_TOKEN_UPDATE_INTERVAL
+except ImportError:
+    API_TOKEN_UPDATE_INTERVAL = 10 * 60
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +37,32 @@ class AuthenticationFailed(APIException):
 class DeviceRemoteWipedException(AuthenticationFailed):
     pass
 
+class CachedOrg(object):
+    """Attributes of a user's org, as kept in the token cache.
+    """
+    attrs = ('org_id', 'org_name', 'url_prefix', 'creator', 'ctime',
+             'is_staff')
+
+    def __init__(self, org):
+        for attr in self.attrs:
+            setattr(self, attr, getattr(org, attr, None))
+
+USER_CACHE_ATTRS = ('id', 'enc_password', 'is_staff', 'is_active', 'ctime',
+                    'source', 'role')
+
+def user_to_cache(user):
+    info = dict([(attr, getattr(user, attr, None)) for attr in USER_CACHE_ATTRS])
+    info['email'] = user.email
+    info['org'] = CachedOrg(user.org) if user.org else None
+    return info
+
+def user_from_cache(info):
+    user = User(info['email'])
+    for attr in USER_CACHE_ATTRS:
+        setattr(user, attr, info[attr])
+    user.org = info['org']
+    return user
+
 class TokenAuthentication(BaseAuthentication):
     """
     Simple token based authentication.
@@ -45,6 +76,9 @@ class TokenAuthentication(BaseAuthentication):
 
     * key -- The string identifying the token
     * user -- The user to which the token belongs
+
+    Resolved tokens (token, user, org) are cached for a short time, see
+    ``seahub.api2.models.get_cached_token``.
     """
 
     def authenticate(self, request):
@@ -60,18 +94,32 @@ class TokenAuthentication(BaseAuthentication):
             raise AuthenticationFailed(msg)
 
         key = auth[1]
+        cached = get_cached_token(key)
+        if cached is not None:
+            return self.authenticate_cached(request, key, cached)
+
         ret = self.authenticate_v2(request, key)
         if ret:
             return ret
 
         return self.authenticate_v1(request, key)
 
-    def authenticate_v1(self, request, key):
-        try:
-            token = Token.objects.get(key=key)
-        except Token.DoesNotExist:
-            raise AuthenticationFailed('Invalid token')
+    def authenticate_cached(self, request, key, cached):
+        token = cached['token']
+        if isinstance(token, TokenV2) and token.wiped_at:
+            raise DeviceRemoteWipedException('Device set to be remote wiped')
+
+        user = user_from_cache(cached['user'])
+        populate_user_permissions(user)
+
+        if not user.is_active:
+            return None
+
+        if isinstance(token, TokenV2):
+            self.update_device_info(request, key, token, cached)
+        return (user, token)
 
+    def get_user(self, token):
         try:
             user = User.objects.get(email=token.user)
         except User.DoesNotExist:
@@ -82,6 +130,17 @@ class TokenAuthentication(BaseAuthentication):
             if orgs:
                 user.org = orgs[0]
 
+        return user
+
+    def authenticate_v1(self, request, key):
+        try:
+            token = Token.objects.get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token')
+
+        user = self.get_user(token)
+        set_cached_token(key, {'token': token, 'user': user_to_cache(user)})
+
         populate_user_permissions(user)
 
         if user.is_active:
@@ -97,45 +156,51 @@ class TokenAuthentication(BaseAuthentication):
         if token.wiped_at:
             raise DeviceRemoteWipedException('Device set to be remote wiped')
 
-        try:
-            user = User.objects.get(email=token.user)
-        except User.DoesNotExist:
-            raise AuthenticationFailed('User inactive or deleted')
-
-        if MULTI_TENANCY:
-            orgs = ccnet_api.get_orgs_by_user(token.user)
-            if orgs:
-                user.org = orgs[0]
+        user = self.get_user(token)
+        cached = {'token': token, 'user': user_to_cache(user)}
+        set_cached_token(key, cached)
 
         populate_user_permissions(user)
 
         if user.is_active:
-            need_save = False
-
-            # We update the device's last_login_ip, client_version, platform_version if changed
-            ip = get_client_ip(request)
-            if ip and ip != token.last_login_ip:
-                token.last_login_ip = ip
-                need_save = True
-
-            client_version = request.META.get(HEADER_CLIENT_VERSION, '')
-            if client_version and client_version != token.client_version:
-                token.client_version = client_version
-                need_save = True
-
-            platform_version = request.META.get(HEADER_PLATFORM_VERSION, '')
-            if platform_version and platform_version != token.platform_version:
-                token.platform_version = platform_version
-                need_save = True
-
-            if not within_time_range(token.last_accessed, datetime.datetime.now(), 10 * 60):
-                # We only need 10min precision for the last_accessed field
-                need_save = True
-
-            if need_save:
-                try:
-                    token.save()
-                except:
-                    logger.exception('error when save token v2:')
-
+            self.update_device_info(request, key, token, cached)
             return (user, token)
+
+    def update_device_info(self, request, key, token, cached):
+        """Update the device's last_login_ip, client_version,
+        platform_version and last_accessed.
+
+        Changes are written to database at most once every
+        ``API_TOKEN_UPDATE_INTERVAL`` seconds per device. In between, they are
+        only kept in the token cache.
+        """
+        changed = False
+
+        ip = get_client_ip(request)
+        if ip and ip != token.last_login_ip:
+            token.last_login_ip = ip
+            changed = True
+
+        client_version = request.META.get(HEADER_CLIENT_VERSION, '')
+        if client_version and client_version != token.client_version:
+            token.client_version = client_version
+            changed = True
+
+        platform_version = request.META.get(HEADER_PLATFORM_VERSION, '')
+        if platform_version and platform_version != token.platform_version:
+            token.platform_version = platform_version
+            changed = True
+
+        # last_accessed is set on every save, so it is also the time of the
+        # last write
+        if within_time_range(token.last_accessed, datetime.datetime.now(),
+                             API_TOKEN_UPDATE_INTERVAL):
+            if changed:
+                set_cached_token(key, cached)
+            return
+
+        try:
+            token.save()
+        except:
+            logger.exception('error when save token v2:')
+        set_cached_token(key, cached)
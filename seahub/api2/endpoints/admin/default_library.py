@@ -15,6 +15,7 @@ from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error
 from seahub.base.accounts import User
+from seahub.base.models import index_repo_name
 from seahub.views import get_system_default_repo_id
 
 logger = logging.getLogger(__name__)
@@ -30,6 +31,7 @@ class AdminDefaultLibrary(APIView):
 
         default_repo_id = seafile_api.create_repo(name=_("My Library"),
                 desc=_("My Library"), username=username, passwd=None)
+        index_repo_name(default_repo_id, _("My Library"))
 
         sys_repo_id = get_system_default_repo_id()
         if not sys_repo_id or not seafile_api.get_repo(sys_repo_id):
@@ -1,5 +1,6 @@
 # Copyright (c) 2012-2016 Seafile Ltd.
 import logging
+from multiprocessing.dummy import Pool
 
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAdminUser
@@ -15,6 +16,7 @@ from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error
 from seahub.base.accounts import User
+from seahub.base.models import RepoNameIndex, index_repo_name
 from seahub.signals import repo_deleted
 from seahub.views import get_system_default_repo_id
 from seahub.admin_log.signals import admin_operation
@@ -27,19 +29,44 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-def get_repo_info(repo):
+# number of threads looking up owners of a page of libraries
+REPO_OWNER_LOOKUP_WORKERS = 8
 
-    repo_owner = seafile_api.get_repo_owner(repo.repo_id)
+# max number of libraries in a page of name search results
+MAX_SEARCH_PER_PAGE = 1000
+
+def get_repo_owner_or_org_repo_owner(repo_id):
+    repo_owner = seafile_api.get_repo_owner(repo_id)
     if not repo_owner:
         try:
-            org_repo_owner = seafile_api.get_org_repo_owner(repo.repo_id)
+            repo_owner = seafile_api.get_org_repo_owner(repo_id)
         except Exception:
-            org_repo_owner = None
+            repo_owner = None
+    return repo_owner
+
+def get_repo_owners(repo_ids):
+    """Return a dict of repo id -> owner, looked up in parallel.
+    """
+    repo_ids = list(set(repo_ids))
+    if len(repo_ids) <= 1:
+        return dict((x, get_repo_owner_or_org_repo_owner(x)) for x in repo_ids)
+
+    pool = Pool(min(REPO_OWNER_LOOKUP_WORKERS, len(repo_ids)))
+    try:
+        owners = pool.map(get_repo_owner_or_org_repo_owner, repo_ids)
+    finally:
+        pool.close()
+    return dict(zip(repo_ids, owners))
+
+def get_repo_info(repo, repo_owner=None):
+
+    if repo_owner is None:
+        repo_owner = get_repo_owner_or_org_repo_owner(repo.repo_id)
 
     result = {}
     result['id'] = repo.repo_id
     result['name'] = repo.repo_name
-    result['owner'] = repo_owner or org_repo_owner
+    result['owner'] = repo_owner
     result['size'] = repo.size
     result['size_formatted'] = filesizeformat(repo.size)
     result['encrypted'] = repo.encrypted
@@ -53,6 +80,49 @@ class AdminLibraries(APIView):
     throttle_classes = (UserRateThrottle,)
     permission_classes = (IsAdminUser,)
 
+    def search_by_name(self, request, repo_name):
+        """ Search libraries by name(keyword in name, case insensitive)
+        through the library name index, by page.
+        """
+        try:
+            current_page = int(request.GET.get('page', '1'))
+            per_page = int(request.GET.get('per_page', '100'))
+        except ValueError:
+            current_page = 1
+            per_page = 100
+
+        current_page = max(current_page, 1)
+        per_page = min(max(per_page, 1), MAX_SEARCH_PER_PAGE)
+
+        start = (current_page - 1) * per_page
+        repo_ids = RepoNameIndex.objects.search(repo_name, start, per_page + 1)
+
+        if len(repo_ids) > per_page:
+            repo_ids = repo_ids[:per_page]
+            has_next_page = True
+        else:
+            has_next_page = False
+
+        repos_all = []
+        for repo_id in repo_ids:
+            repo = seafile_api.get_repo(repo_id)
+            if not repo:
+                # deleted outside of seahub
+                RepoNameIndex.objects.remove_repo(repo_id)
+                continue
+            repos_all.append(repo)
+
+        owners = get_repo_owners([r.repo_id for r in repos_all])
+        repos = [get_repo_info(r, owners[r.repo_id]) for r in repos_all]
+
+        page_info = {
+            'has_next_page': has_next_page,
+            'current_page': current_page
+        }
+
+        return Response({"name": repo_name, "owner": '', "repos": repos,
+                         "page_info": page_info})
+
     def get(self, request, format=None):
         """ List 'all' libraries (by name/owner/page)
 
@@ -72,23 +142,27 @@ class AdminLibraries(APIView):
                     continue
 
                 if repo_name in repo.name:
-                    repo_info = get_repo_info(repo)
+                    repo_info = get_repo_info(repo, owner)
                     repos.append(repo_info)
 
             return Response({"name": repo_name, "owner": owner, "repos": repos})
 
         elif repo_name:
             # search by name(keyword in name)
-            repos_all = seafile_api.get_repo_list(-1, -1)
-            for repo in repos_all:
-                if not repo.name or repo.is_virtual:
-                    continue
+            if not RepoNameIndex.objects.is_built():
+                # index not built yet, see `update_repo_name_index` command
+                repos_all = seafile_api.get_repo_list(-1, -1)
+                for repo in repos_all:
+                    if not repo.name or repo.is_virtual:
+                        continue
 
-                if repo_name in repo.name:
-                    repo_info = get_repo_info(repo)
-                    repos.append(repo_info)
+                    if repo_name in repo.name:
+                        repo_info = get_repo_info(repo)
+                        repos.append(repo_info)
 
-            return Response({"name": repo_name, "owner": '', "repos": repos})
+                return Response({"name": repo_name, "owner": '', "repos": repos})
+
+            return self.search_by_name(request, repo_name)
 
         elif owner:
             # search by owner
@@ -97,7 +171,7 @@ class AdminLibraries(APIView):
                 if repo.is_virtual:
                     continue
 
-                repo_info = get_repo_info(repo)
+                repo_info = get_repo_info(repo, owner)
                 repos.append(repo_info)
 
             return Response({"name": '', "owner": owner, "repos": repos})
@@ -127,8 +201,9 @@ class AdminLibraries(APIView):
 
         return_results = []
 
+        owners = get_repo_owners([r.repo_id for r in repos_all])
         for repo in repos_all:
-            repo_info = get_repo_info(repo)
+            repo_info = get_repo_info(repo, owners[repo.repo_id])
             return_results.append(repo_info)
 
         page_info = {
@@ -168,6 +243,8 @@ class AdminLibraries(APIView):
             error_msg = 'Internal Server Error'
             return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, error_msg)
 
+        index_repo_name(repo_id, repo_name)
+
         # send admin operation log signal
         admin_op_detail = {
             "id": repo_id,
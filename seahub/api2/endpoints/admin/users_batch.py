@@ -9,16 +9,15 @@ from rest_framework.views import APIView
 
 from django.utils.translation import ugettext as _
 
-from seaserv import seafile_api
-
 from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error
+from seahub.api2.endpoints.background_jobs import get_background_job_info
 
-from seahub.base.accounts import User
+from seahub.jobs.handlers import JOB_USERS_SET_QUOTA, JOB_USERS_DELETE
+from seahub.jobs.models import BackgroundJobResult
+from seahub.jobs.utils import submit_job
 from seahub.utils.file_size import get_file_size_unit
-from seahub.admin_log.models import USER_DELETE
-from seahub.admin_log.signals import admin_operation
 
 logger = logging.getLogger(__name__)
 
@@ -46,22 +45,7 @@ class AdminUsersBatch(APIView):
             error_msg = "operation can only be 'set-quota' or 'delete-user'."
             return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
-        result = {}
-        result['failed'] = []
-        result['success'] = []
-
-        existed_users = []
-        for email in emails:
-            try:
-                user = User.objects.get(email=email)
-                existed_users.append(user)
-            except User.DoesNotExist:
-                result['failed'].append({
-                    'email': email,
-                    'error_msg': 'User %s not found.' % email
-                    })
-                continue
-
+        params = {}
         if operation == 'set-quota':
             quota_total_mb = request.POST.get('quota_total', None)
             if not quota_total_mb:
@@ -78,47 +62,17 @@ class AdminUsersBatch(APIView):
                 error_msg = _('Space quota is too low (minimum value is 0)')
                 return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
-            quota_total_byte = quota_total_mb * get_file_size_unit('MB')
-
-            for user in existed_users:
-                email = user.email
-                try:
-                    seafile_api.set_user_quota(email, quota_total_byte)
-                except Exception as e:
-                    logger.error(e)
-                    result['failed'].append({
-                        'email': email,
-                        'error_msg': 'Internal Server Error'
-                        })
-                    continue
-
-                result['success'].append({
-                    'email': email,
-                    'quota_total': seafile_api.get_user_quota(email),
-                })
-
-        if operation == 'delete-user':
-            for user in existed_users:
-                email = user.email
-                try:
-                    user.delete()
-                except Exception as e:
-                    logger.error(e)
-                    result['failed'].append({
-                        'email': email,
-                        'error_msg': 'Internal Server Error'
-                        })
-                    continue
-
-                result['success'].append({
-                    'email': email,
-                })
-
-                # send admin operation log signal
-                admin_op_detail = {
-                    "email": email,
-                }
-                admin_operation.send(sender=None, admin_name=request.user.username,
-                        operation=USER_DELETE, detail=admin_op_detail)
-
-        return Response(result)
+            params['quota_total'] = quota_total_mb * get_file_size_unit('MB')
+            job_type = JOB_USERS_SET_QUOTA
+        else:
+            job_type = JOB_USERS_DELETE
+
+        items = [{'email': email} for email in emails]
+        job = submit_job(request.user.username, job_type, items, params)
+
+        # job is left to the background worker, clients poll its status
+        if not job.is_finished():
+            return Response(get_background_job_info(job),
+                            status=status.HTTP_202_ACCEPTED)
+
+        return Response(BackgroundJobResult.objects.get_results(job))
@@ -0,0 +1,50 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+import logging
+
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+
+from seahub.api2.throttling import UserRateThrottle
+from seahub.api2.authentication import TokenAuthentication
+from seahub.api2.utils import api_error
+from seahub.jobs.models import BackgroundJob, BackgroundJobResult
+
+logger = logging.getLogger(__name__)
+
+def get_background_job_info(job):
+    """Return status and progress of a job, plus per item results in the
+    format of the synchronous bulk endpoints once it is finished.
+    """
+    info = job.to_dict()
+    if job.is_finished():
+        info.update(BackgroundJobResult.objects.get_results(job))
+    return info
+
+class BackgroundJobView(APIView):
+
+    authentication_classes = (TokenAuthentication, SessionAuthentication)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserRateThrottle,)
+
+    def get(self, request, job_id):
+        """ Fetch status and progress of a background job.
+
+        Permission checking:
+        1. the user who submitted the job, or admin user;
+        """
+        try:
+            job = BackgroundJob.objects.get(pk=job_id)
+        except BackgroundJob.DoesNotExist:
+            error_msg = 'Job %s not found.' % job_id
+            return api_error(status.HTTP_404_NOT_FOUND, error_msg)
+
+        # permission check
+        if job.username != request.user.username and \
+                not request.user.is_staff:
+            error_msg = 'Permission denied.'
+            return api_error(status.HTTP_403_FORBIDDEN, error_msg)
+
+        return Response(get_background_job_info(job))
@@ -1,7 +1,9 @@
 # Copyright (c) 2012-2016 Seafile Ltd.
 import os
+import json
 import logging
 import posixpath
+from itertools import chain, islice
 
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -9,14 +11,17 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 
+from django.http import HttpResponse, StreamingHttpResponse
+
 from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.utils import api_error
 from seahub.api2.views import get_dir_recursively, \
-    get_dir_entrys_by_id
+    get_dir_entrys_by_id, get_dirent_entry, get_recursive_dir_entry
 
 from seahub.views import check_folder_permission
 from seahub.utils import check_filename_with_rename, is_valid_dirent_name
+from seahub.utils.repo import list_dir_sorted, walk_dirs, DIRENT_SORT_KEYS
 from seahub.utils.timeutils import timestamp_to_isoformat_timestr
 
 from seaserv import seafile_api
@@ -24,6 +29,11 @@ from pysearpc import SearpcError
 
 logger = logging.getLogger(__name__)
 
+json_content_type = 'application/json; charset=utf-8'
+
+# arguments which switch dir listing to the paginated format
+PAGINATION_ARGS = ('offset', 'limit', 'sort_by', 'stream')
+
 class DirView(APIView):
     """
     Support uniform interface for directory operations, including
@@ -47,6 +57,137 @@ class DirView(APIView):
 
         return dir_info
 
+    def get_dir_tree(self, request, repo, path, dir_id):
+        """ List sub dirs recursively, sorted by name, at most `max_depth`
+        levels and `limit` dirs.
+
+        With `stream=1`, dirs are written as they are listed, one json
+        object per line, breadth first. If listing fails midway, the stream
+        ends with an ``{"error_msg": ...}`` line.
+        """
+        try:
+            max_depth = int(request.GET.get('max_depth', '-1'))
+            limit = int(request.GET.get('limit', '-1'))
+        except ValueError:
+            error_msg = 'max_depth or limit invalid.'
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        if max_depth == 0 or max_depth < -1 or limit == 0 or limit < -1:
+            error_msg = 'max_depth or limit invalid.'
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        max_depth = None if max_depth == -1 else max_depth
+        limit = None if limit == -1 else limit
+
+        stream = request.GET.get('stream', '0')
+        if stream not in ('1', '0'):
+            error_msg = 'stream invalid.'
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        username = request.user.username
+        if stream == '1':
+            def content():
+                try:
+                    for parent_dir, dirent in walk_dirs(repo, path, dir_id,
+                            username, max_depth, limit):
+                        yield json.dumps(get_recursive_dir_entry(
+                            parent_dir, dirent)) + '\n'
+                except SearpcError as e:
+                    # headers are sent already, report the error in the stream
+                    logger.error(e)
+                    yield json.dumps({'error_msg': 'Internal Server Error'}) + '\n'
+
+            resp = StreamingHttpResponse(content(),
+                                         content_type='application/x-ndjson')
+        else:
+            try:
+                dir_list = get_dir_recursively(username, repo, path, dir_id,
+                                               max_depth, limit)
+            except SearpcError as e:
+                logger.error(e)
+                error_msg = 'Internal Server Error'
+                return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                 error_msg)
+            resp = Response(dir_list)
+
+        resp["oid"] = dir_id
+        resp["dir_perm"] = seafile_api.check_permission_by_path(repo.id,
+                                                                path, username)
+        return resp
+
+    def get_dirent_page(self, request, repo, path, dir_id, request_type):
+        """ List a page of dir entries, sorted by `sort_by`, dirs first.
+
+        Return {"dirent_list": [...], "total_count": N, "next_offset": M},
+        `next_offset` is null on the last page. With `stream=1`, the
+        response is written entry by entry.
+        """
+        try:
+            offset = int(request.GET.get('offset', '0'))
+            limit = int(request.GET.get('limit', '-1'))
+        except ValueError:
+            error_msg = 'offset or limit invalid.'
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        if offset < 0 or limit == 0 or limit < -1:
+            error_msg = 'offset or limit invalid.'
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        sort_by = request.GET.get('sort_by', 'name')
+        if sort_by not in DIRENT_SORT_KEYS:
+            error_msg = "sort_by can only be 'name', 'mtime' or 'size'."
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        stream = request.GET.get('stream', '0')
+        if stream not in ('1', '0'):
+            error_msg = 'stream invalid.'
+            return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
+
+        username = request.user.username
+        dir_perm = seafile_api.check_permission_by_path(repo.id, path, username)
+        try:
+            dirs, files = list_dir_sorted(repo, path, dir_id, username,
+                                          dir_perm, sort_by)
+        except SearpcError as e:
+            logger.error(e)
+            error_msg = 'Internal Server Error'
+            return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, error_msg)
+
+        if request_type == 'f':
+            dirs = ()
+        elif request_type == 'd':
+            files = ()
+
+        total_count = len(dirs) + len(files)
+        end = total_count if limit == -1 else min(offset + limit, total_count)
+        next_offset = end if end < total_count else None
+
+        dirents = islice(chain(dirs, files), offset, end)
+        entries = (get_dirent_entry(d, username) for d in dirents)
+
+        if stream == '1':
+            def content():
+                yield '{"dirent_list": ['
+                for i, entry in enumerate(entries):
+                    yield (',' if i else '') + json.dumps(entry)
+                yield '], "total_count": %d, "next_offset": %s}' % (
+                    total_count, json.dumps(next_offset))
+
+            resp = StreamingHttpResponse(content(),
+                                         content_type=json_content_type)
+        else:
+            result = {
+                'dirent_list': list(entries),
+                'total_count': total_count,
+                'next_offset': next_offset,
+            }
+            resp = HttpResponse(json.dumps(result),
+                                content_type=json_content_type)
+
+        resp["oid"] = dir_id
+        resp["dir_perm"] = dir_perm
+        return resp
+
     def get(self, request, repo_id, format=None):
         """ Get dir info.
 
@@ -98,14 +239,11 @@ class DirView(APIView):
                     return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
                 if recursive == '1':
-                    username = request.user.username
-                    dir_list = get_dir_recursively(username, repo_id, path, [])
-                    dir_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
-
-                    resp = Response(dir_list)
-                    resp["oid"] = dir_id
-                    resp["dir_perm"] = seafile_api.check_permission_by_path(repo_id, path, username)
-                    return resp
+                    return self.get_dir_tree(request, repo, path, dir_id)
+
+            if any(arg in request.GET for arg in PAGINATION_ARGS):
+                return self.get_dirent_page(request, repo, path, dir_id,
+                                            request_type)
 
             return get_dir_entrys_by_id(request, repo, path, dir_id, request_type)
 
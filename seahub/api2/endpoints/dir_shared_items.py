@@ -20,6 +20,7 @@ from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error
 from seahub.base.templatetags.seahub_tags import email2nickname
 from seahub.base.accounts import User
+from seahub.profile.utils import get_user_profiles
 from seahub.share.signals import share_repo_to_user_successful, \
     share_repo_to_group_successful
 from seahub.utils import (is_org_context, is_valid_username,
@@ -54,13 +55,14 @@ class DirSharedItemsEndpoint(APIView):
             else:
                 share_items = seafile_api.get_shared_users_for_subdir(repo_id,
                                                                       path, username)
+        profiles = get_user_profiles([x.user for x in share_items])
         ret = []
         for item in share_items:
             ret.append({
                 "share_type": "user",
                 "user_info": {
                     "name": item.user,
-                    "nickname": email2nickname(item.user),
+                    "nickname": profiles[item.user]['nickname'],
                 },
                 "permission": item.perm,
             })
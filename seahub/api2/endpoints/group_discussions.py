@@ -103,7 +103,8 @@ class GroupDiscussions(APIView):
                                               message=content)
         # send signal
         grpmsg_added.send(sender=GroupMessage, group_id=group_id,
-                from_email=username, message=content)
+                from_email=username, message=content,
+                timestamp=msg.timestamp)
 
         info = get_user_common_info(username, avatar_size)
 
@@ -11,7 +11,7 @@ from rest_framework.views import APIView
 from rest_framework import status
 
 import seaserv
-from seaserv import seafile_api, ccnet_api
+from seaserv import ccnet_api
 from pysearpc import SearpcError
 
 from seahub.api2.utils import api_error
@@ -21,6 +21,7 @@ from seahub.avatar.settings import GROUP_AVATAR_DEFAULT_SIZE
 from seahub.avatar.templatetags.group_avatar_tags import api_grp_avatar_url, \
     get_default_group_avatar_url
 from seahub.utils import is_org_context, is_valid_username
+from seahub.utils.repo import GroupReposResolver
 from seahub.utils.timeutils import timestamp_to_isoformat_timestr
 from seahub.group.utils import validate_group_name, check_group_name_conflict, \
     is_group_member, is_group_admin, is_group_owner, is_group_admin_or_owner
@@ -101,18 +102,21 @@ class Groups(APIView):
             error_msg = 'with_repos invalid.'
             return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
+        resolver = GroupReposResolver.for_request(request)
+        nicknames = {}
+
         groups = []
         for g in user_groups:
             group_info = get_group_info(request, g.id , avatar_size)
 
             if with_repos:
-                if org_id:
-                    group_repos = seafile_api.get_org_group_repos(org_id, g.id)
-                else:
-                    group_repos = seafile_api.get_repos_by_group(g.id)
+                group_repos = resolver.get_group_shares(g.id)
 
                 repos = []
                 for r in group_repos:
+                    if r.user not in nicknames:
+                        nicknames[r.user] = email2nickname(r.user)
+
                     repo = {
                         "id": r.id,
                         "name": r.name,
@@ -123,7 +127,7 @@ class Groups(APIView):
                         "encrypted": r.encrypted,
                         "permission": r.permission,
                         "owner": r.user,
-                        "owner_name": email2nickname(r.user),
+                        "owner_name": nicknames[r.user],
                     }
                     repos.append(repo)
 
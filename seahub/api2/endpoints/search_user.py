@@ -16,10 +16,9 @@ from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error
 from seahub.utils import is_valid_email, is_org_context
 from seahub.base.accounts import User
-from seahub.base.templatetags.seahub_tags import email2nickname
 from seahub.profile.models import Profile
+from seahub.profile.utils import get_user_profiles
 from seahub.contacts.models import Contact
-from seahub.avatar.templatetags.avatar_tags import api_avatar_url
 
 from seahub.settings import ENABLE_GLOBAL_ADDRESSBOOK, \
     ENABLE_SEARCH_FROM_LDAP_DIRECTLY
@@ -128,13 +127,14 @@ class SearchUser(APIView):
 def format_searched_user_result(request, users, size):
     results = []
 
+    profiles = get_user_profiles(users, size)
     for email in users:
-        url, is_default, date_uploaded = api_avatar_url(email, size)
+        p = profiles[email]
         results.append({
             "email": email,
-            "avatar_url": request.build_absolute_uri(url),
-            "name": email2nickname(email),
-            "contact_email": Profile.objects.get_contact_email_by_user(email),
+            "avatar_url": request.build_absolute_uri(p['avatar_url']),
+            "name": p['nickname'],
+            "contact_email": p['contact_email'],
         })
 
     return results
@@ -16,7 +16,7 @@ from seahub.api2.utils import api_error
 from seahub.views.file import send_file_access_msg
 from seahub.share.models import FileShare
 from seahub.utils import is_windows_operating_system, \
-    is_pro_version
+    is_pro_version, add_user_traffic
 
 import seaserv
 from seaserv import seafile_api
@@ -97,6 +97,7 @@ class ShareLinkZipTaskView(APIView):
         try:
             seaserv.send_message('seahub.stats', 'dir-download\t%s\t%s\t%s\t%s' %
                                  (repo_id, fileshare.username, dir_id, dir_size))
+            add_user_traffic(fileshare.username, dir_size)
         except Exception as e:
             logger.error(e)
 
@@ -22,6 +22,7 @@ from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.permissions import CanGenerateShareLink
 
 from seahub.share.models import FileShare, OrgFileShare
+from seahub.share.utils import add_pending_view_cnts
 from seahub.utils import gen_shared_link, is_org_context
 from seahub.views import check_folder_permission
 from seahub.utils.timeutils import datetime_to_isoformat_timestr
@@ -167,6 +168,9 @@ class ShareLinks(APIView):
 
                 fileshares = filter(lambda fs: fs.path == path, fileshares)
 
+        fileshares = list(fileshares)
+        add_pending_view_cnts(fileshares)
+
         links_info = []
         for fs in fileshares:
             link_info = get_share_link_info(fs)
@@ -289,6 +293,7 @@ class ShareLink(APIView):
             error_msg = 'token %s not found.' % token
             return api_error(status.HTTP_404_NOT_FOUND, error_msg)
 
+        add_pending_view_cnts([fs])
         link_info = get_share_link_info(fs)
         return Response(link_info)
 
@@ -4,11 +4,18 @@ import hmac
 import datetime
 from hashlib import sha1
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 
 from seahub.base.fields import LowerCaseCharField
 
+API_TOKEN_CACHE_PREFIX = 'API_TOKEN_'
+API_TOKEN_CACHE_TIMEOUT = getattr(settings, 'API_TOKEN_CACHE_TIMEOUT', 60)
+
 DESKTOP_PLATFORMS = ('windows', 'linux', 'mac')
 MOBILE_PLATFORMS = ('ios', 'android')
 
@@ -194,3 +201,40 @@ class TokenV2(models.Model):
                     last_accessed=self.last_accessed,
                     last_login_ip=self.last_login_ip,
                     wiped_at=self.wiped_at)
+
+
+########## authenticated token cache
+def get_token_cache_key(key):
+    return API_TOKEN_CACHE_PREFIX + key
+
+def get_cached_token(key):
+    """Return cached authentication info of token `key`, which is a dict
+    with the token object and the attributes of its user and org, or
+    ``None``. See ``TokenAuthentication``.
+    """
+    return cache.get(get_token_cache_key(key))
+
+def set_cached_token(key, info):
+    cache.set(get_token_cache_key(key), info, API_TOKEN_CACHE_TIMEOUT)
+
+def clear_token_cache(keys):
+    if keys:
+        cache.delete_many([get_token_cache_key(k) for k in keys])
+
+def clear_user_token_cache(username):
+    """Called when a user is deactivated or changes password.
+    """
+    keys = list(Token.objects.filter(user=username).values_list('key', flat=True))
+    keys += list(TokenV2.objects.filter(user=username).values_list('key', flat=True))
+    clear_token_cache(keys)
+
+@receiver(post_delete, sender=Token, dispatch_uid="clear_token_cache_on_delete")
+@receiver(post_delete, sender=TokenV2, dispatch_uid="clear_tokenv2_cache_on_delete")
+def token_deleted_cb(sender, instance, **kwargs):
+    clear_token_cache([instance.key])
+
+@receiver(post_save, sender=TokenV2, dispatch_uid="clear_tokenv2_cache_on_wipe")
+def tokenv2_saved_cb(sender, instance, **kwargs):
+    # device is set to be remote wiped
+    if instance.wiped_at:
+        clear_token_cache([instance.key])
@@ -59,7 +59,14 @@ class SimpleRateThrottle(BaseThrottle):
 
     Period should be one of: ('s', 'sec', 'm', 'min', 'h', 'hour', 'd', 'day')
 
-    Previous request information used for throttling is stored in the cache.
+    The rate may end with a throttle mode, e.g. '10000/day:window':
+
+    - 'history' (default): timestamps of previous requests in the period are
+      stored in the cache as a list.
+    - 'window': a sliding window counter. Requests are counted per period
+      with atomic cache `incr`, and the count of the previous period is
+      weighted by how much of it still overlaps the sliding window. This
+      keeps a constant amount of data per client, whatever the rate.
     """
 
     cache = default_cache
@@ -68,10 +75,13 @@ class SimpleRateThrottle(BaseThrottle):
     scope = None
     THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
 
+    THROTTLE_MODES = ('history', 'window')
+
     def __init__(self):
         if not getattr(self, 'rate', None):
             self.rate = self.get_rate()
         self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.mode = self.parse_mode(self.rate)
 
     def get_cache_key(self, request, view):
         """
@@ -104,11 +114,24 @@ class SimpleRateThrottle(BaseThrottle):
         """
         if rate is None:
             return (None, None)
-        num, period = rate.split('/')
+        num, period = rate.split(':')[0].split('/')
         num_requests = int(num)
         duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
         return (num_requests, duration)
 
+    def parse_mode(self, rate):
+        """
+        Given the request rate string, return the throttle mode.
+        """
+        if rate is None or ':' not in rate:
+            return 'history'
+
+        mode = rate.split(':', 1)[1].strip()
+        if mode not in self.THROTTLE_MODES:
+            msg = "Unknown throttle mode '%s' in rate '%s'" % (mode, rate)
+            raise ImproperlyConfigured(msg)
+        return mode
+
     def allow_request(self, request, view):
         """
         Implement the check to see if the request should be throttled.
@@ -126,6 +149,9 @@ class SimpleRateThrottle(BaseThrottle):
         if self.key is None:
             return True
 
+        if self.mode == 'window':
+            return self.allow_request_by_window()
+
         self.history = self.cache.get(self.key, [])
         self.now = self.timer()
 
@@ -146,16 +172,74 @@ class SimpleRateThrottle(BaseThrottle):
         self.cache.set(self.key, self.history, self.duration)
         return True
 
+    def allow_request_by_window(self):
+        """
+        Sliding window counter version of `allow_request`.
+        """
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+
+        cur_key = '%s_%d' % (self.key, window)
+        prev_key = '%s_%d' % (self.key, window - 1)
+        counts = self.cache.get_many([cur_key, prev_key])
+        self.cur_count = counts.get(cur_key, 0)
+        self.prev_count = counts.get(prev_key, 0)
+
+        if self.estimate_count() >= self.num_requests:
+            return self.throttle_failure()
+
+        # keep the counter for two periods, it is used as previous period's
+        # count in the next period
+        if not self.cache.add(cur_key, 1, 2 * self.duration):
+            try:
+                self.cur_count = self.cache.incr(cur_key) - 1
+            except ValueError:
+                # expired between `add` and `incr`
+                self.cache.set(cur_key, 1, 2 * self.duration)
+        self.cur_count += 1
+        return True
+
+    def estimate_count(self):
+        """
+        Estimated number of requests in the sliding window ending now.
+        """
+        overlap = (self.duration - self.elapsed) / float(self.duration)
+        return self.prev_count * overlap + self.cur_count
+
     def throttle_failure(self):
         """
         Called when a request to the API has failed due to throttling.
         """
         return False
 
+    def wait_by_window(self):
+        """
+        Sliding window counter version of `wait`.
+        """
+        remaining_duration = self.duration - self.elapsed
+
+        available_requests = self.num_requests - self.estimate_count() + 1
+        if available_requests > 1:
+            return remaining_duration / float(available_requests)
+
+        if self.cur_count >= self.num_requests:
+            # wait for current period to end, then for current period's
+            # count to slide out of the window enough
+            return remaining_duration + self.duration * (
+                1 - self.num_requests / float(self.cur_count))
+
+        # wait for previous period's count to slide out of the window enough
+        return max(remaining_duration - self.duration * (
+            self.num_requests - self.cur_count) / float(self.prev_count), 0)
+
     def wait(self):
         """
         Returns the recommended next request time in seconds.
         """
+        if self.mode == 'window':
+            return self.wait_by_window()
+
         if self.history:
             remaining_duration = self.duration - (self.now - self.history[-1])
         else:
@@ -234,6 +318,7 @@ class ScopedRateThrottle(SimpleRateThrottle):
         # the `__init__` call.
         self.rate = self.get_rate()
         self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.mode = self.parse_mode(self.rate)
 
         # We can now proceed as normal.
         return super(ScopedRateThrottle, self).allow_request(request, view)
@@ -23,9 +23,9 @@ from seahub.base.accounts import User
 from seahub.base.templatetags.seahub_tags import email2nickname, \
     translate_seahub_time, file_icon_filter
 from seahub.group.models import GroupMessage, MessageReply, \
-    MessageAttachment, PublicGroup
+    MessageAttachment, PublicGroup, GroupMessageSummary
 from seahub.group.views import is_group_staff
-from seahub.notifications.models import UserNotification
+from seahub.notifications.models import GroupMsgUnreadCount
 from seahub.utils import api_convert_desc_link, get_file_type_and_ext, \
     gen_file_get_url, get_site_scheme_and_netloc
 from seahub.utils.paginator import Paginator
@@ -79,27 +79,16 @@ def get_groups(email):
     group_json = []
 
     joined_groups = get_personal_groups_by_user(email)
-    grpmsgs = {}
-    for g in joined_groups:
-        grpmsgs[g.id] = 0
-
-    notes = UserNotification.objects.get_user_notifications(email, seen=False)
+    group_ids = [g.id for g in joined_groups]
+    grpmsgs = GroupMsgUnreadCount.objects.get_counts(email, group_ids)
+    summaries = GroupMessageSummary.objects.get_summaries(group_ids)
     replynum = 0
-    for n in notes:
-        if n.is_group_msg():
-            try:
-                gid  = n.group_message_detail_to_dict().get('group_id')
-            except UserNotification.InvalidDetailError:
-                continue
-            if gid not in grpmsgs:
-                continue
-            grpmsgs[gid] = grpmsgs[gid] + 1
 
     for g in joined_groups:
-        msg = GroupMessage.objects.filter(group_id=g.id).order_by('-timestamp')[:1]
+        summary = summaries[g.id]
         mtime = 0
-        if len(msg) >= 1:
-            mtime = get_timestamp(msg[0].timestamp)
+        if summary.last_msg_timestamp is not None:
+            mtime = get_timestamp(summary.last_msg_timestamp)
         group = {
             "id":g.id,
             "name":g.group_name,
@@ -21,7 +21,6 @@ from rest_framework.response import Response
 from django.contrib.auth.hashers import check_password
 from django.contrib.sites.models import RequestSite
 from django.db import IntegrityError
-from django.db.models import F
 from django.http import HttpResponse
 from django.template import RequestContext
 from django.template.loader import render_to_string
@@ -41,7 +40,7 @@ from .utils import get_diff_details, \
 from seahub.wopi.utils import get_wopi_dict
 from seahub.api2.base import APIView
 from seahub.api2.models import TokenV2, DESKTOP_PLATFORMS
-from seahub.avatar.templatetags.avatar_tags import api_avatar_url, avatar
+from seahub.avatar.templatetags.avatar_tags import api_avatar_url
 from seahub.avatar.templatetags.group_avatar_tags import api_grp_avatar_url, \
         grp_avatar
 from seahub.base.accounts import User
@@ -56,18 +55,23 @@ from seahub.thumbnail.utils import generate_thumbnail
 from seahub.notifications.models import UserNotification
 from seahub.options.models import UserOptions
 from seahub.profile.models import Profile, DetailedProfile
-from seahub.signals import (repo_created, repo_deleted)
+from seahub.profile.utils import get_user_profiles
+from seahub.signals import (repo_created, repo_deleted, repo_renamed)
 from seahub.share.models import FileShare, OrgFileShare, UploadLinkShare
+from seahub.share.utils import incr_view_cnt
 from seahub.utils import gen_file_get_url, gen_token, gen_file_upload_url, \
     check_filename_with_rename, is_valid_username, EVENTS_ENABLED, \
-    get_user_events, EMPTY_SHA1, get_ccnet_server_addr_port, is_pro_version, \
+    get_events_page, parse_events_cursor, EMPTY_SHA1, \
+    get_ccnet_server_addr_port, is_pro_version, \
     gen_block_get_url, get_file_type_and_ext, HAS_FILE_SEARCH, \
     gen_file_share_link, gen_dir_share_link, is_org_context, gen_shared_link, \
-    get_org_user_events, calculate_repos_last_modify, send_perm_audit_msg, \
-    gen_shared_upload_link, convert_cmmt_desc_link, is_valid_dirent_name, \
+    calculate_repos_last_modify, send_perm_audit_msg, \
+    gen_shared_upload_link, is_valid_dirent_name, \
     is_org_repo_creation_allowed, is_windows_operating_system
 from seahub.utils.devices import do_unlink_device
-from seahub.utils.repo import get_sub_repo_abbrev_origin_path
+from seahub.utils.repo import get_sub_repo_abbrev_origin_path, \
+    list_dir_sorted, dir_listing_cache, is_dir_listing_cacheable, \
+    get_dir_listing_cache_key, walk_dirs
 from seahub.utils.star import star_file, unstar_file
 from seahub.utils.file_types import DOCUMENT
 from seahub.utils.file_size import get_file_size_unit
@@ -111,14 +115,24 @@ except ImportError:
 
 from pysearpc import SearpcError, SearpcObjEncoder
 import seaserv
-from seaserv import seafserv_threaded_rpc, \
-    get_personal_groups_by_user, get_session_info, is_personal_repo, \
-    get_repo, check_permission, get_commits, is_passwd_set,\
+from seaserv import get_personal_groups_by_user, get_session_info, \
+    is_personal_repo, get_commits, is_passwd_set,\
     check_quota, list_share_repos, get_group_repos_by_owner, get_group_repoids, \
-    is_group_user, remove_share, get_group, \
-    get_commit, get_file_id_by_path, MAX_DOWNLOAD_DIR_SIZE, edit_repo, \
-    ccnet_threaded_rpc, get_personal_groups, seafile_api, \
-    create_org, ccnet_api
+    is_group_user, \
+    get_commit, get_file_id_by_path, MAX_DOWNLOAD_DIR_SIZE, \
+    get_personal_groups
+from seahub.utils.rpc import memoized_seafile_api as seafile_api, \
+    memoized_ccnet_api as ccnet_api, memoized_seaserv, \
+    memoized_seafserv_threaded_rpc as seafserv_threaded_rpc, \
+    memoized_ccnet_threaded_rpc as ccnet_threaded_rpc
+
+get_repo = memoized_seaserv.get_repo
+get_group = memoized_seaserv.get_group
+check_permission = memoized_seaserv.check_permission
+# mutating calls go through the memoized proxy to drop the request's cache
+edit_repo = memoized_seaserv.edit_repo
+remove_share = memoized_seaserv.remove_share
+create_org = memoized_seaserv.create_org
 
 from constance import config
 
@@ -467,6 +481,7 @@ class Repos(APIView):
                         email, -1, -1)
 
             shared_repos.sort(lambda x, y: cmp(y.last_modify, x.last_modify))
+            owner_profiles = get_user_profiles([r.user for r in shared_repos])
             for r in shared_repos:
                 r.password_need = is_passwd_set(r.repo_id, email)
                 repo = {
@@ -474,7 +489,7 @@ class Repos(APIView):
                     "id": r.repo_id,
                     "owner": r.user,
                     "name": r.repo_name,
-                    "owner_nickname": email2nickname(r.user),
+                    "owner_nickname": owner_profiles[r.user]['nickname'],
                     "desc": r.repo_desc,
                     "mtime": r.last_modify,
                     "mtime_relative": translate_seahub_time(r.last_modify),
@@ -508,7 +523,7 @@ class Repos(APIView):
                     "mtime": r.last_modify,
                     "size": r.size,
                     "encrypted": r.encrypted,
-                    "permission": check_permission(r.id, email),
+                    "permission": r.user_perm,
                     "root": r.root,
                     "head_commit_id": r.head_cmmt_id,
                     "version": r.version,
@@ -723,7 +738,7 @@ class PubRepos(APIView):
             repo_id = seafile_api.create_org_repo(repo_name, repo_desc,
                                                   username, passwd, org_id)
             repo = seafile_api.get_repo(repo_id)
-            seaserv.seafserv_threaded_rpc.set_org_inner_pub_repo(
+            seafserv_threaded_rpc.set_org_inner_pub_repo(
                 org_id, repo.id, permission)
         else:
             repo_id = seafile_api.create_repo(repo_name, repo_desc,
@@ -881,6 +896,8 @@ class Repo(APIView):
                         'You do not have permission to rename this library.')
 
             if edit_repo(repo_id, repo_name, repo_desc, username):
+                repo_renamed.send(sender=None, repo_id=repo_id,
+                                  repo_name=repo_name)
                 return Response("success")
             else:
                 return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1127,7 +1144,7 @@ class RepoOwner(APIView):
                     repo_owner, repo_id)
 
             # get all org pub repos
-            pub_repos = seaserv.seafserv_threaded_rpc.list_org_inner_pub_repos_by_owner(
+            pub_repos = seafserv_threaded_rpc.list_org_inner_pub_repos_by_owner(
                     org_id, repo_owner)
         else:
             # get repo shared to user/group list
@@ -1164,7 +1181,7 @@ class RepoOwner(APIView):
                 continue
 
             if org_id:
-                seaserv.seafserv_threaded_rpc.org_add_share(org_id, repo_id,
+                seafserv_threaded_rpc.org_add_share(org_id, repo_id,
                         new_owner, shared_username, shared_user.perm)
             else:
                 seafile_api.share_repo(repo_id, new_owner,
@@ -1194,7 +1211,7 @@ class RepoOwner(APIView):
                 seafile_api.set_org_inner_pub_repo(org_id, repo_id,
                         pub_repo.permission)
             else:
-                seaserv.seafserv_threaded_rpc.set_inner_pub_repo(
+                seafserv_threaded_rpc.set_inner_pub_repo(
                         repo_id, pub_repo.permission)
 
             break
@@ -1431,26 +1448,52 @@ class UpdateBlksLinkView(APIView):
         url = gen_file_upload_url(token, 'update-blks-api')
         return Response(url)
 
-def get_dir_recursively(username, repo_id, path, all_dirs):
-    path_id = seafile_api.get_dir_id_by_path(repo_id, path)
-    dirs = seafserv_threaded_rpc.list_dir_with_perm(repo_id, path,
-            path_id, username, -1, -1)
-
-    for dirent in dirs:
-        if stat.S_ISDIR(dirent.mode):
-            entry = {}
-            entry["type"] = 'dir'
-            entry["parent_dir"] = path
-            entry["id"] = dirent.obj_id
-            entry["name"] = dirent.obj_name
-            entry["mtime"] = dirent.mtime
-            entry["permission"] = dirent.permission
-            all_dirs.append(entry)
+def get_recursive_dir_entry(parent_dir, dirent):
+    """Return api representation of a sub dir, listed recursively.
+    """
+    return {
+        "type": 'dir',
+        "parent_dir": parent_dir,
+        "id": dirent.obj_id,
+        "name": dirent.obj_name,
+        "mtime": dirent.mtime,
+        "permission": dirent.permission,
+    }
+
+def get_dir_recursively(username, repo, path, dir_id, max_depth=None,
+                        limit=None):
+    """Return all sub dirs of `path`, sorted by name.
+    """
+    all_dirs = [get_recursive_dir_entry(parent_dir, dirent) for
+                parent_dir, dirent in walk_dirs(repo, path, dir_id, username,
+                                                max_depth, limit)]
+    all_dirs.sort(key=lambda x: x['name'].lower())
+    return all_dirs
 
-            sub_path = posixpath.join(path, dirent.obj_name)
-            get_dir_recursively(username, repo_id, sub_path, all_dirs)
+def get_dirent_entry(dirent, username):
+    """Return api representation of a ``DirentInfo``.
+    """
+    entry = {}
+    if stat.S_ISDIR(dirent.mode):
+        entry["type"] = "dir"
+    else:
+        entry["type"] = "file"
+        entry["size"] = dirent.size
+
+        if is_pro_version():
+            entry["is_locked"] = dirent.is_locked
+            entry["lock_owner"] = dirent.lock_owner
+            entry["lock_time"] = dirent.lock_time
+            if username == dirent.lock_owner:
+                entry["locked_by_me"] = True
+            else:
+                entry["locked_by_me"] = False
 
-    return all_dirs
+    entry["name"] = dirent.obj_name
+    entry["id"] = dirent.obj_id
+    entry["mtime"] = dirent.mtime
+    entry["permission"] = dirent.permission
+    return entry
 
 def get_dir_entrys_by_id(request, repo, path, dir_id, request_type=None):
     """ Get dirents in a dir
@@ -1460,61 +1503,42 @@ def get_dir_entrys_by_id(request, repo, path, dir_id, request_type=None):
     else, return both.
     """
     username = request.user.username
-    try:
-        dirs = seafserv_threaded_rpc.list_dir_with_perm(repo.id, path, dir_id,
-                username, -1, -1)
-        dirs = dirs if dirs else []
-    except SearpcError, e:
-        logger.error(e)
-        return api_error(HTTP_520_OPERATION_FAILED,
-                         "Failed to list dir.")
+    dir_perm = seafile_api.check_permission_by_path(repo.id, path, username)
+
+    # serialized listings are cached along with the dirents themselves
+    cacheable = is_dir_listing_cacheable()
+    if cacheable:
+        key = get_dir_listing_cache_key(repo.id, dir_id, dir_perm, 'json',
+                                        request_type)
+        content = dir_listing_cache.get(key)
+    else:
+        content = None
 
-    dir_list, file_list = [], []
-    for dirent in dirs:
-        dtype = "file"
-        entry = {}
-        if stat.S_ISDIR(dirent.mode):
-            dtype = "dir"
-        else:
-            if repo.version == 0:
-                entry["size"] = get_file_size(repo.store_id, repo.version,
-                                              dirent.obj_id)
-            else:
-                entry["size"] = dirent.size
-
-            if is_pro_version():
-                entry["is_locked"] = dirent.is_locked
-                entry["lock_owner"] = dirent.lock_owner
-                entry["lock_time"] = dirent.lock_time
-                if username == dirent.lock_owner:
-                    entry["locked_by_me"] = True
-                else:
-                    entry["locked_by_me"] = False
-
-        entry["type"] = dtype
-        entry["name"] = dirent.obj_name
-        entry["id"] = dirent.obj_id
-        entry["mtime"] = dirent.mtime
-        entry["permission"] = dirent.permission
-        if dtype == 'dir':
-            dir_list.append(entry)
+    if content is None:
+        try:
+            dirs, files = list_dir_sorted(repo, path, dir_id, username,
+                                          dir_perm)
+        except SearpcError, e:
+            logger.error(e)
+            return api_error(HTTP_520_OPERATION_FAILED,
+                             "Failed to list dir.")
+
+        if request_type == 'f':
+            dirents = files
+        elif request_type == 'd':
+            dirents = dirs
         else:
-            file_list.append(entry)
+            dirents = dirs + files
 
-    dir_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
-    file_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
+        dentrys = [get_dirent_entry(d, username) for d in dirents]
+        content = json.dumps(dentrys)
+        if cacheable:
+            dir_listing_cache.set(key, content)
 
-    if request_type == 'f':
-        dentrys = file_list
-    elif request_type == 'd':
-        dentrys = dir_list
-    else:
-        dentrys = dir_list + file_list
-
-    response = HttpResponse(json.dumps(dentrys), status=200,
+    response = HttpResponse(content, status=200,
                             content_type=json_content_type)
     response["oid"] = dir_id
-    response["dir_perm"] = seafile_api.check_permission_by_path(repo.id, path, username)
+    response["dir_perm"] = dir_perm
     return response
 
 def get_shared_link(request, repo_id, path):
@@ -2598,8 +2622,13 @@ class DirView(APIView):
 
                 if recursive == '1':
                     username = request.user.username
-                    dir_list = get_dir_recursively(username, repo_id, path, [])
-                    dir_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
+                    try:
+                        dir_list = get_dir_recursively(username, repo, path,
+                                                       dir_id)
+                    except SearpcError as e:
+                        logger.error(e)
+                        return api_error(HTTP_520_OPERATION_FAILED,
+                                         "Failed to list dir.")
                     response = HttpResponse(json.dumps(dir_list), status=200,
                                             content_type=json_content_type)
                     response["oid"] = dir_id
@@ -2959,8 +2988,7 @@ class SharedFileView(APIView):
             return api_error(status.HTTP_404_NOT_FOUND, "File not found")
 
         # Increase file shared link view_cnt, this operation should be atomic
-        fileshare.view_cnt = F('view_cnt') + 1
-        fileshare.save()
+        incr_view_cnt(fileshare)
 
         op = request.GET.get('op', 'download')
         return get_repo_file(request, repo_id, file_id, file_name, op)
@@ -3265,7 +3293,7 @@ class SharedRepo(APIView):
         elif share_type == 'public':
             if is_org_context(request):
                 org_id = request.user.org.org_id
-                seaserv.seafserv_threaded_rpc.unset_org_inner_pub_repo(org_id, repo_id)
+                seafserv_threaded_rpc.unset_org_inner_pub_repo(org_id, repo_id)
             else:
                 seafile_api.remove_inner_pub_repo(repo_id)
         else:
@@ -3388,7 +3416,7 @@ class SharedRepo(APIView):
                 if is_org_context(request):
                     org_id = request.user.org.org_id
                     try:
-                        seaserv.seafserv_threaded_rpc.set_org_inner_pub_repo(org_id, repo_id, permission)
+                        seafserv_threaded_rpc.set_org_inner_pub_repo(org_id, repo_id, permission)
                         send_perm_audit_msg('add-repo-perm', username, 'all', repo_id, '/', permission)
                     except SearpcError, e:
                         logger.error(e)
@@ -3413,29 +3441,51 @@ class EventsView(APIView):
             events = None
             return api_error(status.HTTP_404_NOT_FOUND, 'Events not enabled.')
 
+        # `cursor` is `more_cursor` of the previous page, `start` is the
+        # offset given by `more_offset`
+        cursor = request.GET.get('cursor', '')
         start = request.GET.get('start', '')
-
-        if not start:
-            start = 0
-        else:
+        if not cursor and start:
             try:
-                start = int(start)
+                int(start)
             except ValueError:
                 return api_error(status.HTTP_400_BAD_REQUEST, 'Start id must be integer')
+            cursor = start
+
+        if cursor:
+            try:
+                parse_events_cursor(cursor)
+            except ValueError:
+                return api_error(status.HTTP_400_BAD_REQUEST, 'Invalid cursor.')
 
         email = request.user.username
         events_count = 15
 
         if is_org_context(request):
             org_id = request.user.org.org_id
-            events, events_more_offset = get_org_user_events(org_id, email,
-                                                             start,
-                                                             events_count)
+            events, events_more_cursor = get_events_page(email, cursor,
+                                                         events_count,
+                                                         org_id=org_id)
         else:
-            events, events_more_offset = get_user_events(email, start,
+            events, events_more_cursor = get_events_page(email, cursor,
                                                          events_count)
+        events_more_offset = parse_events_cursor(events_more_cursor)[0]
         events_more = True if len(events) == events_count else False
 
+        try:
+            size = int(request.GET.get('size', 36))
+        except ValueError:
+            size = 36
+        authors = []
+        for e in events:
+            if e.etype == 'repo-update':
+                authors.append(e.commit.creator_name)
+            elif e.etype == 'repo-create':
+                authors.append(e.creator)
+            else:
+                authors.append(e.repo_owner)
+        author_profiles = get_user_profiles(authors, size)
+
         l = []
         for e in events:
             d = dict(etype=e.etype)
@@ -3447,7 +3497,7 @@ class EventsView(APIView):
                 d['repo_id'] = e.repo.id
                 d['repo_name'] = e.repo.name
                 d['commit_id'] = e.commit.id
-                d['converted_cmmt_desc'] = translate_commit_desc_escape(convert_cmmt_desc_link(e.commit))
+                d['converted_cmmt_desc'] = translate_commit_desc_escape(e.commit.converted_cmmt_desc)
                 d['more_files'] = e.commit.more_files
                 d['repo_encrypted'] = e.repo.encrypted
             else:
@@ -3463,12 +3513,13 @@ class EventsView(APIView):
                 time_diff = local - epoch
                 d['time'] = time_diff.seconds + (time_diff.days * 24 * 3600)
 
-            size = request.GET.get('size', 36)
-            url, is_default, date_uploaded = api_avatar_url(d['author'], size)
-            d['nick'] = email2nickname(d['author'])
-            d['name'] = email2nickname(d['author'])
-            d['avatar'] = avatar(d['author'], size)
-            d['avatar_url'] = request.build_absolute_uri(url)
+            author_profile = author_profiles[d['author']]
+            d['nick'] = author_profile['nickname']
+            d['name'] = author_profile['nickname']
+            d['avatar'] = '<img src="%s" width="%s" height="%s" class="avatar" />' % (
+                author_profile['avatar_url'], size, size)
+            d['avatar_url'] = request.build_absolute_uri(
+                author_profile['avatar_url'])
             d['time_relative'] = translate_seahub_time(utc_to_local(e.timestamp))
             d['date'] = utc_to_local(e.timestamp).strftime("%Y-%m-%d")
 
@@ -3476,6 +3527,7 @@ class EventsView(APIView):
             'events': l,
             'more': events_more,
             'more_offset': events_more_offset,
+            'more_cursor': events_more_cursor,
             }
         return Response(ret)
 
@@ -3816,7 +3868,7 @@ class GroupRepo(APIView):
 
         if seaserv.is_org_group(group_id):
             org_id = seaserv.get_org_id_by_group(group_id)
-            seaserv.del_org_group_repo(repo_id, org_id, group_id)
+            memoized_seaserv.del_org_group_repo(repo_id, org_id, group_id)
         else:
             seafile_api.unset_group_repo(repo_id, group_id, username)
 
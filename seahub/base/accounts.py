@@ -16,6 +16,7 @@ from constance import config
 from registration import signals
 
 from seahub.auth import login
+from seahub.api2.models import clear_user_token_cache
 from seahub.profile.models import Profile, DetailedProfile
 from seahub.role_permissions.utils import get_enabled_role_permissions_by_role
 from seahub.utils import is_user_password_strong, \
@@ -55,6 +56,7 @@ class UserManager(object):
         If user has a role, update it; or create a role for user.
         """
         ccnet_threaded_rpc.update_role_emailuser(email, role)
+        clear_user_token_cache(email)
         return self.get(email=email)
 
     def create_superuser(self, email, password):
@@ -199,6 +201,8 @@ class User(object):
                                                               self.password,
                                                               int(self.is_staff),
                                                               int(self.is_active))
+            # user may be deactivated or password changed
+            clear_user_token_cache(self.username)
         else:
             result_code = ccnet_threaded_rpc.add_emailuser(self.username,
                                                            self.password,
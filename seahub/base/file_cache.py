@@ -0,0 +1,387 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Sharded file based cache backend with an on-disk LRU/expiry index.
+
+Django's ``FileBasedCache`` keeps every entry in one directory and culls by
+listing that directory and deleting random files, which gets slow once the
+cache holds hundreds of thousands of entries. This backend instead:
+
+- spreads entry files over a fixed two level directory fan-out, derived from
+  the md5 of the key;
+- records every entry in a small SQLite index (``index.sqlite3`` in the cache
+  directory), with its expiry and last access time, plus an entry counter.
+  Access times are buffered in memory and written in batches, so reads do
+  not take the index write lock;
+- does not cull while setting a key. Run the ``cull_file_cache`` command
+  periodically instead: it deletes expired entries first, then the least
+  recently used ones, through the index only and ``CULL_BATCH_SIZE``
+  entries at a time;
+- implements ``add`` and ``incr``/``decr`` atomically across processes, using
+  a per-shard ``flock``.
+
+Usage in settings.py::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'seahub.base.file_cache.ShardedFileBasedCache',
+            'LOCATION': '/tmp/seahub_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000000,
+            }
+        }
+    }
+
+and in crontab::
+
+    */5 * * * * python manage.py cull_file_cache
+"""
+import errno
+import fcntl
+import hashlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    from django.utils.six.moves import cPickle as pickle
+except ImportError:
+    import pickle
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.encoding import force_bytes
+
+class ShardedFileBasedCache(BaseCache):
+    cache_suffix = '.djcache'
+    index_name = 'index.sqlite3'
+
+    def __init__(self, dir, params):
+        super(ShardedFileBasedCache, self).__init__(params)
+        options = params.get('OPTIONS', {})
+
+        self._dir = os.path.abspath(dir)
+        # number of directory levels, each level fans out to 256 directories
+        self._shard_levels = int(options.get('SHARD_LEVELS', 2))
+        # access times are written to the index once this many are buffered,
+        # or once the oldest buffered one is this old
+        self._access_batch_size = int(options.get('ACCESS_UPDATE_BATCH_SIZE', 100))
+        self._access_interval = int(options.get('ACCESS_UPDATE_INTERVAL', 60))
+        # number of entries deleted per index transaction when culling
+        self._cull_batch_size = int(options.get('CULL_BATCH_SIZE', 1000))
+
+        self._local = threading.local()
+        self._accesses = {}
+        self._accesses_since = time.time()
+        self._accesses_lock = threading.Lock()
+        self._createdir()
+
+    ########## index
+    def _index(self):
+        """Return a connection to the index for the current process/thread.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(os.path.join(self._dir, self.index_name),
+                               timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS entries ('
+                     'name TEXT PRIMARY KEY, expires REAL, accessed REAL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed '
+                     'ON entries (accessed)')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_expires '
+                     'ON entries (expires)')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta ('
+                     'key TEXT PRIMARY KEY, value INTEGER)')
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('count', 0)")
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._index()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def _index_add(self, name, expires):
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute('INSERT OR IGNORE INTO entries VALUES (?, ?, ?)',
+                               (name, expires, now))
+            if cur.rowcount == 1:
+                conn.execute("UPDATE meta SET value = value + 1 "
+                             "WHERE key = 'count'")
+                return True
+
+            conn.execute('UPDATE entries SET expires = ?, accessed = ? '
+                         'WHERE name = ?', (expires, now, name))
+            return False
+
+    def _index_remove(self, names):
+        if not names:
+            return
+        with self._transaction() as conn:
+            removed = 0
+            for name in names:
+                cur = conn.execute('DELETE FROM entries WHERE name = ?', (name,))
+                removed += cur.rowcount
+            if removed:
+                conn.execute("UPDATE meta SET value = MAX(value - ?, 0) "
+                             "WHERE key = 'count'", (removed,))
+
+    def _index_touch(self, name):
+        now = time.time()
+        with self._accesses_lock:
+            if not self._accesses:
+                self._accesses_since = now
+            self._accesses[name] = now
+            if len(self._accesses) < self._access_batch_size and \
+               now - self._accesses_since < self._access_interval:
+                return
+            accesses, self._accesses = self._accesses, {}
+
+        self._write_accesses(accesses)
+
+    def _write_accesses(self, accesses):
+        if not accesses:
+            return
+        with self._transaction() as conn:
+            conn.executemany('UPDATE entries SET accessed = ? WHERE name = ?',
+                             [(t, name) for name, t in accesses.items()])
+
+    def _flush_accesses(self):
+        with self._accesses_lock:
+            accesses, self._accesses = self._accesses, {}
+        self._write_accesses(accesses)
+
+    def _count(self):
+        row = self._index().execute(
+            "SELECT value FROM meta WHERE key = 'count'").fetchone()
+        return row[0] if row else 0
+
+    ########## files
+    def _createdir(self):
+        if not os.path.exists(self._dir):
+            try:
+                os.makedirs(self._dir, 0o700)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise EnvironmentError(
+                        "Cache directory '%s' does not exist "
+                        "and could not be created'" % self._dir)
+
+    def _key_to_name(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return hashlib.md5(force_bytes(key)).hexdigest()
+
+    def _shard_dir(self, name):
+        parts = [name[i * 2:i * 2 + 2] for i in range(self._shard_levels)]
+        return os.path.join(self._dir, *parts)
+
+    def _make_shard_dir(self, name):
+        shard_dir = self._shard_dir(name)
+        if not os.path.isdir(shard_dir):
+            try:
+                os.makedirs(shard_dir, 0o700)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+        return shard_dir
+
+    def _name_to_file(self, name):
+        return os.path.join(self._shard_dir(name), name + self.cache_suffix)
+
+    def _read(self, fname):
+        """Return (expiry, value) stored in `fname`, or ``None``.
+        """
+        try:
+            with io.open(fname, 'rb') as f:
+                expiry = pickle.load(f)
+                return expiry, pickle.loads(zlib.decompress(f.read()))
+        except (IOError, OSError) as e:
+            if e.errno == errno.ENOENT:
+                return None
+            raise
+        except (EOFError, zlib.error, pickle.UnpicklingError):
+            return None
+
+    def _write(self, name, value, expiry):
+        shard_dir = self._make_shard_dir(name)
+
+        fd, tmp_path = tempfile.mkstemp(dir=shard_dir)
+        renamed = False
+        try:
+            with io.open(fd, 'wb') as f:
+                f.write(pickle.dumps(expiry, pickle.HIGHEST_PROTOCOL))
+                f.write(zlib.compress(
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+            os.rename(tmp_path, self._name_to_file(name))
+            renamed = True
+        finally:
+            if not renamed:
+                os.remove(tmp_path)
+
+    def _remove_file(self, name):
+        try:
+            os.remove(self._name_to_file(name))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _is_expired(self, expiry):
+        return expiry is not None and expiry < time.time()
+
+    @contextmanager
+    def _lock(self, name):
+        """Hold an exclusive lock on the shard of `name`, across processes.
+        """
+        shard_dir = self._make_shard_dir(name)
+
+        with open(os.path.join(shard_dir, '.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _remove_entries(self, names):
+        for name in names:
+            self._remove_file(name)
+        self._index_remove(names)
+
+    def cull(self):
+        """Delete expired entries, then, if the cache holds ``MAX_ENTRIES``
+        entries or more, the least recently used ones until a
+        ``1 / CULL_FREQUENCY`` share of them is gone.
+
+        Entries are deleted ``CULL_BATCH_SIZE`` at a time. Return the number
+        of deleted entries.
+        """
+        self._flush_accesses()
+        conn = self._index()
+        removed = 0
+
+        now = time.time()
+        while True:
+            names = [r[0] for r in conn.execute(
+                'SELECT name FROM entries WHERE expires < ? LIMIT ?',
+                (now, self._cull_batch_size))]
+            if not names:
+                break
+            self._remove_entries(names)
+            removed += len(names)
+
+        num_entries = self._count()
+        if num_entries < self._max_entries:
+            return removed
+
+        if self._cull_frequency == 0:
+            self.clear()
+            return removed + num_entries
+
+        num_to_cull = int(num_entries / self._cull_frequency)
+        while num_to_cull > 0:
+            names = [r[0] for r in conn.execute(
+                'SELECT name FROM entries ORDER BY accessed LIMIT ?',
+                (min(num_to_cull, self._cull_batch_size),))]
+            if not names:
+                break
+            self._remove_entries(names)
+            removed += len(names)
+            num_to_cull -= len(names)
+
+        return removed
+
+    ########## cache API
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        name = self._key_to_name(key, version)
+        expiry = self.get_backend_timeout(timeout)
+
+        with self._lock(name):
+            ret = self._read(self._name_to_file(name))
+            if ret is not None and not self._is_expired(ret[0]):
+                return False
+
+            self._write(name, value, expiry)
+            self._index_add(name, expiry)
+        return True
+
+    def get(self, key, default=None, version=None):
+        name = self._key_to_name(key, version)
+        ret = self._read(self._name_to_file(name))
+        if ret is None:
+            return default
+
+        expiry, value = ret
+        if self._is_expired(expiry):
+            self._remove_file(name)
+            self._index_remove([name])
+            return default
+
+        self._index_touch(name)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        name = self._key_to_name(key, version)
+        expiry = self.get_backend_timeout(timeout)
+
+        self._write(name, value, expiry)
+        self._index_add(name, expiry)
+
+    def delete(self, key, version=None):
+        name = self._key_to_name(key, version)
+        self._remove_file(name)
+        self._index_remove([name])
+
+    def has_key(self, key, version=None):
+        name = self._key_to_name(key, version)
+        ret = self._read(self._name_to_file(name))
+        return ret is not None and not self._is_expired(ret[0])
+
+    def incr(self, key, delta=1, version=None):
+        name = self._key_to_name(key, version)
+        with self._lock(name):
+            ret = self._read(self._name_to_file(name))
+            if ret is None or self._is_expired(ret[0]):
+                raise ValueError("Key '%s' not found" % key)
+
+            expiry, value = ret
+            new_value = value + delta
+            # keep the original expiry
+            self._write(name, new_value, expiry)
+            self._index_touch(name)
+        return new_value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        if not os.path.exists(self._dir):
+            return
+
+        with self._accesses_lock:
+            self._accesses = {}
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM entries')
+            conn.execute("UPDATE meta SET value = 0 WHERE key = 'count'")
+
+        for entry in os.listdir(self._dir):
+            path = os.path.join(self._dir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,20 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+# encoding: utf-8
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from seahub.base.file_cache import ShardedFileBasedCache
+
+class Command(BaseCommand):
+    help = "Delete expired and least recently used entries of sharded file caches"
+
+    def handle(self, *args, **options):
+        for alias in settings.CACHES:
+            cache = caches[alias]
+            if not isinstance(cache, ShardedFileBasedCache):
+                continue
+
+            removed = cache.cull()
+            self.stdout.write('%d entries removed from cache %s.' % (
+                removed, alias))
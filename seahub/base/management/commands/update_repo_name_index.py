@@ -0,0 +1,56 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+# encoding: utf-8
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from seaserv import seafile_api
+
+from seahub.base.models import RepoNameIndex
+
+class Command(BaseCommand):
+    help = "Sync the library name index used by admin library search"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='number of libraries listed per RPC')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        indexed = dict(RepoNameIndex.objects.values_list('repo_id', 'name'))
+        seen = set()
+        added = updated = 0
+
+        start = 0
+        while True:
+            repos = seafile_api.get_repo_list(start, batch_size)
+            if not repos:
+                break
+            start += batch_size
+
+            with transaction.atomic():
+                for repo in repos:
+                    if repo.is_virtual:
+                        continue
+
+                    seen.add(repo.repo_id)
+                    name = repo.repo_name or ''
+                    if repo.repo_id not in indexed:
+                        added += 1
+                    elif indexed[repo.repo_id] != name:
+                        updated += 1
+                    else:
+                        continue
+                    RepoNameIndex.objects.update_repo(repo.repo_id, name)
+
+            if len(repos) < batch_size:
+                break
+
+        removed = [x for x in indexed if x not in seen]
+        for i in range(0, len(removed), batch_size):
+            RepoNameIndex.objects.filter(
+                repo_id__in=removed[i:i + batch_size]).delete()
+
+        RepoNameIndex.objects.set_built()
+
+        self.stdout.write('Library name index synced: %d added, %d updated, '
+                          '%d removed.' % (added, updated, len(removed)))
@@ -1,14 +1,15 @@
 # Copyright (c) 2012-2016 Seafile Ltd.
 import re
+import logging
 
 from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect
 
-from seaserv import ccnet_api
-
 from seahub.notifications.models import Notification
 from seahub.notifications.utils import refresh_cache
+from seahub.utils.rpc import memoized_ccnet_api as ccnet_api, \
+    start_rpc_cache, stop_rpc_cache
 try:
     from seahub.settings import CLOUD_MODE
 except ImportError:
@@ -17,7 +18,38 @@ try:
     from seahub.settings import MULTI_TENANCY
 except ImportError:
     MULTI_TENANCY = False
-from seahub.settings import SITE_ROOT
+from seahub.settings import SITE_ROOT, ENABLE_REQUEST_RPC_CACHE
+
+logger = logging.getLogger(__name__)
+
+class RPCCacheMiddleware(object):
+    """
+    Middleware that memoizes read-only RPC calls during a request, when
+    ``ENABLE_REQUEST_RPC_CACHE`` is set.
+
+    Only requests with a safe method are memoized, since mutating code may
+    call seaserv directly, bypassing the memoized proxies which drop the
+    cache.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def process_request(self, request):
+        if ENABLE_REQUEST_RPC_CACHE and request.method in self.SAFE_METHODS:
+            request.rpc_cache = start_rpc_cache()
+        return None
+
+    def process_response(self, request, response):
+        if not ENABLE_REQUEST_RPC_CACHE:
+            return response
+
+        rpc_cache = stop_rpc_cache()
+        if rpc_cache is not None:
+            logger.debug('[RPC cache] %s hits: %d, misses: %d, invalidations: %d' % (
+                request.path, rpc_cache.hits, rpc_cache.misses,
+                rpc_cache.invalidations))
+            response['X-Seahub-RPC-Cache'] = 'hits=%d, misses=%d' % (
+                rpc_cache.hits, rpc_cache.misses)
+        return response
 
 class BaseMiddleware(object):
     """
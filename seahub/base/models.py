@@ -3,7 +3,7 @@ import os
 import datetime
 import hashlib
 import logging
-from django.db import models
+from django.db import models, IntegrityError
 from django.utils import timezone
 
 from pysearpc import SearpcError
@@ -330,3 +330,95 @@ class ClientLoginToken(models.Model):
 
     def __unicode__(self):
         return "/".join(self.username, self.token)
+
+REPO_NAME_INDEX_COMMAND = 'update_repo_name_index'
+
+class RepoNameIndexManager(models.Manager):
+    def is_built(self):
+        """Return ``True`` if the index has been fully synced at least once
+        by the ``update_repo_name_index`` command.
+        """
+        return CommandsLastCheck.objects.filter(
+            command_type=REPO_NAME_INDEX_COMMAND).exists()
+
+    def set_built(self):
+        now = datetime.datetime.now()
+        updated = CommandsLastCheck.objects.filter(
+            command_type=REPO_NAME_INDEX_COMMAND).update(last_check=now)
+        if not updated:
+            CommandsLastCheck.objects.create(
+                command_type=REPO_NAME_INDEX_COMMAND, last_check=now)
+
+    def update_repo(self, repo_id, repo_name):
+        """Add or update the name of library `repo_id`.
+        """
+        name = repo_name or ''
+        qs = super(RepoNameIndexManager, self).filter(repo_id=repo_id)
+        if qs.update(name=name, name_lower=name.lower()):
+            return
+
+        try:
+            self.create(repo_id=repo_id, name=name, name_lower=name.lower())
+        except IntegrityError:
+            # added by a concurrent request
+            qs.update(name=name, name_lower=name.lower())
+
+    def remove_repo(self, repo_id):
+        super(RepoNameIndexManager, self).filter(repo_id=repo_id).delete()
+
+    def search(self, keyword, start=0, limit=-1):
+        """Return ids of libraries whose name contains `keyword`, case
+        insensitively, ordered by name.
+        """
+        qs = super(RepoNameIndexManager, self).filter(
+            name_lower__contains=keyword.lower()).order_by('name_lower', 'id')
+        qs = qs.values_list('repo_id', flat=True)
+        if limit < 0:
+            return list(qs[start:])
+        return list(qs[start:start + limit])
+
+class RepoNameIndex(models.Model):
+    """Names of libraries, for admin library search.
+
+    Updated on library create/rename/delete, and fully re-synced by the
+    ``update_repo_name_index`` command, for libraries created or renamed
+    outside of seahub. Not used for search until the command has run once.
+    """
+    repo_id = models.CharField(max_length=36, unique=True)
+    name = models.CharField(max_length=255)
+    name_lower = models.CharField(max_length=255, db_index=True)
+
+    objects = RepoNameIndexManager()
+
+def index_repo_name(repo_id, repo_name):
+    """Add or update library `repo_id` in the name index.
+
+    Errors are logged only, the index is re-synced by the
+    ``update_repo_name_index`` command anyway.
+    """
+    try:
+        RepoNameIndex.objects.update_repo(repo_id, repo_name)
+    except Exception as e:
+        logger.error(e)
+
+def unindex_repo_name(repo_id):
+    try:
+        RepoNameIndex.objects.remove_repo(repo_id)
+    except Exception as e:
+        logger.error(e)
+
+########## signal handlers
+from django.dispatch import receiver
+from seahub.signals import repo_created, repo_deleted, repo_renamed
+
+@receiver(repo_created)
+def add_repo_name_index(sender, **kwargs):
+    index_repo_name(kwargs['repo_id'], kwargs['repo_name'])
+
+@receiver(repo_renamed)
+def update_repo_name_index(sender, **kwargs):
+    index_repo_name(kwargs['repo_id'], kwargs['repo_name'])
+
+@receiver(repo_deleted)
+def remove_repo_name_index(sender, **kwargs):
+    unindex_repo_name(kwargs['repo_id'])
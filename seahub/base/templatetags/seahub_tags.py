@@ -22,7 +22,8 @@ from seahub.profile.settings import NICKNAME_CACHE_TIMEOUT, NICKNAME_CACHE_PREFI
 from seahub.cconvert import CConvert
 from seahub.po import TRANSLATION_MAP
 from seahub.shortcuts import get_first_object_or_none
-from seahub.utils import normalize_cache_key, CMMT_DESC_PATT
+from seahub.utils import normalize_cache_key, CMMT_DESC_PATT, \
+    file_type_classifier
 from seahub.utils.html import avoid_wrapping
 from seahub.utils.file_size import get_file_size_unit
 
@@ -44,80 +45,13 @@ def tsstr_day(value):
     except:
         return datetime.fromtimestamp(value/1000000).strftime("%Y-%m-%d")
 
-# Supported file extensions and file icon name.
-FILEEXT_ICON_MAP = {
-
-    # text file
-    'md': 'txt.png',
-    'txt': 'txt.png',
-
-    # pdf file
-    'pdf' : 'pdf.png',
-
-    # document file
-    'doc' : 'word.png',
-    'docx' : 'word.png',
-    'odt' : 'word.png',
-    'fodt' : 'word.png',
-
-    'ppt' : 'ppt.png',
-    'pptx' : 'ppt.png',
-    'odp' : 'ppt.png',
-    'fodp' : 'ppt.png',
-
-    'xls' : 'excel.png',
-    'xlsx' : 'excel.png',
-    'ods' : 'excel.png',
-    'fods' : 'excel.png',
-
-    # video
-    'mp4': 'video.png',
-    'ogv': 'video.png',
-    'webm': 'video.png',
-    'mov': 'video.png',
-    'flv': 'video.png',
-    'wmv': 'video.png',
-    'rmvb': 'video.png',
-
-    # music file
-    'mp3' : 'music.png',
-    'oga' : 'music.png',
-    'ogg' : 'music.png',
-    'flac' : 'music.png',
-    'aac' : 'music.png',
-    'ac3' : 'music.png',
-    'wma' : 'music.png',
-
-    # image file
-    'jpg' : 'pic.png',
-    'jpeg' : 'pic.png',
-    'png' : 'pic.png',
-    'svg' : 'pic.png',
-    'gif' : 'pic.png',
-    'bmp' : 'pic.png',
-    'ico' : 'pic.png',
-
-    # default
-    'default' : 'file.png',
-}
 @register.filter(name='file_icon_filter')
 def file_icon_filter(value, size=None):
     """Get file icon according to the file postfix"""
-    if value.rfind('.') > 0:
-        file_ext = value.split('.')[-1].lower()
-    else:
-        file_ext = None
-
-    if file_ext and FILEEXT_ICON_MAP.has_key(file_ext):
-        if size == 192:
-            return '192/' + FILEEXT_ICON_MAP.get(file_ext)
-        else:
-            return '24/' + FILEEXT_ICON_MAP.get(file_ext)
+    if size == 192:
+        return '192/' + file_type_classifier.get_icon(value)
     else:
-        if size == 192:
-            return '192/' + FILEEXT_ICON_MAP.get('default')
-        else:
-            return '24/' + FILEEXT_ICON_MAP.get('default')
+        return '24/' + file_type_classifier.get_icon(value)
 
 # This way of translation looks silly, but works well.
 COMMIT_MSG_TRANSLATION_MAP = {
@@ -437,14 +371,8 @@ cc.spliter = ''
 @register.filter(name='char2pinyin')
 def char2pinyin(value):
     """Convert Chinese character to pinyin."""
-
-    key = normalize_cache_key(value, 'CHAR2PINYIN_')
-    py = cache.get(key)
-    if not py:
-        py = cc.convert(value)
-        cache.set(key, py, 365 * 24 * 60 * 60)
-
-    return py
+    # conversion is a table lookup per char, cheaper than a cache round trip
+    return cc.convert(value)
 
 @register.filter(name='translate_permission')
 def translate_permission(value):
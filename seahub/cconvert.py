@@ -18,21 +18,43 @@
 import sys,os
 import re
 import string
+
+PUNCTUATION_SPLITER = frozenset("'\"`~!@#$%^&*()=+[]{}\\|;:,.<>/?")
+PUNCTUATION_EMPTY = frozenset("－—！#＃%％&＆（）*，、。：；？？　@＠＼{｛｜}｝~～‘’“”《》【】+＋=＝×￥·…　".decode("utf-8"))
+
+PINYIN_RE = re.compile("[0-9a-zA-Z]+")
+
+def load_table(path=None):
+	"Load data table, return a dict of unicode char -> pinyin with shengdiao"
+	if path is None:
+		path = os.path.join(os.path.dirname(__file__), 'convert-utf-8.txt')
+	try:
+		fp=open(path)
+	except IOError:
+		print "Can't load data from convert-utf-8.txt\nPlease make sure this file exists."
+		sys.exit(1)
+
+	table = {}
+	try:
+		for line in fp:
+			line = line.decode("utf-8")
+			m = PINYIN_RE.match(line, 1)
+			if line and m:
+				# keep the first reading of the first line of a char
+				table.setdefault(line[0], m.group(0))
+	finally:
+		fp.close()
+	return table
+
+PINYIN_TABLE = load_table()
+
 class CConvert:
 	def __init__(self):
 		self.has_shengdiao = False
 		self.just_shengmu  = False
 		self.spliter = '-'
-		"Load data table"
-		try:
-			fp=open(os.path.join(os.path.dirname(__file__), 'convert-utf-8.txt'))
-		except IOError:
-			print "Can't load data from convert-utf-8.txt\nPlease make sure this file exists."
-			sys.exit(1)
-		else:
-			self.data=fp.read().decode("utf-8")# decoded data to unicode
-			fp.close()
-	
+		self.table = PINYIN_TABLE
+
 	def convert1(self, strIn):
 		"Convert Unicode strIn to PinYin"
 		length, strOutKey, strOutValue, i=len(strIn), "", "", 0
@@ -63,16 +85,16 @@ class CConvert:
 	def getIndex(self, strIn):
 		"Convert single Unicode to PinYin from index"
 		if strIn==' ':return self.spliter
-		if set(strIn).issubset("'\"`~!@#$%^&*()=+[]{}\\|;:,.<>/?"):return self.spliter # or return ""
-		if set(strIn).issubset("－—！#＃%％&＆（）*，、。：；？？　@＠＼{｛｜}｝~～‘’“”《》【】+＋=＝×￥·…　".decode("utf-8")):return ""
-		pos=re.search("^"+strIn+"([0-9a-zA-Z]+)", self.data, re.M)
-		if pos==None:
+		if strIn in PUNCTUATION_SPLITER:return self.spliter # or return ""
+		if strIn in PUNCTUATION_EMPTY:return ""
+		py=self.table.get(strIn)
+		if py==None:
 			return strIn
 		else:
 			if not self.just_shengmu:
-				return pos.group(1)
+				return py
 			else:
-				return pos.group(1)[:1]
+				return py[:1]
 	
 	def convert(self, strIn):
 		"Convert Unicode strIn to PinYin"
@@ -99,3 +121,13 @@ class CConvert:
 				.replace(self.spliter+self.spliter,self.spliter) \
 				.strip(self.spliter+' ').replace(self.spliter+self.spliter,self.spliter)
 		return pinyin
+
+	def convert_many(self, strs):
+		"Convert a list of Unicode strings to PinYin"
+		converted = {}
+		ret = []
+		for strIn in strs:
+			if strIn not in converted:
+				converted[strIn] = self.convert(strIn)
+			ret.append(converted[strIn])
+		return ret
@@ -2,7 +2,8 @@
 import datetime
 import os
 import re
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Count, Max
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -39,3 +40,91 @@ class PublicGroup(models.Model):
     To record a public group
     """
     group_id = models.IntegerField(db_index=True)
+
+class GroupMessageSummaryManager(models.Manager):
+    def add_msg(self, group_id, timestamp):
+        """Count a new message of group `group_id`, sent at `timestamp`.
+        """
+        group_id = int(group_id)
+        updated = super(GroupMessageSummaryManager, self).filter(
+            group_id=group_id).update(msg_count=F('msg_count') + 1,
+                                      last_msg_timestamp=timestamp)
+        if not updated:
+            # first message since summaries are kept, messages before it
+            # are counted by ``get_summaries``
+            self.get_summaries([group_id])
+
+    def update_group(self, group_id):
+        """Count messages of group `group_id` again, e.g. after a message is
+        deleted.
+        """
+        group_id = int(group_id)
+        stat = GroupMessage.objects.filter(group_id=group_id).aggregate(
+            msg_count=Count('id'), last_msg_timestamp=Max('timestamp'))
+        updated = super(GroupMessageSummaryManager, self).filter(
+            group_id=group_id).update(**stat)
+        if not updated:
+            self.get_summaries([group_id])
+
+    def get_summaries(self, group_ids):
+        """Return a dict of group id -> ``GroupMessageSummary`` of
+        `group_ids`.
+
+        Summaries of groups not counted yet are created from their messages,
+        with one query for all of them.
+        """
+        group_ids = set(int(x) for x in group_ids)
+        if not group_ids:
+            return {}
+
+        ret = dict((s.group_id, s) for s in
+                   super(GroupMessageSummaryManager, self).filter(
+                       group_id__in=group_ids))
+        missing = group_ids - set(ret.keys())
+        if not missing:
+            return ret
+
+        stats = GroupMessage.objects.filter(group_id__in=missing).values(
+            'group_id').annotate(msg_count=Count('id'),
+                                 last_msg_timestamp=Max('timestamp'))
+        stats = dict((x['group_id'], x) for x in stats)
+        summaries = []
+        for group_id in missing:
+            stat = stats.get(group_id, {})
+            summaries.append(GroupMessageSummary(
+                group_id=group_id, msg_count=stat.get('msg_count', 0),
+                last_msg_timestamp=stat.get('last_msg_timestamp')))
+        try:
+            with transaction.atomic():
+                self.bulk_create(summaries)
+        except IntegrityError:
+            # created by another request meanwhile, it counted the same
+            # messages
+            pass
+
+        for s in summaries:
+            ret[s.group_id] = s
+        return ret
+
+class GroupMessageSummary(models.Model):
+    """Number of messages of a group and time of the latest one, updated
+    when a message is added or deleted.
+    """
+    group_id = models.IntegerField(unique=True)
+    msg_count = models.IntegerField(default=0)
+    last_msg_timestamp = models.DateTimeField(null=True)
+
+    objects = GroupMessageSummaryManager()
+
+########## signal handlers
+from django.db.models.signals import post_delete
+from seahub.group.signals import grpmsg_added
+
+@receiver(grpmsg_added)
+def add_group_message_summary(sender, **kwargs):
+    timestamp = kwargs.get('timestamp') or datetime.datetime.now()
+    GroupMessageSummary.objects.add_msg(kwargs['group_id'], timestamp)
+
+@receiver(post_delete, sender=GroupMessage)
+def update_group_message_summary(sender, instance, **kwargs):
+    GroupMessageSummary.objects.update_group(instance.group_id)
@@ -26,6 +26,7 @@ from models import PublicGroup
 from forms import MessageForm, GroupAddForm, WikiCreateForm
 from seahub.auth import REDIRECT_FIELD_NAME
 from seahub.base.decorators import sys_staff_required, require_POST
+from seahub.base.models import index_repo_name
 from seahub.group.utils import validate_group_name, BadGroupNameError, \
     ConflictGroupNameError
 from seahub.wiki import get_group_wiki_repo, get_group_wiki_page, \
@@ -234,6 +235,7 @@ def create_group_repo(request, group_id):
         except SearpcError, e:
             logger.error(e)
             return json_error(_(u'Failed to create'))
+        index_repo_name(repo_id, repo_name)
 
         try:
             seafile_api.add_org_group_repo(repo_id, org_id, group.id,
@@ -256,6 +258,7 @@ def create_group_repo(request, group_id):
         except SearpcError, e:
             logger.error(e)
             return json_error(_(u'Failed to create'))
+        index_repo_name(repo_id, repo_name)
 
         try:
             seafile_api.set_group_repo(repo_id, group.id, username, permission)
@@ -413,6 +416,7 @@ def group_wiki_create(request, group):
     repo_id = create_repo(repo_name, repo_desc, user, passwd)
     if not repo_id:
         return json_error(_(u'Failed to create'), 500)
+    index_repo_name(repo_id, repo_name)
 
     try:
         seafile_api.set_group_repo(repo_id, group.id, user, permission)
@@ -15,7 +15,6 @@ from pysearpc import SearpcError
 from seahub.auth.decorators import login_required_ajax
 from seahub.base.accounts import User
 from seahub.base.decorators import require_POST
-from seahub.base.models import UserLastLogin
 from seahub.institutions.decorators import (inst_admin_required,
                                             inst_admin_can_manage_user)
 from seahub.institutions.utils import get_institution_available_quota
@@ -23,25 +22,11 @@ from seahub.profile.models import Profile, DetailedProfile
 from seahub.utils import is_valid_username, clear_token
 from seahub.utils.rpc import mute_seafile_api
 from seahub.utils.file_size import get_file_size_unit
-from seahub.views.sysadmin import email_user_on_activation, populate_user_info
+from seahub.views.sysadmin import email_user_on_activation, populate_users
 
 logger = logging.getLogger(__name__)
 
 
-def _populate_user_quota_usage(user):
-    """Populate space/share quota to user.
-
-    Arguments:
-    - `user`:
-    """
-    try:
-        user.space_usage = seafile_api.get_user_self_usage(user.email)
-        user.space_quota = seafile_api.get_user_quota(user.email)
-    except SearpcError as e:
-        logger.error(e)
-        user.space_usage = -1
-        user.space_quota = -1
-
 @inst_admin_required
 def info(request):
     """List instituion info.
@@ -73,18 +58,11 @@ def useradmin(request):
         page_next = False
     users = [User.objects.get(x) for x in usernames[:per_page]]
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.username for x in users])
+    populate_users(users)
     for u in users:
         if u.username == request.user.username:
             u.is_self = True
 
-        populate_user_info(u)
-        _populate_user_quota_usage(u)
-
-        for e in last_logins:
-            if e.username == u.username:
-                u.last_login = e.last_login
-
     return render_to_response('institutions/useradmin.html', {
         'inst': inst,
         'users': users,
@@ -109,18 +87,11 @@ def useradmin_search(request):
     usernames = [x.user for x in profiles if q in x.user]
     users = [User.objects.get(x) for x in usernames]
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.username for x in users])
+    populate_users(users)
     for u in users:
         if u.username == request.user.username:
             u.is_self = True
 
-        populate_user_info(u)
-        _populate_user_quota_usage(u)
-
-        for e in last_logins:
-            if e.username == u.username:
-                u.last_login = e.last_login
-
     return render_to_response('institutions/useradmin_search.html', {
         'inst': inst,
         'users': users,
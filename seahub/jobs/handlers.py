@@ -0,0 +1,172 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Handlers of background jobs, one per job type.
+
+A handler is called with the job, its params and one item, and returns a
+dict of extra info for the item on success (or ``None``). It raises
+``JobItemError`` to report the item as failed with a message.
+"""
+import logging
+
+from constance import config
+from django.utils.translation import ugettext as _
+
+from seaserv import seafile_api, ccnet_api
+
+from seahub.admin_log.models import USER_ADD, USER_DELETE
+from seahub.admin_log.signals import admin_operation
+from seahub.base.accounts import User
+from seahub.base.templatetags.seahub_tags import email2nickname
+from seahub.group.utils import is_group_member
+from seahub.options.models import UserOptions
+from seahub.profile.models import Profile, DetailedProfile
+from seahub.role_permissions.utils import get_available_roles
+from seahub.settings import SITE_NAME
+from seahub.utils import is_pro_version, is_valid_username
+from seahub.utils.file_size import get_file_size_unit
+from seahub.utils.mail import send_html_email_with_dj_template
+
+logger = logging.getLogger(__name__)
+
+JOB_BATCH_ADD_USER = 'batch-add-user'
+JOB_GROUP_MEMBERS_IMPORT = 'group-members-import'
+JOB_USERS_SET_QUOTA = 'users-set-quota'
+JOB_USERS_DELETE = 'users-delete'
+
+JOB_HANDLERS = {}
+
+class JobItemError(Exception):
+    def __init__(self, error_msg):
+        super(JobItemError, self).__init__(error_msg)
+        self.error_msg = error_msg
+
+def job_handler(job_type):
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+def get_job_handler(job_type):
+    return JOB_HANDLERS.get(job_type)
+
+@job_handler(JOB_BATCH_ADD_USER)
+def batch_add_user(job, params, item):
+    """Add one user of a CSV row: email, password, name, department, role,
+    quota(MB). The password is not stored in the row but passed as the
+    item's secret.
+    """
+    row = item['row']
+    username = item['email']
+    if item.get('secret') is None:
+        raise JobItemError(_(u'Password can not be read, please add the user again.'))
+
+    password = item['secret'].strip()
+    if not is_valid_username(username) or not password:
+        raise JobItemError(_(u'Email or password is invalid.'))
+
+    try:
+        User.objects.get(email=username)
+        raise JobItemError(_(u'User %s already exists.') % username)
+    except User.DoesNotExist:
+        pass
+
+    User.objects.create_user(username, password, is_staff=False,
+                             is_active=True)
+
+    if config.FORCE_PASSWORD_CHANGE:
+        UserOptions.objects.set_force_passwd_change(username)
+
+    # then update the user's optional info
+    try:
+        nickname = row[2].strip()
+        if len(nickname) <= 64 and '/' not in nickname:
+            Profile.objects.add_or_update(username, nickname, '')
+    except Exception as e:
+        logger.error(e)
+
+    try:
+        department = row[3].strip()
+        if len(department) <= 512:
+            DetailedProfile.objects.add_or_update(username, department, '')
+    except Exception as e:
+        logger.error(e)
+
+    try:
+        role = row[4].strip()
+        if is_pro_version() and role in get_available_roles():
+            User.objects.update_role(username, role)
+    except Exception as e:
+        logger.error(e)
+
+    try:
+        space_quota_mb = row[5].strip()
+        space_quota_mb = int(space_quota_mb)
+        if space_quota_mb >= 0:
+            space_quota = int(space_quota_mb) * get_file_size_unit('MB')
+            seafile_api.set_user_quota(username, space_quota)
+    except Exception as e:
+        logger.error(e)
+
+    send_html_email_with_dj_template(
+        username, dj_template='sysadmin/user_batch_add_email.html',
+        subject=_(u'You are invited to join %s') % SITE_NAME,
+        context={
+            'user': email2nickname(job.username),
+            'email': username,
+            'password': password,
+        })
+
+    # send admin operation log signal
+    admin_op_detail = {
+        "email": username,
+    }
+    admin_operation.send(sender=None, admin_name=job.username,
+                         operation=USER_ADD, detail=admin_op_detail)
+
+@job_handler(JOB_GROUP_MEMBERS_IMPORT)
+def group_members_import(job, params, item):
+    group_id = params['group_id']
+    org_id = params.get('org_id')
+    email = item['email']
+
+    try:
+        User.objects.get(email=email)
+    except User.DoesNotExist:
+        raise JobItemError('User %s not found.' % email)
+
+    if is_group_member(group_id, email):
+        raise JobItemError(_(u'User %s is already a group member.') % email)
+
+    # Can only invite organization users to group
+    if org_id and not ccnet_api.org_user_exists(org_id, email):
+        raise JobItemError(_(u'User %s not found in organization.') % email)
+
+    ccnet_api.group_add_member(group_id, job.username, email)
+
+@job_handler(JOB_USERS_SET_QUOTA)
+def users_set_quota(job, params, item):
+    email = item['email']
+    try:
+        User.objects.get(email=email)
+    except User.DoesNotExist:
+        raise JobItemError('User %s not found.' % email)
+
+    seafile_api.set_user_quota(email, params['quota_total'])
+    return {'quota_total': seafile_api.get_user_quota(email)}
+
+@job_handler(JOB_USERS_DELETE)
+def users_delete(job, params, item):
+    email = item['email']
+    try:
+        user = User.objects.get(email=email)
+    except User.DoesNotExist:
+        raise JobItemError('User %s not found.' % email)
+
+    user.delete()
+
+    # send admin operation log signal
+    admin_op_detail = {
+        "email": email,
+    }
+    admin_operation.send(sender=None, admin_name=job.username,
+                         operation=USER_DELETE, detail=admin_op_detail)
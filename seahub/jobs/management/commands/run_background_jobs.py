@@ -0,0 +1,46 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+# encoding: utf-8
+import logging
+import time
+
+from django import db
+from django.core.management.base import BaseCommand
+
+from seahub.jobs.models import BackgroundJob
+from seahub.jobs.settings import BACKGROUND_JOB_STALE_TIMEOUT
+from seahub.jobs.utils import run_job
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Run queued background jobs, e.g. CSV user import, batch delete."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Exit when there is no more queued job.')
+        parser.add_argument('--interval', type=int, default=5,
+                            help='Seconds to wait before polling for new jobs.')
+
+    def handle(self, *args, **options):
+        while True:
+            # the worker is long running, do not reuse a connection the
+            # database server may have closed
+            db.close_old_connections()
+
+            job = BackgroundJob.objects.claim_next(BACKGROUND_JOB_STALE_TIMEOUT)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            logger.info('Start background job %s (%s), from item %d of %d.' % (
+                job.pk, job.job_type, job.processed, job.total))
+            try:
+                run_job(job)
+            except Exception as e:
+                # leave the job running, it is resumed from its last
+                # checkpoint once stale
+                logger.error(e)
+                continue
+            logger.info('Finish background job %s.' % job.pk)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import datetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('username', models.CharField(max_length=255, db_index=True)),
+                ('job_type', models.CharField(max_length=50)),
+                ('status', models.CharField(default=b'queued', max_length=20, db_index=True)),
+                ('params', models.TextField()),
+                ('items', models.TextField()),
+                ('total', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('success_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('worker', models.CharField(default=b'', max_length=32)),
+                ('error_msg', models.TextField(default=b'')),
+                ('created_at', models.DateTimeField(default=datetime.datetime.now)),
+                ('updated_at', models.DateTimeField(default=datetime.datetime.now)),
+                ('finished_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BackgroundJobResult',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('row', models.IntegerField()),
+                ('email', models.CharField(max_length=255)),
+                ('success', models.BooleanField(default=True)),
+                ('detail', models.TextField(default=b'')),
+                ('job', models.ForeignKey(to='jobs.BackgroundJob')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='backgroundjobresult',
+            unique_together=set([('job', 'row')]),
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+import datetime
+import json
+import uuid
+
+from django.db import models
+from django.db.models import F, Q
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+class BackgroundJobManager(models.Manager):
+
+    def add_job(self, username, job_type, items, params=None):
+        """Queue a job processing `items`, a list of dicts each with an
+        ``email`` key, used to report per item results.
+        """
+        return self.create(username=username, job_type=job_type,
+                           params=json.dumps(params or {}),
+                           items=json.dumps(items), total=len(items))
+
+    def claim_next(self, stale_timeout):
+        """Mark the oldest queued job, or a running job not checkpointed for
+        `stale_timeout` seconds, as running for a new worker and return it.
+
+        Return ``None`` if there is no job to run.
+        """
+        now = datetime.datetime.now()
+        stale = now - datetime.timedelta(seconds=stale_timeout)
+        candidates = self.filter(
+            Q(status=STATUS_QUEUED) |
+            Q(status=STATUS_RUNNING, updated_at__lt=stale)
+        ).order_by('id').values_list('id', 'worker')[:10]
+
+        for job_id, worker in candidates:
+            token = uuid.uuid4().hex
+            # another worker may claim the same job at the same time, only
+            # the one whose update matches the old token wins
+            claimed = self.filter(pk=job_id, worker=worker).exclude(
+                status__in=(STATUS_DONE, STATUS_FAILED)).update(
+                    status=STATUS_RUNNING, worker=token, updated_at=now)
+            if claimed:
+                return self.get(pk=job_id)
+
+        return None
+
+    def checkpoint(self, job, processed, success_count, failed_count):
+        """Record that items before `processed` are handled.
+
+        Return ``False`` if the job has been taken over by another worker.
+        """
+        updated = self.filter(pk=job.pk, worker=job.worker).update(
+            processed=processed,
+            success_count=F('success_count') + success_count,
+            failed_count=F('failed_count') + failed_count,
+            updated_at=datetime.datetime.now())
+        if not updated:
+            return False
+
+        job.processed = processed
+        job.success_count += success_count
+        job.failed_count += failed_count
+        return True
+
+    def finish(self, job, error_msg=''):
+        """Mark the job as done, or failed if `error_msg` is given.
+
+        Items are cleared as they may contain encrypted passwords.
+        """
+        job.status = STATUS_FAILED if error_msg else STATUS_DONE
+        job.error_msg = error_msg
+        job.items = '[]'
+        job.finished_at = datetime.datetime.now()
+        self.filter(pk=job.pk, worker=job.worker).update(
+            status=job.status, error_msg=job.error_msg, items=job.items,
+            finished_at=job.finished_at, updated_at=job.finished_at)
+
+class BackgroundJob(models.Model):
+    username = models.CharField(max_length=255, db_index=True)
+    job_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, default=STATUS_QUEUED,
+                              db_index=True)
+    params = models.TextField()
+    items = models.TextField()
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    success_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    worker = models.CharField(max_length=32, default='')
+    error_msg = models.TextField(default='')
+    created_at = models.DateTimeField(default=datetime.datetime.now)
+    updated_at = models.DateTimeField(default=datetime.datetime.now)
+    finished_at = models.DateTimeField(null=True)
+
+    objects = BackgroundJobManager()
+
+    def is_finished(self):
+        return self.status in (STATUS_DONE, STATUS_FAILED)
+
+    def get_params(self):
+        return json.loads(self.params)
+
+    def get_items(self):
+        return json.loads(self.items)
+
+    def to_dict(self):
+        return {
+            'id': self.pk,
+            'job_type': self.job_type,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'success_count': self.success_count,
+            'failed_count': self.failed_count,
+            'error_msg': self.error_msg,
+            'created_at': self.created_at.strftime('%Y-%m-%dT%H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%dT%H:%M:%S') \
+                if self.finished_at else None,
+        }
+
+class BackgroundJobResultManager(models.Manager):
+
+    def get_results(self, job):
+        """Return ``{'success': [...], 'failed': [...]}`` of a job, in the
+        same format as the synchronous bulk endpoints.
+        """
+        ret = {'success': [], 'failed': []}
+        for r in self.filter(job=job).order_by('row'):
+            if r.success:
+                info = json.loads(r.detail) if r.detail else {}
+                info['email'] = r.email
+                ret['success'].append(info)
+            else:
+                ret['failed'].append({
+                    'email': r.email,
+                    'row': r.row,
+                    'error_msg': r.detail,
+                })
+        return ret
+
+class BackgroundJobResult(models.Model):
+    """Result of one item of a job. ``detail`` is the JSON data returned by
+    the job handler if ``success``, or the error message.
+    """
+    job = models.ForeignKey(BackgroundJob)
+    row = models.IntegerField()
+    email = models.CharField(max_length=255)
+    success = models.BooleanField(default=True)
+    detail = models.TextField(default='')
+
+    objects = BackgroundJobResultManager()
+
+    class Meta:
+        unique_together = ('job', 'row')
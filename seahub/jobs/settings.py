@@ -0,0 +1,13 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+from django.conf import settings
+
+# Run bulk admin operations (CSV import, batch delete, ...) in the
+# ``run_background_jobs`` worker instead of inside the request. When disabled,
+# jobs are still recorded but run before the request returns.
+ENABLE_BACKGROUND_JOBS = getattr(settings, 'ENABLE_BACKGROUND_JOBS', False)
+
+# number of items processed between two checkpoints
+BACKGROUND_JOB_CHUNK_SIZE = getattr(settings, 'BACKGROUND_JOB_CHUNK_SIZE', 100)
+
+# a running job not checkpointed for this long is taken over by another worker
+BACKGROUND_JOB_STALE_TIMEOUT = getattr(settings, 'BACKGROUND_JOB_STALE_TIMEOUT', 600)  # seconds
@@ -0,0 +1,146 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import struct
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.encoding import force_bytes
+
+from seahub.jobs.handlers import JobItemError, get_job_handler
+from seahub.jobs.models import BackgroundJob, BackgroundJobResult, \
+    STATUS_RUNNING
+from seahub.jobs.settings import ENABLE_BACKGROUND_JOBS, \
+    BACKGROUND_JOB_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+########## secrets of job items
+# Secrets, such as passwords, are stored with the items of a job encrypted
+# with a key derived from SECRET_KEY: a HMAC-SHA256 keystream in counter mode,
+# then a HMAC-SHA256 tag over nonce and ciphertext.
+
+def _derive_key(purpose):
+    return hmac.new(force_bytes(settings.SECRET_KEY),
+                    'seahub.jobs.secret.' + purpose, hashlib.sha256).digest()
+
+def _keystream_xor(key, nonce, data):
+    out = []
+    for i in range(0, len(data), 32):
+        block = hmac.new(key, nonce + struct.pack('>I', i // 32),
+                         hashlib.sha256).digest()
+        out.append(''.join(chr(ord(x) ^ ord(y))
+                           for x, y in zip(data[i:i + 32], block)))
+    return ''.join(out)
+
+def encrypt_secret(secret):
+    """Return `secret`, a unicode or byte string, encrypted as an ascii
+    string.
+    """
+    nonce = os.urandom(16)
+    data = json.dumps(secret)
+    ciphertext = _keystream_xor(_derive_key('enc'), nonce, data)
+    tag = hmac.new(_derive_key('mac'), nonce + ciphertext,
+                   hashlib.sha256).digest()
+    return base64.b64encode(nonce + ciphertext + tag)
+
+def decrypt_secret(token):
+    """Return the secret encrypted by ``encrypt_secret``, or ``None`` if
+    `token` is invalid, e.g. SECRET_KEY has changed since.
+    """
+    try:
+        raw = base64.b64decode(token)
+    except (TypeError, ValueError):
+        return None
+    if len(raw) < 16 + 32:
+        return None
+
+    nonce, ciphertext, tag = raw[:16], raw[16:-32], raw[-32:]
+    expected = hmac.new(_derive_key('mac'), nonce + ciphertext,
+                        hashlib.sha256).digest()
+    if not constant_time_compare(tag, expected):
+        return None
+    return json.loads(_keystream_xor(_derive_key('enc'), nonce, ciphertext))
+
+def run_job(job, chunk_size=BACKGROUND_JOB_CHUNK_SIZE):
+    """Process the items of a job claimed by the caller, from its last
+    checkpoint, `chunk_size` items per checkpoint.
+
+    Secrets of items are decrypted before the item is passed to the
+    handler, ``item['secret']`` is ``None`` if it cannot be decrypted.
+
+    Return ``False`` if the job has been taken over by another worker.
+    """
+    handler = get_job_handler(job.job_type)
+    if handler is None:
+        BackgroundJob.objects.finish(job, 'Unknown job type %s.' % job.job_type)
+        return True
+
+    params = job.get_params()
+    items = job.get_items()
+
+    # results of a chunk interrupted before its checkpoint are redone
+    BackgroundJobResult.objects.filter(job=job, row__gte=job.processed).delete()
+
+    while job.processed < job.total:
+        start = job.processed
+        results = []
+        for row, item in enumerate(items[start:start + chunk_size], start):
+            if 'secret' in item:
+                item['secret'] = decrypt_secret(item['secret'])
+            result = BackgroundJobResult(job=job, row=row,
+                                         email=item.get('email', ''))
+            try:
+                info = handler(job, params, item)
+            except JobItemError as e:
+                result.success = False
+                result.detail = e.error_msg
+            except Exception as e:
+                logger.error(e)
+                result.success = False
+                result.detail = 'Internal Server Error'
+            else:
+                result.detail = json.dumps(info) if info else ''
+            results.append(result)
+
+        success_count = len([x for x in results if x.success])
+        with transaction.atomic():
+            if not BackgroundJob.objects.checkpoint(
+                    job, start + len(results), success_count,
+                    len(results) - success_count):
+                logger.warning('Background job %s is taken over by another '
+                               'worker.' % job.pk)
+                return False
+            BackgroundJobResult.objects.bulk_create(results)
+
+    BackgroundJob.objects.finish(job)
+    return True
+
+def submit_job(username, job_type, items, params=None, secrets=None):
+    """Queue a job for the ``run_background_jobs`` worker, or run it right
+    away if background jobs are disabled.
+
+    `secrets` is a list of per item values, such as passwords, which are
+    stored encrypted with the items, and passed to the handler as
+    ``item['secret']``.
+    """
+    if secrets:
+        items = [dict(item, secret=encrypt_secret(secret))
+                 for item, secret in zip(items, secrets)]
+
+    job = BackgroundJob.objects.add_job(username, job_type, items, params)
+    if ENABLE_BACKGROUND_JOBS:
+        return job
+
+    job.worker = uuid.uuid4().hex
+    job.status = STATUS_RUNNING
+    BackgroundJob.objects.filter(pk=job.pk).update(worker=job.worker,
+                                                   status=job.status)
+    run_job(job)
+    return job
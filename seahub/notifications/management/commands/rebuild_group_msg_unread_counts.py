@@ -0,0 +1,16 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+# encoding: utf-8
+from django.core.management.base import BaseCommand
+
+from seahub.notifications.models import GroupMsgUnreadCount
+
+class Command(BaseCommand):
+    help = "Count unseen group message notices of users again. Run it once " \
+           "after upgrade, for notices created before they were counted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild counts of this user.')
+
+    def handle(self, *args, **options):
+        GroupMsgUnreadCount.objects.rebuild(options['user'])
+        self.stdout.write('Done.')
@@ -5,7 +5,12 @@ import logging
 import json
 import os
 import re
+from itertools import groupby
+from multiprocessing.dummy import Pool
+from operator import attrgetter
 
+from django import db
+from django.core.mail import get_connection
 from django.core.management.base import BaseCommand
 from django.core.urlresolvers import reverse
 from django.utils.html import escape
@@ -31,11 +36,42 @@ class Command(BaseCommand):
     help = 'Send Email notifications to user if he/she has an unread notices every period of seconds .'
     label = "notifications_send_notices"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of threads rendering and sending emails.')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of emails sent over one SMTP connection.')
+
     def handle(self, *args, **options):
+        self.workers = max(options.get('workers', 1), 1)
+        self.batch_size = max(options.get('batch_size', 100), 1)
+
+        # lookups shared by all recipients
+        self._repos = {}
+        self._groups = {}
+        self._nicknames = {}
+        self._avatar_srcs = {}
+
         logger.debug('Start sending user notices...')
         self.do_action()
         logger.debug('Finish sending user notices.\n')
 
+    def get_repo(self, repo_id):
+        if repo_id not in self._repos:
+            self._repos[repo_id] = seafile_api.get_repo(repo_id)
+        return self._repos[repo_id]
+
+    def get_group(self, group_id):
+        group_id = int(group_id)
+        if group_id not in self._groups:
+            self._groups[group_id] = ccnet_api.get_group(group_id)
+        return self._groups[group_id]
+
+    def get_nickname(self, username):
+        if username not in self._nicknames:
+            self._nicknames[username] = escape(email2nickname(username))
+        return self._nicknames[username]
+
     def get_avatar(self, username, default_size=32):
         img_tag = avatar(username, default_size)
         pattern = r'src="(.*)"'
@@ -43,12 +79,18 @@ class Command(BaseCommand):
         return re.sub(pattern, repl, img_tag)
 
     def get_avatar_src(self, username, default_size=32):
+        key = (username, default_size)
+        if key in self._avatar_srcs:
+            return self._avatar_srcs[key]
+
         avatar_img = self.get_avatar(username, default_size)
         m = re.search('<img src="(.*?)".*', avatar_img)
         if m:
-            return m.group(1)
+            avatar_src = m.group(1)
         else:
-            return ''
+            avatar_src = ''
+        self._avatar_srcs[key] = avatar_src
+        return avatar_src
 
     def get_default_avatar(self, default_size=32):
         # user default avatar
@@ -70,10 +112,10 @@ class Command(BaseCommand):
         d = notice.group_message_detail_to_dict()
         group_id = d['group_id']
         message = d['message']
-        group = ccnet_api.get_group(int(group_id))
+        group = self.get_group(group_id)
 
         notice.group_url = reverse('group_discuss', args=[group.id])
-        notice.notice_from = escape(email2nickname(d['msg_from']))
+        notice.notice_from = self.get_nickname(d['msg_from'])
         notice.group_name = group.group_name
         notice.avatar_src = self.get_avatar_src(d['msg_from'])
         notice.grp_msg = message
@@ -82,10 +124,10 @@ class Command(BaseCommand):
     def format_repo_share_msg(self, notice):
         d = json.loads(notice.detail)
         repo_id = d['repo_id']
-        repo = seafile_api.get_repo(repo_id)
+        repo = self.get_repo(repo_id)
 
         notice.repo_url = reverse("view_common_lib_dir", args=[repo_id, ''])
-        notice.notice_from = escape(email2nickname(d['share_from']))
+        notice.notice_from = self.get_nickname(d['share_from'])
         notice.repo_name = repo.name
         notice.avatar_src = self.get_avatar_src(d['share_from'])
 
@@ -95,12 +137,12 @@ class Command(BaseCommand):
         d = json.loads(notice.detail)
 
         repo_id = d['repo_id']
-        repo = seafile_api.get_repo(repo_id)
+        repo = self.get_repo(repo_id)
         group_id = d['group_id']
-        group = ccnet_api.get_group(group_id)
+        group = self.get_group(group_id)
 
         notice.repo_url = reverse("view_common_lib_dir", args=[repo_id, ''])
-        notice.notice_from = escape(email2nickname(d['share_from']))
+        notice.notice_from = self.get_nickname(d['share_from'])
         notice.repo_name = repo.name
         notice.avatar_src = self.get_avatar_src(d['share_from'])
         notice.group_url = reverse("group_info", args=[group.id])
@@ -132,12 +174,12 @@ class Command(BaseCommand):
         group_id = d['group_id']
         join_request_msg = d['join_request_msg']
 
-        group = ccnet_api.get_group(group_id)
+        group = self.get_group(group_id)
 
         notice.grpjoin_user_profile_url = reverse('user_profile',
                                                   args=[username])
         notice.grpjoin_group_url = reverse('group_members', args=[group_id])
-        notice.notice_from = escape(email2nickname(username))
+        notice.notice_from = self.get_nickname(username)
         notice.grpjoin_group_name = group.group_name
         notice.grpjoin_request_msg = join_request_msg
         notice.avatar_src = self.get_avatar_src(username)
@@ -148,9 +190,9 @@ class Command(BaseCommand):
         group_staff = d['group_staff']
         group_id = d['group_id']
 
-        group = ccnet_api.get_group(group_id)
+        group = self.get_group(group_id)
 
-        notice.notice_from = escape(email2nickname(group_staff))
+        notice.notice_from = self.get_nickname(group_staff)
         notice.avatar_src = self.get_avatar_src(group_staff)
         notice.group_staff_profile_url = reverse('user_profile',
                                                   args=[group_staff])
@@ -172,112 +214,170 @@ class Command(BaseCommand):
     def get_user_language(self, username):
         return Profile.objects.get_user_language(username)
 
-    def do_action(self):
-        now = datetime.datetime.now()
-
-        try:
-            cmd_last_check = CommandsLastCheck.objects.get(command_type=self.label)
-            logger.debug('Last check time is %s' % cmd_last_check.last_check)
-
-            unseen_notices = UserNotification.objects.get_all_notifications(
-                seen=False, time_since=cmd_last_check.last_check)
+    def format_notice(self, notice):
+        """Format `notice` for email, return ``None`` if the repo or group
+        it refers to is gone.
+        """
+        logger.info('Processing unseen notice: [%s]' % (notice))
 
-            logger.debug('Update last check time to %s' % now)
-            cmd_last_check.last_check = now
-            cmd_last_check.save()
-        except CommandsLastCheck.DoesNotExist:
-            logger.debug('No last check time found, get all unread notices.')
-            unseen_notices = UserNotification.objects.get_all_notifications(
-                seen=False)
-
-            logger.debug('Create new last check time: %s' % now)
-            CommandsLastCheck(command_type=self.label, last_check=now).save()
-
-        email_ctx = {}
-        for notice in unseen_notices:
-            if notice.to_user in email_ctx:
-                email_ctx[notice.to_user] += 1
-            else:
-                email_ctx[notice.to_user] = 1
-
-        for to_user, count in email_ctx.items():
-            # save current language
-            cur_language = translation.get_language()
-
-            # get and active user language
-            user_language = self.get_user_language(to_user)
-            translation.activate(user_language)
-            logger.debug('Set language code to %s for user: %s' % (user_language, to_user))
-            self.stdout.write('[%s] Set language code to %s' % (
-                str(datetime.datetime.now()), user_language))
+        d = json.loads(notice.detail)
 
-            notices = []
-            for notice in unseen_notices:
-                logger.info('Processing unseen notice: [%s]' % (notice))
+        repo_id = d.get('repo_id', None)
+        group_id = d.get('group_id', None)
+        try:
+            if repo_id and not self.get_repo(repo_id):
+                notice.delete()
+                return None
 
-                d = json.loads(notice.detail)
+            if group_id and not self.get_group(group_id):
+                notice.delete()
+                return None
+        except Exception as e:
+            logger.error(e)
+            return None
 
-                repo_id = d.get('repo_id', None)
-                group_id = d.get('group_id', None)
-                try:
-                    if repo_id and not seafile_api.get_repo(repo_id):
-                        notice.delete()
-                        continue
+        if notice.is_group_msg():
+            notice = self.format_group_message(notice)
 
-                    if group_id and not ccnet_api.get_group(group_id):
-                        notice.delete()
-                        continue
-                except Exception as e:
-                    logger.error(e)
-                    continue
+        elif notice.is_repo_share_msg():
+            notice = self.format_repo_share_msg(notice)
 
-                if notice.to_user != to_user:
-                    continue
+        elif notice.is_repo_share_to_group_msg():
+            notice = self.format_repo_share_to_group_msg(notice)
 
-                elif notice.is_group_msg():
-                    notice = self.format_group_message(notice)
+        elif notice.is_file_uploaded_msg():
+            notice = self.format_file_uploaded_msg(notice)
 
-                elif notice.is_repo_share_msg():
-                    notice = self.format_repo_share_msg(notice)
+        elif notice.is_group_join_request():
+            notice = self.format_group_join_request(notice)
 
-                elif notice.is_repo_share_to_group_msg():
-                    notice = self.format_repo_share_to_group_msg(notice)
+        elif notice.is_add_user_to_group():
+            notice = self.format_add_user_to_group(notice)
 
-                elif notice.is_file_uploaded_msg():
-                    notice = self.format_file_uploaded_msg(notice)
+        elif notice.is_file_comment_msg():
+            notice = self.format_file_comment_msg(notice)
 
-                elif notice.is_group_join_request():
-                    notice = self.format_group_join_request(notice)
+        return notice
 
-                elif notice.is_add_user_to_group():
-                    notice = self.format_add_user_to_group(notice)
+    def send_user_notices(self, to_user, unseen_notices, connection):
+        # save current language
+        cur_language = translation.get_language()
 
-                elif notice.is_file_comment_msg():
-                    notice = self.format_file_comment_msg(notice)
+        # get and active user language
+        user_language = self.get_user_language(to_user)
+        translation.activate(user_language)
+        logger.debug('Set language code to %s for user: %s' % (user_language, to_user))
+        self.stdout.write('[%s] Set language code to %s' % (
+            str(datetime.datetime.now()), user_language))
 
-                notices.append(notice)
+        try:
+            notices = []
+            for notice in unseen_notices:
+                notice = self.format_notice(notice)
+                if notice is not None:
+                    notices.append(notice)
 
             if not notices:
-                continue
+                return
 
             contact_email = Profile.objects.get_contact_email_by_user(to_user)
             to_user = contact_email  # use contact email if any
             c = {
                 'to_user': to_user,
-                'notice_count': count,
+                'notice_count': len(unseen_notices),
                 'notices': notices,
                 }
 
             try:
                 send_html_email(_('New notice on %s') % settings.SITE_NAME,
                                 'notifications/notice_email.html', c,
-                                None, [to_user])
+                                None, [to_user], connection=connection)
 
                 logger.info('Successfully sent email to %s' % to_user)
                 self.stdout.write('[%s] Successfully sent email to %s' % (str(datetime.datetime.now()), to_user))
             except Exception as e:
                 logger.error('Failed to send email to %s, error detail: %s' % (to_user, e))
                 self.stderr.write('[%s] Failed to send email to %s, error detail: %s' % (str(datetime.datetime.now()), to_user, e))
-
+        finally:
             # restore current language
             translation.activate(cur_language)
+
+    def send_batch(self, batch):
+        """Send emails for a batch of (to_user, notices) over one connection.
+        """
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error('Failed to open email connection: %s' % e)
+
+        try:
+            for to_user, notices in batch:
+                self.send_user_notices(to_user, notices, connection)
+        finally:
+            connection.close()
+
+    def send_batch_in_worker(self, batch):
+        try:
+            self.send_batch(batch)
+        finally:
+            # each worker thread has its own database connection
+            db.connection.close()
+
+    def iter_batches(self, unseen_notices):
+        """Stream notices ordered by recipient in one pass, and yield them in
+        batches of at most `self.batch_size` recipients.
+        """
+        notices = unseen_notices.order_by('to_user', 'id').iterator()
+
+        batch = []
+        for to_user, user_notices in groupby(notices, key=attrgetter('to_user')):
+            batch.append((to_user, list(user_notices)))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def do_action(self):
+        now = datetime.datetime.now()
+
+        try:
+            cmd_last_check = CommandsLastCheck.objects.get(command_type=self.label)
+            logger.debug('Last check time is %s' % cmd_last_check.last_check)
+
+            unseen_notices = UserNotification.objects.get_all_notifications(
+                seen=False, time_since=cmd_last_check.last_check)
+
+            logger.debug('Update last check time to %s' % now)
+            cmd_last_check.last_check = now
+            cmd_last_check.save()
+        except CommandsLastCheck.DoesNotExist:
+            logger.debug('No last check time found, get all unread notices.')
+            unseen_notices = UserNotification.objects.get_all_notifications(
+                seen=False)
+
+            logger.debug('Create new last check time: %s' % now)
+            CommandsLastCheck(command_type=self.label, last_check=now).save()
+
+        if self.workers == 1:
+            for batch in self.iter_batches(unseen_notices):
+                self.send_batch(batch)
+            return
+
+        pool = Pool(self.workers)
+        try:
+            # hand batches to workers as they are read, keeping at most one
+            # batch per worker in memory
+            pending = []
+            for batch in self.iter_batches(unseen_notices):
+                pending.append(batch)
+                if len(pending) >= self.workers:
+                    pool.map(self.send_batch_in_worker, pending)
+                    pending = []
+            if pending:
+                pool.map(self.send_batch_in_worker, pending)
+        finally:
+            pool.close()
+            pool.join()
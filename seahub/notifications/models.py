@@ -5,7 +5,8 @@ import os
 import json
 import logging
 
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.forms import ModelForm, Textarea
 from django.utils.html import escape
 from django.utils.translation import ugettext as _
@@ -649,8 +650,99 @@ class UserNotification(models.Model):
         }
         return msg
 
+class GroupMsgUnreadCountManager(models.Manager):
+    def incr(self, to_users, group_id, delta=1):
+        """Add `delta` unseen messages of group `group_id` to the counts of
+        each of `to_users`.
+        """
+        group_id = int(group_id)
+        to_users = set(u.lower() for u in to_users)
+        if not to_users or not delta:
+            return
+
+        qs = super(GroupMsgUnreadCountManager, self).filter(group_id=group_id)
+        existing = set(qs.filter(to_user__in=to_users).values_list(
+            'to_user', flat=True))
+        if existing:
+            qs.filter(to_user__in=existing).update(count=F('count') + delta)
+
+        new_users = to_users - existing
+        if not new_users:
+            return
+        try:
+            with transaction.atomic():
+                self.bulk_create([GroupMsgUnreadCount(
+                    to_user=u, group_id=group_id, count=max(delta, 0))
+                                  for u in new_users])
+        except IntegrityError:
+            # some were created by another request meanwhile
+            self.incr(new_users, group_id, delta)
+
+    def decr(self, to_user, group_id, delta=1):
+        super(GroupMsgUnreadCountManager, self).filter(
+            to_user=to_user.lower(), group_id=int(group_id),
+            count__gte=delta).update(count=F('count') - delta)
+
+    def get_counts(self, to_user, group_ids):
+        """Return a dict of group id -> number of unseen message notices of
+        `to_user`, for `group_ids`.
+        """
+        ret = dict((int(x), 0) for x in group_ids)
+        if not ret:
+            return ret
+
+        for group_id, count in super(GroupMsgUnreadCountManager, self).filter(
+                to_user=to_user.lower(), group_id__in=ret.keys()).values_list(
+                    'group_id', 'count'):
+            ret[group_id] = count
+        return ret
+
+    def rebuild(self, to_user=None):
+        """Count unseen group message notices again, of `to_user` or all
+        users.
+        """
+        notices = UserNotification.objects.get_all_notifications(seen=False)
+        notices = notices.filter(msg_type=MSG_TYPE_GROUP_MSG)
+        counts = super(GroupMsgUnreadCountManager, self).all()
+        if to_user is not None:
+            notices = notices.filter(to_user=to_user.lower())
+            counts = counts.filter(to_user=to_user.lower())
+
+        unread = {}
+        for n in notices.iterator():
+            try:
+                group_id = n.group_message_detail_to_dict().get('group_id')
+            except UserNotification.InvalidDetailError:
+                continue
+            key = (n.to_user, int(group_id))
+            unread[key] = unread.get(key, 0) + 1
+
+        with transaction.atomic():
+            counts.delete()
+            self.bulk_create([GroupMsgUnreadCount(
+                to_user=u, group_id=g, count=c)
+                              for (u, g), c in unread.iteritems()],
+                             batch_size=1000)
+
+class GroupMsgUnreadCount(models.Model):
+    """Number of unseen group message notices of a user in a group.
+
+    Added to when group message notices are created, and taken from when
+    they are marked seen or deleted, so that the notices need not be parsed
+    to count them. ``rebuild`` counts them from the notices.
+    """
+    to_user = LowerCaseCharField(max_length=255)
+    group_id = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    objects = GroupMsgUnreadCountManager()
+
+    class Meta:
+        unique_together = ('to_user', 'group_id')
+
 ########## handle signals
 from django.core.urlresolvers import reverse
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 
 from seahub.signals import upload_file_successful, comment_file_successful
@@ -716,6 +808,8 @@ def grpmsg_added_cb(sender, **kwargs):
 
     detail = group_msg_to_json(group_id, from_email, message)
     UserNotification.objects.bulk_add_group_msg_notices(notify_members, detail)
+    # ``bulk_create`` sends no ``post_save``
+    GroupMsgUnreadCount.objects.incr(notify_members, group_id)
 
 @receiver(group_join_request)
 def group_join_request_cb(sender, **kwargs):
@@ -756,3 +850,39 @@ def comment_file_successful_cb(sender, **kwargs):
     for u in notify_users:
         detail = file_comment_msg_to_json(repo.id, file_path, author, comment)
         UserNotification.objects.add_file_comment_msg(u, detail)
+
+def _group_msg_notice_group_id(notice):
+    try:
+        return notice.group_message_detail_to_dict().get('group_id')
+    except UserNotification.InvalidDetailError:
+        return None
+
+@receiver(post_init, sender=UserNotification)
+def remember_notice_seen(sender, instance, **kwargs):
+    # not ``instance.seen``, which loads the field if it is deferred
+    instance._loaded_seen = instance.__dict__.get('seen')
+
+@receiver(post_save, sender=UserNotification)
+def update_group_msg_unread_count_on_save(sender, instance, created, **kwargs):
+    # a new notice was not counted before
+    loaded_seen = True if created else instance._loaded_seen
+    instance._loaded_seen = instance.seen
+    if not instance.is_group_msg() or loaded_seen in (None, instance.seen):
+        return
+
+    group_id = _group_msg_notice_group_id(instance)
+    if group_id is None:
+        return
+    if instance.seen:
+        GroupMsgUnreadCount.objects.decr(instance.to_user, group_id)
+    else:
+        GroupMsgUnreadCount.objects.incr([instance.to_user], group_id)
+
+@receiver(post_delete, sender=UserNotification)
+def update_group_msg_unread_count_on_delete(sender, instance, **kwargs):
+    if not instance.is_group_msg() or instance._loaded_seen is not False:
+        return
+
+    group_id = _group_msg_notice_group_id(instance)
+    if group_id is not None:
+        GroupMsgUnreadCount.objects.decr(instance.to_user, group_id)
@@ -2,10 +2,14 @@
 from django.core.cache import cache
 
 from models import Profile
-from settings import NICKNAME_CACHE_PREFIX, NICKNAME_CACHE_TIMEOUT
+from settings import NICKNAME_CACHE_PREFIX, NICKNAME_CACHE_TIMEOUT, \
+    CONTACT_EMAIL_CACHE_PREFIX, CONTACT_EMAIL_CACHE_TIMEOUT
 from seahub.shortcuts import get_first_object_or_none
 from seahub.utils import normalize_cache_key
 
+# cache prefix of avatar info returned by ``get_user_profiles``
+AVATAR_INFO_CACHE_PREFIX = 'api_avatar_url'
+
 def refresh_cache(username):
     """
     Function to be called when change user nickname.
@@ -15,4 +19,125 @@ def refresh_cache(username):
 
     key = normalize_cache_key(username, NICKNAME_CACHE_PREFIX)
     cache.set(key, nickname, NICKNAME_CACHE_TIMEOUT)
-    
+
+    contact_email = profile.contact_email if profile else None
+    key = normalize_cache_key(username, CONTACT_EMAIL_CACHE_PREFIX)
+    cache.set(key, contact_email or username, CONTACT_EMAIL_CACHE_TIMEOUT)
+
+def get_user_profiles(usernames, avatar_size=None):
+    """Return a dict of username -> profile info for `usernames`, each info
+    is a dict with `nickname` and `contact_email`, plus `avatar_url`,
+    `is_default_avatar` and `avatar_date_uploaded` if `avatar_size` is
+    given. A non-numeric `avatar_size` falls back to the default size.
+
+    Values are the same as ``email2nickname``, ``email2contact_email`` and
+    ``api_avatar_url``, but looked up in one ``cache.get_many``, then one
+    database query per model for cache misses, which are written back with
+    ``cache.set_many``. Every username is in the returned dict, empty ones
+    with empty nickname and contact email and the default avatar.
+    """
+    from seahub.avatar.models import Avatar
+    from seahub.avatar.settings import AVATAR_CACHE_TIMEOUT, \
+        AUTO_GENERATE_AVATAR_SIZES, AVATAR_DEFAULT_SIZE
+    from seahub.avatar.util import get_cache_key, get_default_avatar_url, \
+        cached_funcs
+
+    if avatar_size is not None:
+        try:
+            avatar_size = int(avatar_size)
+        except (TypeError, ValueError):
+            avatar_size = AVATAR_DEFAULT_SIZE
+
+    ret = {}
+    for u in set(u for u in usernames if not u):
+        ret[u] = {'nickname': '', 'contact_email': ''}
+        if avatar_size is not None:
+            ret[u]['avatar_url'] = get_default_avatar_url()
+            ret[u]['is_default_avatar'] = True
+            ret[u]['avatar_date_uploaded'] = None
+    usernames = set(u for u in usernames if u)
+
+    nickname_keys = dict((u, normalize_cache_key(u, NICKNAME_CACHE_PREFIX))
+                         for u in usernames)
+    contact_keys = dict((u, normalize_cache_key(u, CONTACT_EMAIL_CACHE_PREFIX))
+                        for u in usernames)
+    avatar_keys = {}
+    if avatar_size is not None:
+        # cleared by ``seahub.avatar.util.invalidate_cache`` for these sizes
+        cached_funcs.add(AVATAR_INFO_CACHE_PREFIX)
+        if avatar_size in AUTO_GENERATE_AVATAR_SIZES:
+            avatar_keys = dict((u, get_cache_key(u, avatar_size,
+                                                 AVATAR_INFO_CACHE_PREFIX))
+                               for u in usernames)
+
+    cached = cache.get_many(nickname_keys.values() + contact_keys.values() +
+                            avatar_keys.values())
+
+    profile_misses = set()
+    for u in usernames:
+        nickname = cached.get(nickname_keys[u])
+        contact_email = cached.get(contact_keys[u])
+        if not (nickname and nickname.strip()) or not contact_email:
+            profile_misses.add(u)
+        ret[u] = {
+            'nickname': nickname.strip() if nickname else nickname,
+            'contact_email': contact_email,
+        }
+
+    if profile_misses:
+        profiles = dict((p.user, p) for p in
+                        Profile.objects.filter(user__in=profile_misses))
+        nickname_to_cache, contact_to_cache = {}, {}
+        for u in profile_misses:
+            p = profiles.get(u.lower())
+            if p is not None and p.nickname and p.nickname.strip():
+                nickname = p.nickname.strip()
+            else:
+                nickname = u.split('@')[0]
+            contact_email = p.contact_email if p and p.contact_email else u
+
+            ret[u]['nickname'] = nickname
+            ret[u]['contact_email'] = contact_email
+            nickname_to_cache[nickname_keys[u]] = nickname
+            contact_to_cache[contact_keys[u]] = contact_email
+
+        cache.set_many(nickname_to_cache, NICKNAME_CACHE_TIMEOUT)
+        cache.set_many(contact_to_cache, CONTACT_EMAIL_CACHE_TIMEOUT)
+
+    if avatar_size is None:
+        return ret
+
+    avatar_misses = set()
+    for u in usernames:
+        info = cached.get(avatar_keys[u]) if avatar_keys else None
+        if info is None:
+            avatar_misses.add(u)
+        else:
+            ret[u]['avatar_url'], ret[u]['is_default_avatar'], \
+                ret[u]['avatar_date_uploaded'] = info
+
+    if avatar_misses:
+        avatars = {}
+        for a in Avatar.objects.filter(emailuser__in=avatar_misses,
+                                       primary=True):
+            avatars.setdefault(a.emailuser, a)
+
+        to_cache = {}
+        for u in avatar_misses:
+            a = avatars.get(u.lower())
+            if a is not None:
+                if not a.thumbnail_exists(avatar_size):
+                    a.create_thumbnail(avatar_size)
+                info = (a.avatar_url(avatar_size), False, a.date_uploaded)
+            else:
+                info = (get_default_avatar_url(), True, None)
+
+            ret[u]['avatar_url'], ret[u]['is_default_avatar'], \
+                ret[u]['avatar_date_uploaded'] = info
+            if avatar_keys:
+                to_cache[avatar_keys[u]] = info
+
+        if to_cache:
+            cache.set_many(to_cache, AVATAR_CACHE_TIMEOUT)
+
+    return ret
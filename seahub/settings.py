@@ -114,6 +114,7 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'seahub.auth.middleware.AuthenticationMiddleware',
+    'seahub.base.middleware.RPCCacheMiddleware',
     'seahub.base.middleware.BaseMiddleware',
     'seahub.base.middleware.InfobarMiddleware',
     'seahub.password_session.middleware.CheckPasswordHash',
@@ -224,6 +225,7 @@ INSTALLED_APPS = (
     'seahub.password_session',
     'seahub.admin_log',
     'seahub.wopi',
+    'seahub.jobs',
 )
 
 # Enabled or disable constance(web settings).
@@ -276,6 +278,23 @@ SHARE_LINK_TOKEN_LENGTH = 20
 # mininum length for the password of a share link
 SHARE_LINK_PASSWORD_MIN_LENGTH = 8
 
+# share links are cached by token for this many seconds, tokens of no link
+# for SHARE_LINK_TOKEN_NEGATIVE_CACHE_TIMEOUT seconds
+SHARE_LINK_TOKEN_CACHE_TIMEOUT = 10 * 60
+SHARE_LINK_TOKEN_NEGATIVE_CACHE_TIMEOUT = 60
+
+# Share link traffic of a user (with CHECK_SHARE_LINK_TRAFFIC) is read from
+# events database at most once in this many seconds, downloads in between are
+# added to the cached value.
+SHARE_LINK_TRAFFIC_CACHE_TIMEOUT = 60
+
+# Buffer share link view counts in cache, they are written to database by
+# `manage.py flush_share_link_view_cnt`, which should be run periodically,
+# e.g. every minute by cron, and with `--sweep` e.g. once a day. The cache
+# must be shared by all seahub processes and support atomic `add` and `incr`,
+# such as memcached; the file and database backends are not atomic.
+ENABLE_SHARE_LINK_VIEW_CNT_BUFFER = False
+
 # enable or disable share link audit
 ENABLE_SHARE_LINK_AUDIT = False
 
@@ -320,6 +339,21 @@ USE_PDFJS = True
 FILE_ENCODING_LIST = ['auto', 'utf-8', 'gbk', 'ISO-8859-1', 'ISO-8859-5']
 FILE_ENCODING_TRY_LIST = ['utf-8', 'gbk']
 HIGHLIGHT_KEYWORD = False # If True, highlight the keywords in the file when the visit is via clicking a link in 'search result' page.
+
+# Revisions of a text file are not compared if they are larger than this in
+# total, in bytes or lines. Rendered diffs are cached for TEXT_DIFF_CACHE_TIMEOUT
+# seconds.
+TEXT_DIFF_MAX_SIZE = 5 * 1024 * 1024
+TEXT_DIFF_MAX_LINES = 100000
+TEXT_DIFF_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Textual files are read from fileserver in chunks of this size, and their
+# encoding is detected on a prefix sample. Detected encoding and decoded content
+# of files up to TEXT_PREVIEW_CACHE_MAX_SIZE bytes are cached by file object id.
+FILE_READ_CHUNK_SIZE = 64 * 1024
+FILE_ENCODING_DETECT_SAMPLE_SIZE = 64 * 1024
+TEXT_PREVIEW_CACHE_MAX_SIZE = 1024 * 1024
+TEXT_PREVIEW_CACHE_TIMEOUT = 24 * 60 * 60
 # extensions of previewed files
 TEXT_PREVIEW_EXT = """ac, am, bat, c, cc, cmake, cpp, cs, css, diff, el, h, html,
 htm, java, js, json, less, make, org, php, pl, properties, py, rb,
@@ -372,6 +406,9 @@ CACHES = {
 }
 
 # rest_framwork
+# A throttle rate may end with a throttle mode, e.g. '10000/day:window' to
+# count requests with a sliding window counter instead of a timestamp list,
+# see seahub.api2.throttling.SimpleRateThrottle.
 REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'ping': '600/minute',
@@ -534,6 +571,17 @@ THUMBNAIL_SIZE_FOR_ORIGINAL = 1024
 THUMBNAIL_IMAGE_SIZE_LIMIT = 20
 THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT = 256
 
+# number of processes per web worker decoding images for thumbnails, 0 to
+# decode in the requesting thread
+THUMBNAIL_GENERATE_WORKERS = 0
+
+# thumbnails of these sizes are created together, from one decoded image,
+# when any of them is requested, e.g. [48, 96, 192, 1024]
+THUMBNAIL_SIZE_LADDER = []
+
+# sizes created by `manage.py pregenerate_thumbnails` by default
+THUMBNAIL_PREGENERATE_SIZES = [THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_SIZE_FOR_GRID]
+
 # video thumbnails
 ENABLE_VIDEO_THUMBNAIL = False
 THUMBNAIL_VIDEO_FRAME_TIME = 5  # use the frame at 5 second as thumbnail
@@ -593,6 +641,26 @@ OTP_LOGIN_URL = '/profile/two_factor_authentication/setup/'
 # Enable personal wiki, group wiki
 ENABLE_WIKI = False
 
+#####################
+# RPC memoization   #
+#####################
+# Memoize read-only seafile/ccnet RPC calls for the duration of a GET, HEAD or
+# OPTIONS request.
+# Hit/miss counters are returned in the ``X-Seahub-RPC-Cache`` response header.
+ENABLE_REQUEST_RPC_CACHE = False
+
+# Per process cache of directory listings, keyed by dir object id. Size is
+# in bytes, set to 0 to disable. Not used on pro edition, where listings
+# carry folder permissions and file locks.
+DIR_LISTING_CACHE_SIZE = 32 * 1024 * 1024
+
+# Number of threads listing dirs in parallel for recursive dir listing.
+RECURSIVE_DIR_LIST_WORKERS = 4
+
+# Number of threads reading libraries and commits of events in parallel for
+# the activity feed.
+EVENTS_RESOLVE_WORKERS = 4
+
 #####################
 # External settings #
 #####################
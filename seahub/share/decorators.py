@@ -5,16 +5,14 @@ from django.http import Http404
 from django.shortcuts import render_to_response
 from django.template import RequestContext
 
-from seahub.share.models import FileShare, UploadLinkShare
+from seahub.share.models import get_valid_share_link_by_token
 from seahub.utils import normalize_cache_key, is_pro_version
 
 def share_link_audit(func):
     def _decorated(request, token, *args, **kwargs):
         assert token is not None    # Checked by URLconf
 
-        fileshare = FileShare.objects.get_valid_file_link_by_token(token) or \
-                    FileShare.objects.get_valid_dir_link_by_token(token) or \
-                    UploadLinkShare.objects.get_valid_upload_link_by_token(token)
+        fileshare = get_valid_share_link_by_token(token)
         if fileshare is None:
             raise Http404
 
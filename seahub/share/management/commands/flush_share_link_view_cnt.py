@@ -0,0 +1,28 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+# encoding: utf-8
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from seahub.share.utils import flush_view_cnts, cache_has_atomic_incr
+
+class Command(BaseCommand):
+    help = "Write share link view counts buffered in cache to database."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--sweep', action='store_true', dest='sweep',
+                    default=False,
+                    help='Check view counts of all links, including those '
+                    'not logged.'),
+    )
+
+    def handle(self, *args, **options):
+        if not cache_has_atomic_incr():
+            self.stderr.write('Warning: cache backend has no atomic incr, '
+                              'concurrent views may be lost.')
+
+        updated = flush_view_cnts(sweep=options['sweep'])
+        if updated is None:
+            self.stdout.write('Another flush is running.')
+        else:
+            self.stdout.write('View counts of %d links updated.' % updated)
@@ -2,6 +2,7 @@
 import datetime
 import logging
 
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
@@ -10,7 +11,9 @@ from constance import config
 
 from seahub.base.fields import LowerCaseCharField
 from seahub.utils import normalize_file_path, normalize_dir_path, gen_token,\
-    get_service_url
+    get_service_url, normalize_cache_key
+from seahub.settings import SHARE_LINK_TOKEN_CACHE_TIMEOUT, \
+    SHARE_LINK_TOKEN_NEGATIVE_CACHE_TIMEOUT
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
@@ -106,9 +109,8 @@ class FileShareManager(models.Manager):
     def _get_valid_file_share_by_token(self, token):
         """Return share link that exists and not expire, otherwise none.
         """
-        try:
-            fs = self.get(token=token)
-        except self.model.DoesNotExist:
+        fs = get_share_link_by_token(token)
+        if not isinstance(fs, FileShare):
             return None
 
         if fs.expire_date is None:
@@ -266,9 +268,8 @@ class UploadLinkShareManager(models.Manager):
     def get_valid_upload_link_by_token(self, token):
         """Return upload link that exists and not expire, otherwise none.
         """
-        try:
-            fs = self.get(token=token)
-        except self.model.DoesNotExist:
+        fs = get_share_link_by_token(token)
+        if not isinstance(fs, UploadLinkShare):
             return None
 
         if fs.expire_date is None:
@@ -384,7 +385,54 @@ class PrivateFileDirShare(models.Model):
     s_type = models.CharField(max_length=5, default='f') # `f` or `d`
     objects = PrivateFileDirShareManager()
 
+###### share link token cache
+# cached in place of a link for tokens no link is found by
+NO_SHARE_LINK = 'no_share_link'
+
+def _share_link_cache_key(token):
+    return normalize_cache_key(token, 'share_link_token_')
+
+def get_share_link_by_token(token):
+    """Return download (``FileShare``) or upload (``UploadLinkShare``) link of
+    `token`, expired or not, otherwise none.
+
+    Links are cached by token, tokens of no link are cached for a shorter
+    time, so that scanning for tokens does not hit database.
+    """
+    cache_key = _share_link_cache_key(token)
+    link = cache.get(cache_key)
+    if link == NO_SHARE_LINK:
+        return None
+    if link is not None:
+        return link
+
+    try:
+        link = FileShare.objects.get(token=token)
+    except FileShare.DoesNotExist:
+        try:
+            link = UploadLinkShare.objects.get(token=token)
+        except UploadLinkShare.DoesNotExist:
+            cache.set(cache_key, NO_SHARE_LINK,
+                      SHARE_LINK_TOKEN_NEGATIVE_CACHE_TIMEOUT)
+            return None
+
+    cache.set(cache_key, link, SHARE_LINK_TOKEN_CACHE_TIMEOUT)
+    return link
+
+def get_valid_share_link_by_token(token):
+    """Return download or upload link of `token` that not expire, otherwise
+    none.
+    """
+    link = get_share_link_by_token(token)
+    if link is None:
+        return None
+
+    if link.expire_date is not None and timezone.now() > link.expire_date:
+        return None
+    return link
+
 ###### signal handlers
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from seahub.signals import repo_deleted
 
@@ -392,5 +440,18 @@ from seahub.signals import repo_deleted
 def remove_share_links(sender, **kwargs):
     repo_id = kwargs['repo_id']
 
+    # links are removed from token cache by `clear_share_link_cache`
     FileShare.objects.filter(repo_id=repo_id).delete()
     UploadLinkShare.objects.filter(repo_id=repo_id).delete()
+
+@receiver(post_save, sender=FileShare)
+@receiver(post_save, sender=UploadLinkShare)
+@receiver(post_delete, sender=FileShare)
+@receiver(post_delete, sender=UploadLinkShare)
+def clear_share_link_cache(sender, instance, **kwargs):
+    # view count is not read from cached links
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= set(['view_cnt']):
+        return
+
+    cache.delete(_share_link_cache_key(instance.token))
@@ -0,0 +1,221 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Share link view counts buffered in cache.
+
+With ENABLE_SHARE_LINK_VIEW_CNT_BUFFER, a view increments a per link counter
+in cache instead of updating the link row. The first pending view of a link
+appends its token to a log in cache, whose slots are allocated by
+``cache.incr`` as well, so that concurrent views do not overwrite each
+other. ``flush_view_cnts`` (run by ``manage.py flush_share_link_view_cnt``)
+walks the log and adds pending counts to database, one UPDATE per link.
+
+The cache must be shared by all processes and have atomic ``add`` and
+``incr``, e.g. memcached, otherwise concurrent views are lost. A log entry
+lost to eviction leaves its counter unlogged, such counters are flushed by a
+sweep over all links (``flush_view_cnts(sweep=True)``).
+"""
+import datetime
+import logging
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import BaseCache
+from django.db.models import F
+
+from seahub.base.models import CommandsLastCheck
+from seahub.settings import ENABLE_SHARE_LINK_VIEW_CNT_BUFFER
+from seahub.share.models import FileShare, UploadLinkShare
+from seahub.utils import normalize_cache_key
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+LINK_MODELS = {
+    'f': FileShare,
+    'u': UploadLinkShare,
+}
+
+LOG_LEN_KEY = 'share_link_views_log_len'
+LOG_POS_KEY = 'share_link_views_log_pos'
+FLUSH_LOCK_NAME = 'flush_share_link_view_cnt'
+FLUSH_LOCK_TIMEOUT = 10 * 60
+SWEEP_BATCH_SIZE = 1000
+
+def cache_has_atomic_incr():
+    """Return whether ``incr`` of the cache backend is atomic, i.e. not the
+    get and set of ``BaseCache``.
+    """
+    incr = type(caches['default']).incr
+    return getattr(incr, '__func__', incr) is not BaseCache.incr.__func__
+
+def _link_kind(link):
+    return 'u' if isinstance(link, UploadLinkShare) else 'f'
+
+def _counter_key(kind, token):
+    return normalize_cache_key('%s_%s' % (kind, token), 'share_link_views_')
+
+def _log_key(idx):
+    return 'share_link_views_log_%d' % idx
+
+def _append_log(kind, token):
+    cache.add(LOG_LEN_KEY, 0, None)
+    idx = cache.incr(LOG_LEN_KEY)
+    cache.set(_log_key(idx), (kind, token), None)
+
+def incr_view_cnt(link):
+    """Count a view of download or upload link `link`.
+    """
+    kind = _link_kind(link)
+    if ENABLE_SHARE_LINK_VIEW_CNT_BUFFER:
+        key = _counter_key(kind, link.token)
+        cache.add(key, 0, None)
+        try:
+            pending = cache.incr(key)
+        except ValueError:
+            # evicted right after being added
+            pending = None
+
+        if pending is not None:
+            if pending == 1:
+                try:
+                    _append_log(kind, link.token)
+                except ValueError as e:
+                    logger.error(e)
+            return
+
+    LINK_MODELS[kind].objects.filter(pk=link.pk).update(
+        view_cnt=F('view_cnt') + 1)
+
+def get_pending_view_cnts(links):
+    """Return {token: count} of views of `links` not in database yet.
+    """
+    if not ENABLE_SHARE_LINK_VIEW_CNT_BUFFER or not links:
+        return {}
+
+    keys = dict((_counter_key(_link_kind(l), l.token), l.token) for l in links)
+    return dict((keys[k], v) for k, v in cache.get_many(keys.keys()).items()
+                if v)
+
+def add_pending_view_cnts(links):
+    """Add views not in database yet to `view_cnt` of `links`.
+    """
+    pending = get_pending_view_cnts(links)
+    for l in links:
+        l.view_cnt += pending.get(l.token, 0)
+
+def _flush_view_cnt(kind, token):
+    key = _counter_key(kind, token)
+    cnt = cache.get(key) or 0
+    if cnt <= 0:
+        return False
+
+    try:
+        left = cache.decr(key, cnt)
+    except ValueError:
+        # evicted, the views are lost
+        return False
+
+    try:
+        LINK_MODELS[kind].objects.filter(token=token).update(
+            view_cnt=F('view_cnt') + cnt)
+    except Exception as e:
+        logger.error(e)
+        cache.incr(key, cnt)
+        left += cnt
+
+    if left > 0:
+        # viewed after the count was read, those views are not logged
+        _append_log(kind, token)
+    return True
+
+def _acquire_flush_lock():
+    """Take the flush lock, a row in database so that it holds across hosts.
+
+    Return the time it is taken at, or ``None`` if it is held by another
+    flush started less than ``FLUSH_LOCK_TIMEOUT`` seconds ago.
+    """
+    unlocked = datetime.datetime(1970, 1, 1)
+    lock = CommandsLastCheck.objects.filter(
+        command_type=FLUSH_LOCK_NAME).order_by('pk').first()
+    if lock is None:
+        CommandsLastCheck(command_type=FLUSH_LOCK_NAME,
+                          last_check=unlocked).save()
+        # rows created concurrently are ignored, the first one is the lock
+        lock = CommandsLastCheck.objects.filter(
+            command_type=FLUSH_LOCK_NAME).order_by('pk').first()
+
+    now = datetime.datetime.now().replace(microsecond=0)
+    expired = now - datetime.timedelta(seconds=FLUSH_LOCK_TIMEOUT)
+    if not CommandsLastCheck.objects.filter(
+            pk=lock.pk, last_check__lt=expired).update(last_check=now):
+        return None
+    return now
+
+def _release_flush_lock(locked_at):
+    CommandsLastCheck.objects.filter(
+        command_type=FLUSH_LOCK_NAME, last_check=locked_at).update(
+            last_check=datetime.datetime(1970, 1, 1))
+
+def _sweep_view_cnts():
+    """Flush counters of all links, including those whose log entry is lost.
+    """
+    updated = 0
+    for kind, model in LINK_MODELS.items():
+        last_pk = 0
+        while True:
+            links = list(model.objects.filter(pk__gt=last_pk).order_by(
+                'pk').values_list('pk', 'token')[:SWEEP_BATCH_SIZE])
+            if not links:
+                break
+            last_pk = links[-1][0]
+
+            keys = dict((_counter_key(kind, token), token)
+                        for _, token in links)
+            for key, cnt in cache.get_many(keys.keys()).items():
+                if cnt and _flush_view_cnt(kind, keys[key]):
+                    updated += 1
+    return updated
+
+def flush_view_cnts(sweep=False):
+    """Add pending view counts to database. If `sweep`, counters of all
+    links are checked instead of only the logged ones.
+
+    Return number of links updated, or ``None`` if another flush is running.
+    """
+    locked_at = _acquire_flush_lock()
+    if locked_at is None:
+        return None
+
+    updated = 0
+    try:
+        end = cache.get(LOG_LEN_KEY) or 0
+        pos = cache.get(LOG_POS_KEY) or 0
+        if pos > end:
+            # log length is evicted and counted from 0 again
+            pos = 0
+
+        missing = []
+        for idx in xrange(pos + 1, end + 1):
+            entry = cache.get(_log_key(idx))
+            if entry is None:
+                # slot allocated, entry not written yet or evicted
+                missing.append(idx)
+                continue
+
+            if _flush_view_cnt(*entry):
+                updated += 1
+            cache.delete(_log_key(idx))
+            # entries missing before a present one are treated as evicted
+            missing = []
+            pos = idx
+
+        if missing:
+            # may still be written, check them again next time
+            pos = missing[0] - 1
+        cache.set(LOG_POS_KEY, pos, None)
+
+        if sweep:
+            updated += _sweep_view_cnts()
+    finally:
+        _release_flush_lock(locked_at)
+
+    return updated
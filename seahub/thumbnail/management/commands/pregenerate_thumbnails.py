@@ -0,0 +1,93 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+# encoding: utf-8
+import logging
+import posixpath
+import stat
+from multiprocessing.dummy import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+
+from seaserv import seafile_api
+
+from seahub.settings import THUMBNAIL_PREGENERATE_SIZES, ENABLE_VIDEO_THUMBNAIL
+from seahub.thumbnail.utils import generate_thumbnail_by_obj_id
+from seahub.utils import get_file_type_and_ext
+from seahub.utils.file_types import IMAGE, VIDEO
+
+logger = logging.getLogger(__name__)
+
+def iter_thumbnail_files(repo_id, path):
+    """Yield (path, obj_id) of files under `path` a thumbnail can be made of.
+    """
+    filetypes = (IMAGE, VIDEO) if ENABLE_VIDEO_THUMBNAIL else (IMAGE, )
+
+    dirs = [path]
+    while dirs:
+        parent_dir = dirs.pop()
+        for dirent in seafile_api.list_dir_by_path(repo_id, parent_dir):
+            dirent_path = posixpath.join(parent_dir, dirent.obj_name)
+            if stat.S_ISDIR(dirent.mode):
+                dirs.append(dirent_path)
+                continue
+
+            filetype, fileext = get_file_type_and_ext(dirent.obj_name)
+            if filetype in filetypes:
+                yield dirent_path, dirent.obj_id
+
+class Command(BaseCommand):
+    help = "Create thumbnails of images in a library, or a folder of it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('repo_id')
+        parser.add_argument('--path', default='/',
+                            help='Folder to create thumbnails under.')
+        parser.add_argument('--size', type=int, action='append',
+                            dest='sizes',
+                            help='Thumbnail size, can be given multiple '
+                                 'times. Default to '
+                                 'THUMBNAIL_PREGENERATE_SIZES.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Number of files processed concurrently.')
+
+    def handle(self, *args, **options):
+        repo = seafile_api.get_repo(options['repo_id'])
+        if not repo:
+            raise CommandError('Library %s not found.' % options['repo_id'])
+        if repo.encrypted:
+            raise CommandError('Library %s is encrypted.' % repo.id)
+
+        path = options['path']
+        if not seafile_api.get_dir_id_by_path(repo.id, path):
+            raise CommandError('Folder %s not found.' % path)
+
+        sizes = options['sizes'] or THUMBNAIL_PREGENERATE_SIZES
+
+        def generate(item):
+            file_path, obj_id = item
+            ret = True
+            for i, size in enumerate(sizes):
+                # the first call creates thumbnails of all sizes at once,
+                # the others only find them there
+                try:
+                    success, status_code = generate_thumbnail_by_obj_id(
+                        repo, obj_id, size, file_path,
+                        extra_sizes=sizes[i + 1:])
+                except Exception as e:
+                    logger.error(e)
+                    success = False
+                if not success:
+                    self.stderr.write('Failed to create %dpx thumbnail of %s' %
+                                      (size, file_path))
+                    ret = False
+            return ret
+
+        pool = Pool(options['workers'])
+        try:
+            results = list(pool.imap_unordered(
+                generate, iter_thumbnail_files(repo.id, path)))
+        finally:
+            pool.close()
+            pool.join()
+
+        self.stdout.write('%d files processed, %d failed.' % (
+            len(results), results.count(False)))
@@ -1,10 +1,15 @@
 # Copyright (c) 2012-2016 Seafile Ltd.
 import os
+import errno
+import fcntl
 import posixpath
+import threading
 import timeit
 import tempfile
 import urllib2
 import logging
+import multiprocessing
+from contextlib import contextmanager
 from StringIO import StringIO
 
 from PIL import Image
@@ -15,7 +20,8 @@ from seahub.utils import gen_inner_file_get_url, get_file_type_and_ext
 from seahub.utils.file_types import VIDEO
 from seahub.settings import THUMBNAIL_IMAGE_SIZE_LIMIT, \
     THUMBNAIL_EXTENSION, THUMBNAIL_ROOT, THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT,\
-    ENABLE_VIDEO_THUMBNAIL, THUMBNAIL_VIDEO_FRAME_TIME
+    ENABLE_VIDEO_THUMBNAIL, THUMBNAIL_VIDEO_FRAME_TIME, \
+    THUMBNAIL_GENERATE_WORKERS, THUMBNAIL_SIZE_LADDER
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
@@ -29,6 +35,11 @@ if ENABLE_VIDEO_THUMBNAIL:
 else:
     logger.debug('Video thumbnail is disabled.')
 
+# process pool decoding images, shared by threads of a web worker process
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
 def get_thumbnail_src(repo_id, size, path):
     return posixpath.join("thumbnail", repo_id, str(size), path.lstrip('/'))
 
@@ -39,7 +50,7 @@ def get_rotated_image(image):
 
     # get image's exif info
     try:
-        exif = image._getexif() if image._getexif() else {}
+        exif = image._getexif() or {}
     except Exception:
         return image
 
@@ -88,27 +99,76 @@ def generate_thumbnail(request, repo_id, size, path):
         logger.error(e)
         return (False, 400)
 
-    thumbnail_dir = os.path.join(THUMBNAIL_ROOT, str(size))
-    if not os.path.exists(thumbnail_dir):
-        os.makedirs(thumbnail_dir)
-
     file_id = get_file_id_by_path(repo_id, path)
     if not file_id:
         return (False, 400)
 
-    thumbnail_file = os.path.join(thumbnail_dir, file_id)
+    thumbnail_file = os.path.join(THUMBNAIL_ROOT, str(size), file_id)
     if os.path.exists(thumbnail_file):
         return (True, 200)
 
     repo = get_repo(repo_id)
+    return generate_thumbnail_by_obj_id(repo, file_id, size, path)
+
+def generate_thumbnail_by_obj_id(repo, file_id, size, path, extra_sizes=None):
+    """Generate and save thumbnail of file `file_id` at `path`, if not exist.
+
+    Missing thumbnails of `extra_sizes` are created from the same decoded
+    image, default to the other sizes of THUMBNAIL_SIZE_LADDER if `size`
+    is one of them.
+
+    Concurrent requests of the same thumbnail, from any thread or process,
+    wait for the one generating it instead of doing the same work.
+    """
+    if extra_sizes is None:
+        extra_sizes = THUMBNAIL_SIZE_LADDER if size in THUMBNAIL_SIZE_LADDER \
+                      else []
+
+    thumbnail_files = []
+    for thumb_size in [size] + [x for x in extra_sizes if x != size]:
+        thumbnail_dir = os.path.join(THUMBNAIL_ROOT, str(thumb_size))
+        try:
+            os.makedirs(thumbnail_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        thumbnail_files.append(
+            (thumb_size, os.path.join(thumbnail_dir, file_id)))
+
+    thumbnail_dir = os.path.dirname(thumbnail_files[0][1])
+    with _thumbnail_lock(thumbnail_dir, file_id):
+        if os.path.exists(thumbnail_files[0][1]):
+            return (True, 200)
+
+        # extra thumbnails are written without their locks, at worst one
+        # is created twice
+        thumbnail_files = [(x, f) for x, f in thumbnail_files
+                           if not os.path.exists(f)]
+        return _generate_thumbnail(repo, file_id, path, thumbnail_files)
+
+@contextmanager
+def _thumbnail_lock(thumbnail_dir, file_id):
+    """Hold an exclusive lock for generating a thumbnail of `file_id`.
+
+    Locks are striped by the first two hex digits of file id, so that lock
+    files do not pile up in thumbnail dir.
+    """
+    with open(os.path.join(thumbnail_dir, '.lock_%s' % file_id[:2]), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _generate_thumbnail(repo, file_id, path, thumbnail_files):
     file_size = get_file_size(repo.store_id, repo.version, file_id)
     filetype, fileext = get_file_type_and_ext(os.path.basename(path))
 
     if filetype == VIDEO:
         # video thumbnails
         if ENABLE_VIDEO_THUMBNAIL:
-            return create_video_thumbnails(repo, file_id, path, size,
-                                           thumbnail_file, file_size)
+            return create_video_thumbnails(repo, file_id, path,
+                                           thumbnail_files, file_size)
         else:
             return (False, 400)
 
@@ -116,19 +176,19 @@ def generate_thumbnail(request, repo_id, size, path):
     if file_size > THUMBNAIL_IMAGE_SIZE_LIMIT * 1024**2:
         return (False, 403)
 
-    token = seafile_api.get_fileserver_access_token(repo_id, file_id, 'view',
+    token = seafile_api.get_fileserver_access_token(repo.id, file_id, 'view',
                                                     '', use_onetime=True)
 
     inner_path = gen_inner_file_get_url(token, os.path.basename(path))
     try:
         image_file = urllib2.urlopen(inner_path)
         f = StringIO(image_file.read())
-        return _create_thumbnail_common(f, thumbnail_file, size)
+        return _create_thumbnail(f, thumbnail_files)
     except Exception as e:
         logger.error(e)
         return (False, 500)
 
-def create_video_thumbnails(repo, file_id, path, size, thumbnail_file, file_size):
+def create_video_thumbnails(repo, file_id, path, thumbnail_files, file_size):
 
     t1 = timeit.default_timer()
     token = seafile_api.get_fileserver_access_token(repo.id, file_id, 'view',
@@ -143,7 +203,7 @@ def create_video_thumbnails(repo, file_id, path, size, thumbnail_file, file_size
     logger.debug('Create thumbnail of [%s](size: %s) takes: %s' % (path, file_size, (t2 - t1)))
 
     try:
-        ret = _create_thumbnail_common(tmp_path, thumbnail_file, size)
+        ret = _create_thumbnail(tmp_path, thumbnail_files)
         os.unlink(tmp_path)
         return ret
     except Exception as e:
@@ -151,10 +211,36 @@ def create_video_thumbnails(repo, file_id, path, size, thumbnail_file, file_size
         os.unlink(tmp_path)
         return (False, 500)
 
-def _create_thumbnail_common(fp, thumbnail_file, size):
-    """Common logic for creating image thumbnail.
+def _get_pool():
+    if THUMBNAIL_GENERATE_WORKERS <= 0:
+        return None
+
+    global _pool, _pool_pid
+    with _pool_lock:
+        # a pool can not be used in a forked child process, e.g. gunicorn
+        # workers forked after the pool is created
+        if _pool is None or _pool_pid != os.getpid():
+            # recycle workers, memory of decoded images is not always
+            # given back to the system
+            _pool = multiprocessing.Pool(THUMBNAIL_GENERATE_WORKERS,
+                                         maxtasksperchild=100)
+            _pool_pid = os.getpid()
+        return _pool
+
+def _create_thumbnail(fp, thumbnail_files):
+    """Create image thumbnails, in the thumbnail process pool if enabled.
+    """
+    pool = _get_pool()
+    if pool is None:
+        return _create_thumbnail_common(fp, thumbnail_files)
+    return pool.apply(_create_thumbnail_common, (fp, thumbnail_files))
+
+def _create_thumbnail_common(fp, thumbnail_files):
+    """Common logic for creating image thumbnails.
 
-    `fp` can be a filename (string) or a file object.
+    `fp` can be a filename (string) or a file object. `thumbnail_files` is a
+    list of (size, thumbnail file). The image is decoded once, smaller
+    thumbnails are scaled down from larger ones.
     """
     image = Image.open(fp)
 
@@ -166,10 +252,30 @@ def _create_thumbnail_common(fp, thumbnail_file, size):
     if image_memory_cost > THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT:
         return (False, 403)
 
+    # let JPEG decoder scale the image down (by 1/2, 1/4 or 1/8) to no less
+    # than the largest thumbnail, no-op for other formats
+    max_size = max(size for size, thumbnail_file in thumbnail_files)
+    image.draft(image.mode, (max_size, max_size))
+
     if image.mode not in ["1", "L", "P", "RGB", "RGBA"]:
         image = image.convert("RGB")
 
     image = get_rotated_image(image)
-    image.thumbnail((size, size), Image.ANTIALIAS)
-    image.save(thumbnail_file, THUMBNAIL_EXTENSION)
+    for size, thumbnail_file in sorted(thumbnail_files, reverse=True):
+        image.thumbnail((size, size), Image.ANTIALIAS)
+        _save_thumbnail(image, thumbnail_file)
+
     return (True, 200)
+
+def _save_thumbnail(image, thumbnail_file):
+    # write to a temp file first, so that a partly written thumbnail is
+    # never served
+    fd, tmp_file = tempfile.mkstemp(prefix='.tmp',
+                                    dir=os.path.dirname(thumbnail_file))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, THUMBNAIL_EXTENSION)
+        os.rename(tmp_file, thumbnail_file)
+    except Exception:
+        os.unlink(tmp_file)
+        raise
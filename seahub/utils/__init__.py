@@ -12,15 +12,19 @@ import locale
 import ConfigParser
 import mimetypes
 import contextlib
+import time
 from datetime import datetime
+from multiprocessing.dummy import Pool
 from urlparse import urlparse, urljoin
 import json
 
 import ccnet
 from constance import config
 import seaserv
-from seaserv import seafile_api
 
+from seahub.utils.rpc import memoized_seafile_api as seafile_api
+
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.core.mail import EmailMessage
 from django.shortcuts import render_to_response
@@ -33,7 +37,8 @@ from django.views.static import serve as django_static_serve
 
 from seahub.api2.models import Token, TokenV2
 import seahub.settings
-from seahub.settings import SITE_NAME, MEDIA_URL, LOGO_PATH
+from seahub.settings import SITE_NAME, MEDIA_URL, LOGO_PATH, \
+    SHARE_LINK_TRAFFIC_CACHE_TIMEOUT, EVENTS_RESOLVE_WORKERS
 try:
     from seahub.settings import EVENTS_CONFIG_FILE
 except ImportError:
@@ -342,20 +347,79 @@ def get_conf_text_ext():
         return [x.strip() for x in text_ext]
     return []
 
+class FileTypeClassifier(object):
+    """Map file names to (file type, extension) and file icons, through a
+    table compiled from ``PREVIEW_FILEEXT``, ``FILEEXT_ICON_MAP`` and the
+    `TEXT_PREVIEW_EXT` web setting.
+
+    The web setting is read at most once every `check_interval` seconds,
+    and the table is only rebuilt when its value changed.
+    """
+    def __init__(self, check_interval=10):
+        self.check_interval = check_interval
+        self._text_ext_conf = None
+        self._table = None
+        self._checked_at = 0
+
+    def invalidate(self):
+        """Re-read the web setting on next lookup.
+        """
+        self._checked_at = 0
+
+    def _build_table(self, text_ext):
+        default_icon = FILEEXT_ICON_MAP['default']
+        table = {}
+        for fileext, icon in FILEEXT_ICON_MAP.iteritems():
+            table[fileext] = ('Unknown', icon)
+        for fileext, filetype in FILEEXT_TYPE_MAP.iteritems():
+            table[fileext] = (filetype, table.get(fileext, (None, default_icon))[1])
+        for fileext in text_ext:
+            table[fileext] = (TEXT, table.get(fileext, (None, default_icon))[1])
+        table.pop('default', None)
+        return table
+
+    def get_table(self):
+        """Return a dict of extension -> (file type, icon).
+        """
+        now = time.time()
+        if self._table is not None and \
+                now - self._checked_at < self.check_interval:
+            return self._table
+
+        text_ext_conf = getattr(config, 'TEXT_PREVIEW_EXT', '')
+        if self._table is None or text_ext_conf != self._text_ext_conf:
+            text_ext = [x.strip() for x in text_ext_conf.split(',')]
+            self._table = self._build_table(text_ext)
+            self._text_ext_conf = text_ext_conf
+
+        self._checked_at = now
+        return self._table
+
+    def classify(self, filename, table=None):
+        table = table if table is not None else self.get_table()
+        fileext = os.path.splitext(filename)[1][1:].lower()
+        entry = table.get(fileext)
+        return (entry[0] if entry else 'Unknown', fileext)
+
+    def classify_many(self, filenames):
+        """Return a list of (file type, extension) for `filenames`.
+        """
+        table = self.get_table()
+        return [self.classify(x, table) for x in filenames]
+
+    def get_icon(self, filename):
+        fileext = os.path.splitext(filename)[1][1:].lower()
+        entry = self.get_table().get(fileext)
+        return entry[1] if entry else FILEEXT_ICON_MAP['default']
+
+file_type_classifier = FileTypeClassifier()
+
 def get_file_type_and_ext(filename):
     """
     Return file type and extension if the file can be previewd online,
     otherwise, return unknown type.
     """
-    fileExt = os.path.splitext(filename)[1][1:].lower()
-    if fileExt in get_conf_text_ext():
-        return (TEXT, fileExt)
-
-    filetype = FILEEXT_TYPE_MAP.get(fileExt)
-    if filetype:
-        return (filetype, fileExt)
-    else:
-        return ('Unknown', fileExt)
+    return file_type_classifier.classify(filename)
 
 def get_file_revision_id_size(repo_id, commit_id, path):
     """Given a commit and a file path in that commit, return the seafile id
@@ -480,6 +544,18 @@ def is_org_context(request):
     return request.cloud_mode and request.user.org is not None
 
 # events related
+def parse_events_cursor(cursor):
+    """Return (start, uuid of last event read) of a cursor returned by
+    ``get_events_page``. A plain offset is accepted as well.
+
+    Raise ``ValueError`` if `cursor` is invalid.
+    """
+    start, _, after = cursor.partition(':')
+    start = int(start)
+    if start < 0:
+        raise ValueError('negative start: %s' % start)
+    return start, after or None
+
 if EVENTS_CONFIG_FILE:
     parsed_events_conf = ConfigParser.ConfigParser()
     parsed_events_conf.read(EVENTS_CONFIG_FILE)
@@ -497,51 +573,128 @@ if EVENTS_CONFIG_FILE:
         finally:
            session.close()
 
-    def _same_events(e1, e2):
-        """Two events are equal should follow two rules:
-        1. event1.repo_id = event2.repo_id
-        2. event1.commit.creator = event2.commit.creator
-        3. event1.commit.desc = event2.commit.desc
+    def _event_dedup_key(ev):
+        """Events of the same library, whose commits have the same creator
+        and description, are shown once.
         """
-        if hasattr(e1, 'commit') and hasattr(e2, 'commit'):
-            if e1.repo_id == e2.repo_id and \
-               e1.commit.desc == e2.commit.desc and \
-               e1.commit.creator_name == e2.commit.creator_name:
-                return True
-        return False
+        if getattr(ev, 'commit', None) is None:
+            return None
+        return (ev.repo_id, ev.commit.desc, ev.commit.creator_name)
+
+    def _map_bounded(func, items):
+        """Return ``[func(item) for item in items]``, calls are run in up to
+        ``EVENTS_RESOLVE_WORKERS`` threads.
+        """
+        if EVENTS_RESOLVE_WORKERS <= 1 or len(items) <= 1:
+            return map(func, items)
+
+        pool = Pool(min(EVENTS_RESOLVE_WORKERS, len(items)))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.terminate()
+
+    def _resolve_events(ev_session, events, username):
+        """Set ``repo`` and ``commit`` of repo-update events in `events`,
+        ``commit`` is ``None`` if it can not be read.
+
+        Each distinct library and commit is read once. Events of deleted
+        libraries are deleted, and left out of the returned list.
+        """
+        update_events = [ev for ev in events if ev.etype == 'repo-update']
+        if not update_events:
+            return events
+
+        repo_ids = list(set(ev.repo_id for ev in update_events))
+        repos = dict(zip(repo_ids, _map_bounded(seafile_api.get_repo,
+                                                repo_ids)))
+
+        encrypted_repos = [r for r in repos.values() if r and r.encrypted]
+        password_sets = _map_bounded(
+            lambda r: seafile_api.is_password_set(r.id, username),
+            encrypted_repos)
+        for repo, password_set in zip(encrypted_repos, password_sets):
+            repo.password_set = password_set
+
+        commit_keys = list(set((ev.repo_id, ev.commit_id)
+                               for ev in update_events if repos[ev.repo_id]))
+        commits = dict(zip(commit_keys, _map_bounded(
+            lambda k: seaserv.get_commit(k[0], repos[k[0]].version, k[1]),
+            commit_keys)))
+
+        valid_events = []
+        for ev in events:
+            if ev.etype == 'repo-update':
+                repo = repos[ev.repo_id]
+                if not repo:
+                    # delete the update event for repo which has been deleted
+                    seafevents.delete_event(ev_session, ev.uuid)
+                    continue
+                ev.repo = repo
+                ev.commit = commits[(ev.repo_id, ev.commit_id)]
+            valid_events.append(ev)
+        return valid_events
+
+    def _get_events(username, start, count, org_id=None, after=None):
+        """Return a list of up to `count` events of user from offset `start`,
+        the offset of the next unread event and the uuid of the last read one.
 
-    def _get_events(username, start, count, org_id=None):
+        Raw events are read `count` at a time and each batch is resolved in
+        bulk. If `after`, the uuid of the last event of the previous page,
+        is in the first batch, events up to it are skipped, so that events
+        created since the previous page do not show up again.
+        """
         ev_session = SeafEventsSession()
 
         valid_events = []
-        total_used = 0
+        seen = set()
+        last_uuid = after
+        # offset of the next unread event, events of deleted libraries are
+        # deleted from database and do not count
+        pos = start
         try:
-            next_start = start
-            while True:
-                events = _get_events_inner(ev_session, username, next_start,
-                                           count, org_id)
+            first_batch = True
+            while len(valid_events) < count:
+                if org_id > 0:
+                    events = seafevents.get_org_user_events(ev_session, org_id,
+                                                            username, pos,
+                                                            count)
+                else:
+                    events = seafevents.get_user_events(ev_session, username,
+                                                        pos, count)
                 if not events:
                     break
 
-                for e1 in events:
-                    duplicate = False
-                    for e2 in valid_events:
-                        if _same_events(e1, e2): duplicate = True; break
+                if first_batch and after:
+                    uuids = [ev.uuid for ev in events]
+                    if after in uuids:
+                        skipped = uuids.index(after) + 1
+                        pos += skipped
+                        events = events[skipped:]
+                first_batch = False
+
+                for ev in _resolve_events(ev_session, events, username):
+                    pos += 1
+                    last_uuid = ev.uuid
+
+                    if ev.etype == 'repo-update' and ev.commit is None:
+                        logger = logging.getLogger(__name__)
+                        logger.warning('[repo %s] commit %s not found.' %
+                                       (ev.repo_id, ev.commit_id))
+                        continue
 
-                    new_merge = False
-                    if hasattr(e1, 'commit') and e1.commit and \
-                       new_merge_with_no_conflict(e1.commit):
-                        new_merge = True
+                    key = _event_dedup_key(ev)
+                    if key is not None and key in seen:
+                        continue
+                    if getattr(ev, 'commit', None) is not None and \
+                       new_merge_with_no_conflict(ev.commit):
+                        continue
 
-                    if not duplicate and not new_merge:
-                        valid_events.append(e1)
-                    total_used = total_used + 1
+                    if key is not None:
+                        seen.add(key)
+                    valid_events.append(ev)
                     if len(valid_events) == count:
                         break
-
-                if len(valid_events) == count:
-                    break
-                next_start = next_start + len(events)
         finally:
             ev_session.close()
 
@@ -549,49 +702,21 @@ if EVENTS_CONFIG_FILE:
             if hasattr(e, 'commit'):
                 e.commit.converted_cmmt_desc = convert_cmmt_desc_link(e.commit)
                 e.commit.more_files = more_files_in_commit(e.commit)
-        return valid_events, start + total_used
 
-    def _get_events_inner(ev_session, username, start, limit, org_id=None):
-        '''Read events from seafevents database, and remove events that are
-        no longer valid
-
-        Return 'limit' events or less than 'limit' events if no more events remain
-        '''
-        valid_events = []
-        next_start = start
-        while True:
-            if org_id > 0:
-                events = seafevents.get_org_user_events(ev_session, org_id,
-                                                        username, next_start,
-                                                        limit)
-            else:
-                events = seafevents.get_user_events(ev_session, username,
-                                                    next_start, limit)
-            if not events:
-                break
-
-            for ev in events:
-                if ev.etype == 'repo-update':
-                    repo = seafile_api.get_repo(ev.repo_id)
-                    if not repo:
-                        # delete the update event for repo which has been deleted
-                        seafevents.delete_event(ev_session, ev.uuid)
-                        continue
-                    if repo.encrypted:
-                        repo.password_set = seafile_api.is_password_set(
-                            repo.id, username)
-                    ev.repo = repo
-                    ev.commit = seaserv.get_commit(repo.id, repo.version, ev.commit_id)
-
-                valid_events.append(ev)
-                if len(valid_events) == limit:
-                    break
+        return valid_events, pos, last_uuid
 
-            if len(valid_events) == limit:
-                break
-            next_start = next_start + len(valid_events)
+    def get_events_page(username, cursor, count, org_id=None):
+        """Return a list of up to `count` events of user from `cursor` (``''``
+        for the first page), and the cursor of the next page.
 
-        return valid_events
+        Unlike a plain offset, the cursor keeps paging stable when events are
+        created while the user is paging.
+        """
+        start, after = parse_events_cursor(cursor) if cursor else (0, None)
+        events, pos, last_uuid = _get_events(username, start, count,
+                                             org_id=org_id, after=after)
+        next_cursor = '%d:%s' % (pos, last_uuid) if last_uuid else str(pos)
+        return events, next_cursor
 
     def get_user_events(username, start, count):
         """Return user events list and a new start.
@@ -602,10 +727,13 @@ if EVENTS_CONFIG_FILE:
         ``get_user_events('foo@example.com', 5, 10)`` returns the 6th through
         15th events.
         """
-        return _get_events(username, start, count)
+        events, next_start, _ = _get_events(username, start, count)
+        return events, next_start
 
     def get_org_user_events(org_id, username, start, count):
-        return _get_events(username, start, count, org_id=org_id)
+        events, next_start, _ = _get_events(username, start, count,
+                                            org_id=org_id)
+        return events, next_start
 
     def get_log_events_by_time(log_type, tstart, tend):
         """Return log events list by start/end timestamp. (If no logs, return 'None')
@@ -701,6 +829,8 @@ else:
         pass
     def get_org_user_events():
         pass
+    def get_events_page():
+        pass
     def generate_file_audit_event_type():
         pass
     def get_file_audit_events_by_path():
@@ -749,8 +879,9 @@ def get_site_scheme_and_netloc():
     return "%s://%s" % (parse_result.scheme, parse_result.netloc)
 
 def send_html_email(subject, con_template, con_context, from_email, to_email,
-                    reply_to=None):
-    """Send HTML email
+                    reply_to=None, connection=None):
+    """Send HTML email, over `connection` if given, so that callers sending
+    many emails can reuse one SMTP connection.
     """
     base_context = {
         'url_base': get_site_scheme_and_netloc(),
@@ -767,7 +898,7 @@ def send_html_email(subject, con_template, con_context, from_email, to_email,
             headers['Reply-to'] = reply_to
 
     msg = EmailMessage(subject, t.render(Context(con_context)), from_email,
-                       to_email, headers=headers)
+                       to_email, headers=headers, connection=connection)
     msg.content_subtype = "html"
     msg.send()
 
@@ -1140,31 +1271,72 @@ else:
     def get_user_traffic_list():
         pass
 
-def user_traffic_over_limit(username):
-    """Return ``True`` if user traffic over the limit, otherwise ``False``.
-    """
-    if not CHECK_SHARE_LINK_TRAFFIC:
-        return False
+def _user_traffic_cache_key(username):
+    return normalize_cache_key(username, 'user_traffic_')
+
+def _user_traffic_delta_cache_key(username):
+    return normalize_cache_key(username, 'user_traffic_delta_')
 
+def get_user_traffic_budget(username):
+    """Return (traffic limit, traffic of this month) of user in bytes, from
+    user's plan and events database.
+    """
     from seahub_extra.plan.models import UserPlan
     from seahub_extra.plan.settings import PLAN
     up = UserPlan.objects.get_valid_plan_by_user(username)
     plan = 'Free' if up is None else up.plan_type
     traffic_limit = int(PLAN[plan]['share_link_traffic']) * 1024 * 1024 * 1024
 
-    try:
-        stat = get_user_traffic_stat(username)
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error('Failed to get user traffic stat: %s' % username,
-                     exc_info=True)
-        return True
-
+    stat = get_user_traffic_stat(username)
     if stat is None:            # No traffic record yet
-        return False
+        return traffic_limit, 0
 
     month_traffic = stat['file_view'] + stat['file_download'] + stat['dir_download']
-    return True if month_traffic >= traffic_limit else False
+    return traffic_limit, month_traffic
+
+def user_traffic_over_limit(username):
+    """Return ``True`` if user traffic over the limit, otherwise ``False``.
+
+    The budget is cached for ``SHARE_LINK_TRAFFIC_CACHE_TIMEOUT`` seconds,
+    traffic counted by ``add_user_traffic`` since then is added to it.
+    """
+    if not CHECK_SHARE_LINK_TRAFFIC:
+        return False
+
+    budget = cache.get(_user_traffic_cache_key(username))
+    if budget is None:
+        try:
+            budget = get_user_traffic_budget(username)
+        except Exception as e:
+            logger = logging.getLogger(__name__)
+            logger.error('Failed to get user traffic stat: %s' % username,
+                         exc_info=True)
+            return True
+
+        # events database already has the traffic counted so far
+        cache.set(_user_traffic_delta_cache_key(username), 0,
+                  SHARE_LINK_TRAFFIC_CACHE_TIMEOUT)
+        cache.set(_user_traffic_cache_key(username), budget,
+                  SHARE_LINK_TRAFFIC_CACHE_TIMEOUT)
+        delta = 0
+    else:
+        delta = cache.get(_user_traffic_delta_cache_key(username)) or 0
+
+    traffic_limit, month_traffic = budget
+    return True if month_traffic + delta >= traffic_limit else False
+
+def add_user_traffic(username, size):
+    """Add ``size`` bytes to the cached traffic of user, before events
+    database counts it from the ``seahub.stats`` message.
+    """
+    if not CHECK_SHARE_LINK_TRAFFIC or not size:
+        return
+
+    try:
+        cache.incr(_user_traffic_delta_cache_key(username), size)
+    except ValueError:
+        # not cached, events database is read on next check
+        pass
 
 def is_user_password_strong(password):
     """Return ``True`` if user's password is STRONG, otherwise ``False``.
@@ -0,0 +1,64 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Process local LRU cache, for values that are too large or too hot to go
+through the Django cache backend on every request.
+"""
+import threading
+from collections import OrderedDict
+
+class LRUCache(object):
+    """A thread safe LRU cache, bounded by the total size of its values.
+
+    Arguments:
+    - `max_size`: maximum total size of values, 0 disables the cache.
+    - `sizeof`: function returning the size of a value, default to 1 per
+      value, in which case `max_size` is the maximum number of values.
+    """
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, size = self._items.pop(key)
+            except KeyError:
+                return default
+            # move to most recently used end
+            self._items[key] = (value, size)
+            return value
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+
+            self._items[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
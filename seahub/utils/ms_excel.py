@@ -1,5 +1,7 @@
 # Copyright (c) 2012-2016 Seafile Ltd.
 import logging
+import tempfile
+
 import openpyxl
 
 logger = logging.getLogger(__name__)
@@ -32,3 +34,27 @@ def write_xls(sheet_name, head, data_list):
             c.value = row[col_num]
 
     return wb
+
+def save_xls(sheet_name, head, rows):
+    """Write `rows` into a write only workbook saved to a temporary file, and
+    return the file, positioned at its start.
+
+    Rows are serialized as they are consumed from the `rows` iterable, so
+    memory usage does not grow with the number of rows. Errors raised by
+    `rows` propagate to the caller.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name)
+
+    ws.append(head)
+    for row in rows:
+        ws.append(row)
+
+    f = tempfile.TemporaryFile()
+    try:
+        wb.save(f)
+        f.seek(0)
+    except:
+        f.close()
+        raise
+    return f
@@ -1,12 +1,21 @@
 # Copyright (c) 2012-2016 Seafile Ltd.
 # -*- coding: utf-8 -*-
+import copy
 import logging
+import posixpath
+import stat
+from collections import namedtuple
+from itertools import imap, izip
+from multiprocessing.dummy import Pool
+
+from django.conf import settings
 from django.utils.translation import ugettext as _
 
 import seaserv
-from seaserv import seafile_api
+from seaserv import seafile_api, seafserv_threaded_rpc
 
-from seahub.utils import EMPTY_SHA1, is_org_context
+from seahub.utils import EMPTY_SHA1, is_org_context, is_pro_version
+from seahub.utils.lru import LRUCache
 from seahub.base.accounts import User
 
 logger = logging.getLogger(__name__)
@@ -49,3 +58,233 @@ def get_repo_shared_users(repo_id, repo_owner, include_groups=True):
             ret += [x.user_name for x in g_members if x.user_name != repo_owner]
 
     return list(set(ret))
+
+class GroupReposResolver(object):
+    """Resolve libraries shared to a user's groups with as few RPCs as
+    possible.
+
+    Group shares are listed once per group, then each distinct library is
+    fetched and permission-checked only once, no matter how many groups it
+    is shared to. The resolver is memoized on the request, so later callers
+    in the same request reuse what has already been fetched.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._group_shares = {}     # group id -> shared repos
+        self._repos = {}            # repo id -> repo or None
+        self._perms = {}            # repo id -> permission
+
+    @classmethod
+    def for_request(cls, request):
+        resolver = getattr(request, '_group_repos_resolver', None)
+        if resolver is None:
+            resolver = cls(request)
+            request._group_repos_resolver = resolver
+        return resolver
+
+    def get_group_shares(self, group_id):
+        """Return repos shared to group `group_id`, with share permission and
+        repo owner filled in.
+        """
+        if group_id not in self._group_shares:
+            if is_org_context(self.request):
+                org_id = self.request.user.org.org_id
+                shares = seafile_api.get_org_group_repos(org_id, group_id)
+            else:
+                shares = seafile_api.get_repos_by_group(group_id)
+            self._group_shares[group_id] = shares
+        return self._group_shares[group_id]
+
+    def get_repo(self, repo_id):
+        if repo_id not in self._repos:
+            self._repos[repo_id] = seafile_api.get_repo(repo_id)
+        return self._repos[repo_id]
+
+    def get_permission(self, repo_id):
+        if repo_id not in self._perms:
+            from seahub.views import check_folder_permission
+            self._perms[repo_id] = check_folder_permission(self.request,
+                                                           repo_id, '/')
+        return self._perms[repo_id]
+
+    def resolve(self, groups):
+        """Return repos shared to `groups`, one item per (group, repo) pair.
+
+        Each item is a copy of the repo object with `repo_id`, `repo_name`,
+        `repo_desc`, `last_modified`, `share_type`, `user`, `user_perm` and
+        `group` set.
+        """
+        shares = []
+        for grp in groups:
+            for s in self.get_group_shares(grp.id):
+                shares.append((grp, s))
+
+        group_repos = []
+        for grp, s in shares:
+            repo = self.get_repo(s.repo_id)
+            if not repo:
+                continue
+
+            r = copy.copy(repo)
+            r.repo_id = r.id
+            r.repo_name = r.name
+            r.repo_desc = r.desc
+            r.last_modified = s.last_modified
+            r.share_type = 'group'
+            r.user = s.user
+            r.user_perm = self.get_permission(r.id)
+            r.group = grp
+            group_repos.append(r)
+
+        return group_repos
+
+########## directory listing cache
+DirentInfo = namedtuple('DirentInfo', [
+    'obj_name', 'obj_id', 'mode', 'mtime', 'size', 'permission',
+    'is_locked', 'lock_owner', 'lock_time'])
+
+# rough per entry overhead of a cached ``DirentInfo``, in bytes
+DIRENT_INFO_OVERHEAD = 400
+
+def _dir_listing_sizeof(value):
+    if isinstance(value, basestring):
+        return len(value)
+    dirs, files = value
+    return sum(len(d.obj_name) + DIRENT_INFO_OVERHEAD for d in dirs + files)
+
+dir_listing_cache = LRUCache(getattr(settings, 'DIR_LISTING_CACHE_SIZE', 0),
+                             sizeof=_dir_listing_sizeof)
+
+def is_dir_listing_cacheable():
+    """Dirents only depend on the dir object and the user's permission on
+    the dir, unless folder permissions and file locks are involved, which is
+    the case on pro edition.
+    """
+    return dir_listing_cache.max_size > 0 and not is_pro_version()
+
+def get_dir_listing_cache_key(repo_id, dir_id, dir_perm, *args):
+    return (repo_id, dir_id, dir_perm) + args
+
+# key functions for sorting ``DirentInfo``, ties are broken by name
+DIRENT_SORT_KEYS = {
+    'name': lambda d: d.obj_name.lower(),
+    'mtime': lambda d: (d.mtime, d.obj_name.lower()),
+    'size': lambda d: (d.size, d.obj_name.lower()),
+}
+
+def list_dir_sorted(repo, path, dir_id, username, dir_perm=None,
+                    sort_by='name'):
+    """Return (dirs, files) in dir `dir_id` of `repo`, as tuples of
+    ``DirentInfo``, each sorted by `sort_by`, one of ``DIRENT_SORT_KEYS``.
+    Names are compared case insensitively.
+
+    Listings are cached by dir id and `dir_perm`, the permission of
+    `username` on `path`, which is looked up if not given. Raise
+    ``SearpcError`` if listing failed.
+    """
+    if dir_perm is None:
+        dir_perm = seafile_api.check_permission_by_path(repo.id, path,
+                                                        username)
+
+    cacheable = is_dir_listing_cacheable()
+    if sort_by != 'name':
+        if cacheable:
+            key = get_dir_listing_cache_key(repo.id, dir_id, dir_perm,
+                                            'sorted', sort_by)
+            cached = dir_listing_cache.get(key)
+            if cached is not None:
+                return cached
+
+        dirs, files = list_dir_sorted(repo, path, dir_id, username, dir_perm)
+        sort_key = DIRENT_SORT_KEYS[sort_by]
+        ret = (tuple(sorted(dirs, key=sort_key)),
+               tuple(sorted(files, key=sort_key)))
+        if cacheable:
+            dir_listing_cache.set(key, ret)
+        return ret
+
+    if cacheable:
+        key = get_dir_listing_cache_key(repo.id, dir_id, dir_perm)
+        cached = dir_listing_cache.get(key)
+        if cached is not None:
+            return cached
+
+    dirents = seafserv_threaded_rpc.list_dir_with_perm(repo.id, path, dir_id,
+                                                       username, -1, -1)
+    dirs, files = [], []
+    for d in dirents or []:
+        if stat.S_ISDIR(d.mode):
+            size = 0
+        elif repo.version == 0:
+            size = seafile_api.get_file_size(repo.store_id, repo.version,
+                                             d.obj_id)
+        else:
+            size = d.size
+
+        info = DirentInfo(d.obj_name, d.obj_id, d.mode, d.mtime, size or 0,
+                          d.permission, getattr(d, 'is_locked', False),
+                          getattr(d, 'lock_owner', None),
+                          getattr(d, 'lock_time', None))
+        if stat.S_ISDIR(d.mode):
+            dirs.append(info)
+        else:
+            files.append(info)
+
+    dirs.sort(key=DIRENT_SORT_KEYS['name'])
+    files.sort(key=DIRENT_SORT_KEYS['name'])
+    ret = (tuple(dirs), tuple(files))
+
+    if cacheable:
+        dir_listing_cache.set(key, ret)
+    return ret
+
+
+def walk_dirs(repo, path, dir_id, username, max_depth=None, limit=None,
+              workers=None):
+    """Walk sub dirs of `path` breadth first, yield (parent_dir, dirent)
+    pairs, `dirent` being a ``DirentInfo``.
+
+    Sub dirs are listed by their obj id, dirs of the same level are listed
+    in parallel by up to `workers` threads. Stop after `max_depth` levels
+    or `limit` dirs, if given. All sub dirs are listed with the permission
+    of `username` on `path`.
+    """
+    if workers is None:
+        workers = getattr(settings, 'RECURSIVE_DIR_LIST_WORKERS', 4)
+
+    dir_perm = seafile_api.check_permission_by_path(repo.id, path, username)
+
+    def list_sub_dirs(item):
+        parent_dir, parent_dir_id = item
+        dirs, files = list_dir_sorted(repo, parent_dir, parent_dir_id,
+                                      username, dir_perm)
+        return dirs
+
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        level = [(path, dir_id)]
+        depth = 0
+        count = 0
+        while level and (max_depth is None or depth < max_depth):
+            depth += 1
+            if pool and len(level) > 1:
+                results = pool.imap(list_sub_dirs, level)
+            else:
+                results = imap(list_sub_dirs, level)
+
+            next_level = []
+            for (parent_dir, parent_dir_id), dirs in izip(level, results):
+                for d in dirs:
+                    yield parent_dir, d
+
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+
+                    next_level.append((posixpath.join(parent_dir, d.obj_name),
+                                       d.obj_id))
+            level = next_level
+    finally:
+        if pool:
+            pool.terminate()
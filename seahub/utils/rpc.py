@@ -2,12 +2,18 @@
 """
 Proxy RPC calls to seafile_api, silence RPC errors, emulating Ruby's
 "method_missing".
+
+Also provide request-scoped memoization proxies around seaserv entry points,
+see ``MemoizedRPCProxy``.
 """
 
+import copy
 from functools import partial
 import logging
+import threading
 
-from seaserv import seafile_api
+import seaserv
+from seaserv import seafile_api, ccnet_api
 from pysearpc import SearpcError
 
 # Get an instance of a logger
@@ -33,3 +39,166 @@ class RPCProxy(object):
 
 
 mute_seafile_api = RPCProxy(mute=True)
+
+
+########## request-scoped memoization
+# Calls that only read state. Any other call made through a memoized proxy is
+# treated as mutating and drops everything cached so far in the request.
+SEAFILE_API_READ_CALLS = frozenset([
+    'check_permission_by_path',
+    'get_commit_list',
+    'get_dir_id_by_commit_and_path',
+    'get_dir_id_by_path',
+    'get_dirent_by_path',
+    'get_file_id_by_path',
+    'get_file_size',
+    'get_folder_group_perm',
+    'get_folder_user_perm',
+    'get_group_repoids',
+    'get_org_group_repoids',
+    'get_org_group_repos',
+    'get_org_owned_repo_list',
+    'get_org_repo_owner',
+    'get_org_share_in_repo_list',
+    'get_org_user_quota',
+    'get_owned_repo_list',
+    'get_repo',
+    'get_repo_history_limit',
+    'get_repo_owner',
+    'get_repos_by_group',
+    'get_share_in_repo_list',
+    'get_user_quota',
+    'get_user_self_usage',
+    'is_password_set',
+    'is_repo_owner',
+    'list_dir_by_commit_and_path',
+    'list_dir_by_path',
+    'list_repo_shared_group_by_user',
+    'list_repo_shared_to',
+])
+
+CCNET_API_READ_CALLS = frozenset([
+    'get_group',
+    'get_group_members',
+    'get_org_by_id',
+    'get_orgs_by_user',
+    'is_group_user',
+])
+
+SEASERV_READ_CALLS = frozenset([
+    'check_permission',
+    'get_commit',
+    'get_group',
+    'get_group_members',
+    'get_org_groups_by_user',
+    'get_personal_groups_by_user',
+    'get_repo',
+    'is_group_user',
+])
+
+SEAFSERV_THREADED_RPC_READ_CALLS = frozenset([
+    'get_commit',
+    'get_diff',
+    'get_file_id_by_commit_and_path',
+    'list_dir_with_perm',
+    'list_file_revisions',
+    'list_org_inner_pub_repos_by_owner',
+])
+
+CCNET_THREADED_RPC_READ_CALLS = frozenset([
+    'get_org_by_url_prefix',
+])
+
+_local = threading.local()
+
+class RPCCallCache(object):
+    """Results of read-only RPC calls made while serving one request, with
+    hit/miss counters.
+    """
+    def __init__(self):
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self):
+        if self.results:
+            self.results = {}
+            self.invalidations += 1
+
+def _copy_result(ret):
+    if ret is None or isinstance(ret, (basestring, bool, int, long, float)):
+        return ret
+    return copy.deepcopy(ret)
+
+def start_rpc_cache():
+    """Start memoizing RPC calls made by the current thread.
+    """
+    _local.rpc_cache = RPCCallCache()
+    return _local.rpc_cache
+
+def stop_rpc_cache():
+    """Stop memoizing RPC calls made by the current thread, and return the
+    cache, so that its counters can be inspected.
+    """
+    rpc_cache = getattr(_local, 'rpc_cache', None)
+    _local.rpc_cache = None
+    return rpc_cache
+
+def get_rpc_cache():
+    return getattr(_local, 'rpc_cache', None)
+
+class MemoizedRPCProxy(object):
+    """Proxy calls to `api`, memoizing the results of calls in `read_calls`
+    while a RPC cache is started for the current thread.
+
+    Without a started cache, calls go straight to `api`. Every caller gets
+    its own copy of a cached result, so it may be modified in place.
+    """
+    def __init__(self, api, read_calls, namespace):
+        self.api = api
+        self.read_calls = read_calls
+        self.namespace = namespace
+
+    def __getattr__(self, name):
+        attr = getattr(self.api, name)
+        if not callable(attr):
+            return attr
+        return partial(self.method_missing, name)
+
+    def method_missing(self, name, *args, **kwargs):
+        real_func = getattr(self.api, name)
+        rpc_cache = get_rpc_cache()
+        if rpc_cache is None:
+            return real_func(*args, **kwargs)
+
+        if name not in self.read_calls:
+            rpc_cache.invalidate()
+            return real_func(*args, **kwargs)
+
+        key = (self.namespace, name, args, tuple(sorted(kwargs.items())))
+        try:
+            if key in rpc_cache.results:
+                rpc_cache.hits += 1
+                return _copy_result(rpc_cache.results[key])
+        except TypeError:
+            # unhashable arguments
+            return real_func(*args, **kwargs)
+
+        rpc_cache.misses += 1
+        ret = real_func(*args, **kwargs)
+        rpc_cache.results[key] = ret
+        return _copy_result(ret)
+
+
+memoized_seafile_api = MemoizedRPCProxy(seafile_api, SEAFILE_API_READ_CALLS,
+                                        'seafile_api')
+memoized_ccnet_api = MemoizedRPCProxy(ccnet_api, CCNET_API_READ_CALLS,
+                                      'ccnet_api')
+memoized_seaserv = MemoizedRPCProxy(seaserv, SEASERV_READ_CALLS, 'seaserv')
+memoized_seafserv_threaded_rpc = MemoizedRPCProxy(
+    seaserv.seafserv_threaded_rpc, SEAFSERV_THREADED_RPC_READ_CALLS,
+    'seafserv_threaded_rpc')
+memoized_ccnet_threaded_rpc = MemoizedRPCProxy(
+    seaserv.ccnet_threaded_rpc, CCNET_THREADED_RPC_READ_CALLS,
+    'ccnet_threaded_rpc')
@@ -0,0 +1,251 @@
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Line based text diff, rendered as the side by side rows of
+``seahub.utils.htmldiff.HtmlDiff.make_table``.
+
+``HtmlDiff`` goes through ``ndiff``, whose ``SequenceMatcher`` and intra line
+matching are quadratic in the size of changed regions. Here lines are interned
+to integers and diffed with patience diff: lines occurring once on both sides
+are used as anchors (their longest increasing subsequence), and the regions
+between anchors are diffed the same way. A region without such lines is
+matched by ``SequenceMatcher`` only if it is small, otherwise it is reported
+as replaced as a whole.
+
+Changed lines are highlighted as a whole, like ``HtmlDiff`` does, without
+character level markers.
+"""
+import bisect
+from difflib import SequenceMatcher
+
+# regions without unique lines are matched line by line only if
+# len(a) * len(b) is below this
+MAX_MATCH_REGION = 250000
+
+# same as the cutoff ``ndiff`` uses to pair similar lines
+SIMILAR_CUTOFF = 0.75
+
+TAB_SIZE = 8
+
+def _longest_increasing(pairs):
+    """Return the longest subsequence of `pairs`, sorted by their first item,
+    whose second items are increasing as well.
+    """
+    tails, tail_idx = [], []
+    prev = [None] * len(pairs)
+    for k, (i, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos > 0:
+            prev[k] = tail_idx[pos - 1]
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+
+    ret = []
+    k = tail_idx[-1] if tail_idx else None
+    while k is not None:
+        ret.append(pairs[k])
+        k = prev[k]
+    ret.reverse()
+    return ret
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi):
+    # value -> [count in a, index in a, count in b, index in b]
+    index = {}
+    for i in xrange(alo, ahi):
+        entry = index.get(a[i])
+        if entry is None:
+            index[a[i]] = [1, i, 0, 0]
+        else:
+            entry[0] += 1
+    for j in xrange(blo, bhi):
+        entry = index.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+
+    pairs = sorted((e[1], e[3]) for e in index.itervalues()
+                   if e[0] == 1 and e[2] == 1)
+    return _longest_increasing(pairs)
+
+def get_matching_blocks(a, b):
+    """Return sorted ``(i, j, n)`` triples, meaning ``a[i:i+n] == b[j:j+n]``.
+    """
+    blocks = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        n = 0
+        while alo + n < ahi and blo + n < bhi and a[alo + n] == b[blo + n]:
+            n += 1
+        if n:
+            blocks.append((alo, blo, n))
+            alo += n
+            blo += n
+
+        n = 0
+        while alo < ahi - n and blo < bhi - n and \
+              a[ahi - 1 - n] == b[bhi - 1 - n]:
+            n += 1
+        if n:
+            blocks.append((ahi - n, bhi - n, n))
+            ahi -= n
+            bhi -= n
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            i0, j0 = alo, blo
+            for i, j in anchors:
+                stack.append((i0, i, j0, j))
+                blocks.append((i, j, 1))
+                i0, j0 = i + 1, j + 1
+            stack.append((i0, ahi, j0, bhi))
+        elif (ahi - alo) * (bhi - blo) <= MAX_MATCH_REGION:
+            sm = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+            for i, j, n in sm.get_matching_blocks():
+                if n:
+                    blocks.append((alo + i, blo + j, n))
+
+    blocks.sort()
+    return blocks
+
+def get_opcodes(a, b):
+    """Return opcodes turning line list `a` into `b`, in the format of
+    ``difflib.SequenceMatcher.get_opcodes``.
+    """
+    # intern lines, so that lines are compared and hashed as small ints
+    ids = {}
+    a = [ids.setdefault(x, len(ids)) for x in a]
+    b = [ids.setdefault(x, len(ids)) for x in b]
+
+    opcodes = []
+    i = j = 0
+    for ai, bj, n in get_matching_blocks(a, b) + [(len(a), len(b), 0)]:
+        if i < ai and j < bj:
+            opcodes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(('delete', i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(('insert', i, ai, j, bj))
+
+        if n:
+            if opcodes and opcodes[-1][0] == 'equal':
+                tag, i1, i2, j1, j2 = opcodes.pop()
+                opcodes.append(('equal', i1, ai + n, j1, bj + n))
+            else:
+                opcodes.append(('equal', ai, ai + n, bj, bj + n))
+        i, j = ai + n, bj + n
+
+    return opcodes
+
+def _changed_line_classes(fromline, toline):
+    """Return css classes of a pair of changed lines.
+
+    Like ``ndiff``, lines sharing less than 75% of their text are shown as
+    deleted and added; only common prefix and suffix are counted, which is
+    cheap and good enough for typical edits.
+    """
+    n = min(len(fromline), len(toline))
+    prefix = 0
+    while prefix < n and fromline[prefix] == toline[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and \
+          fromline[-1 - suffix] == toline[-1 - suffix]:
+        suffix += 1
+
+    total = len(fromline) + len(toline)
+    if 2.0 * (prefix + suffix) / total <= SIMILAR_CUTOFF:
+        return 'diff-sub', 'diff-add'
+
+    from_changed = len(fromline) - prefix - suffix > 0
+    to_changed = len(toline) - prefix - suffix > 0
+    if from_changed and to_changed:
+        return 'diff-chg', 'diff-chg'
+    if to_changed:
+        return '', 'diff-add'
+    return 'diff-sub', ''
+
+def _iter_rows(fromlines, tolines):
+    """Yield ``(from_index, to_index, from_class, to_class, changed)`` for
+    each row of the side by side diff, index is ``None`` on the blank side.
+    """
+    for tag, i1, i2, j1, j2 in get_opcodes(fromlines, tolines):
+        if tag == 'equal':
+            for k in xrange(i2 - i1):
+                yield i1 + k, j1 + k, '', '', False
+            continue
+
+        paired = min(i2 - i1, j2 - j1)
+        for k in xrange(paired):
+            from_cls, to_cls = _changed_line_classes(fromlines[i1 + k],
+                                                     tolines[j1 + k])
+            yield i1 + k, j1 + k, from_cls, to_cls, True
+        for i in xrange(i1 + paired, i2):
+            yield i, None, 'diff-sub', '', True
+        for j in xrange(j1 + paired, j2):
+            yield None, j, '', 'diff-add', True
+
+def _expand_tabs(line):
+    """Expand tabs as ``HtmlDiff`` does: tab stops are filled with tab
+    characters, which are turned into markup after differencing.
+    """
+    line = line.replace(' ', '\0').expandtabs(TAB_SIZE).replace(' ', '\t')
+    return line.replace('\0', ' ').rstrip('\n')
+
+def _format_line(lines, index, cls):
+    if index is None:
+        return '<td class="diff-header"></td><td></td>'
+
+    # make spaces non-breakable, tabs at the end of line are dropped
+    text = lines[index]
+    text = text.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+    text = text.replace(' ', '&nbsp;').rstrip().replace('\t', '&nbsp;')
+    if cls:
+        return '<td class="diff-header">%d</td><td class=%s>%s</td>' % (
+            index + 1, cls, text)
+    return '<td class="diff-header">%d</td><td>%s</td>' % (index + 1, text)
+
+def make_table(fromlines, tolines, context=False, numlines=5):
+    """Return HTML rows of side by side comparison of `fromlines` and
+    `tolines`, a drop-in replacement of ``HtmlDiff().make_table``.
+
+    If `context` is set, only changed lines and `numlines` lines around them
+    are shown, hunks are separated by ``tbody`` breaks.
+    """
+    fromlines = [_expand_tabs(line) for line in fromlines]
+    tolines = [_expand_tabs(line) for line in tolines]
+    rows = list(_iter_rows(fromlines, tolines))
+
+    if context:
+        keep = [False] * len(rows)
+        for k, row in enumerate(rows):
+            if row[4]:
+                for n in xrange(max(0, k - numlines),
+                                min(len(rows), k + numlines + 1)):
+                    keep[n] = True
+    else:
+        keep = [True] * len(rows)
+
+    s = []
+    fmt = '            <tr>%s%s</tr>\n'
+    in_hunk = False
+    for k, row in enumerate(rows):
+        if not keep[k]:
+            in_hunk = False
+            continue
+        if not in_hunk and s:
+            s.append('        </tbody>        \n        <tbody>\n')
+        in_hunk = True
+
+        from_index, to_index, from_cls, to_cls, changed = row
+        s.append(fmt % (_format_line(fromlines, from_index, from_cls),
+                        _format_line(tolines, to_index, to_cls)))
+
+    return ''.join(s)
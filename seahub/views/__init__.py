@@ -21,10 +21,8 @@ from django.utils.translation import ugettext as _
 from django.views.decorators.http import condition
 
 import seaserv
-from seaserv import get_repo, get_commits, \
-    seafserv_threaded_rpc, seafserv_rpc, is_repo_owner, \
-    get_file_size, MAX_DOWNLOAD_DIR_SIZE, \
-    seafile_api
+from seaserv import get_commits, seafserv_rpc, is_repo_owner, \
+    get_file_size, MAX_DOWNLOAD_DIR_SIZE
 from pysearpc import SearpcError
 
 from seahub.avatar.util import get_avatar_file_storage
@@ -33,7 +31,7 @@ from seahub.auth import login as auth_login
 from seahub.auth import get_backends
 from seahub.base.accounts import User
 from seahub.base.decorators import user_mods_check, require_POST
-from seahub.base.models import ClientLoginToken
+from seahub.base.models import ClientLoginToken, index_repo_name
 from seahub.options.models import UserOptions, CryptoOptionNotSetError
 from seahub.profile.models import Profile
 from seahub.share.models import FileShare, UploadLinkShare
@@ -45,6 +43,8 @@ from seahub.utils import render_permission_error, render_error, \
     is_pro_version, FILE_AUDIT_ENABLED, is_valid_dirent_name, \
     is_org_repo_creation_allowed, is_windows_operating_system
 from seahub.utils.star import get_dir_starred_files
+from seahub.utils.rpc import memoized_seafile_api as seafile_api, \
+    memoized_seaserv, memoized_seafserv_threaded_rpc as seafserv_threaded_rpc
 from seahub.utils.timeutils import utc_to_local
 from seahub.views.modules import MOD_PERSONAL_WIKI, enable_mod_for_user, \
     disable_mod_for_user
@@ -56,6 +56,8 @@ LIBRARY_TEMPLATES = getattr(settings, 'LIBRARY_TEMPLATES', {})
 
 from constance import config
 
+get_repo = memoized_seaserv.get_repo
+
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
@@ -682,6 +684,7 @@ def create_default_library(request):
                                                desc=_("My Library"),
                                                username=username,
                                                passwd=None)
+    index_repo_name(default_repo, _("My Library"))
     sys_repo_id = get_system_default_repo_id()
     if sys_repo_id is None:
         return
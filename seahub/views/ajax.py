@@ -21,11 +21,12 @@ from django.template.defaultfilters import filesizeformat
 
 import seaserv
 from seaserv import seafile_api, is_passwd_set, ccnet_api, \
-    seafserv_threaded_rpc, ccnet_threaded_rpc
+    ccnet_threaded_rpc
 from pysearpc import SearpcError
 
 from seahub.auth.decorators import login_required_ajax
 from seahub.base.decorators import require_POST
+from seahub.base.models import index_repo_name
 from seahub.forms import RepoRenameDirentForm
 from seahub.options.models import UserOptions, CryptoOptionNotSetError
 from seahub.notifications.models import UserNotification
@@ -34,18 +35,21 @@ from seahub.share.models import UploadLinkShare
 from seahub.signals import upload_file_successful
 from seahub.views import get_unencry_rw_repos_by_user, \
     get_diff, check_folder_permission
-from seahub.group.utils import is_group_member, is_group_admin_or_owner, \
-    get_group_member_info
+from seahub.group.utils import is_group_admin_or_owner, get_group_member_info
+from seahub.api2.endpoints.background_jobs import get_background_job_info
+from seahub.jobs.handlers import JOB_GROUP_MEMBERS_IMPORT
+from seahub.jobs.models import BackgroundJobResult
+from seahub.jobs.utils import submit_job
 import seahub.settings as settings
 from seahub.settings import ENABLE_THUMBNAIL, THUMBNAIL_ROOT, \
     THUMBNAIL_DEFAULT_SIZE, SHOW_TRAFFIC, MEDIA_URL
 from seahub.utils import check_filename_with_rename, EMPTY_SHA1, \
     gen_block_get_url, TRAFFIC_STATS_ENABLED, get_user_traffic_stat,\
     new_merge_with_no_conflict, get_commit_before_new_merge, \
-    get_repo_last_modify, gen_file_upload_url, is_org_context, \
-    get_file_type_and_ext, is_pro_version
+    gen_file_upload_url, is_org_context, \
+    is_pro_version, file_type_classifier
 from seahub.utils.star import get_dir_starred_files
-from seahub.base.accounts import User
+from seahub.utils.repo import GroupReposResolver, list_dir_sorted
 from seahub.thumbnail.utils import get_thumbnail_src
 from seahub.utils.file_types import IMAGE, VIDEO
 from seahub.base.templatetags.seahub_tags import translate_seahub_time, \
@@ -233,9 +237,6 @@ def list_lib_dir(request, repo_id):
         return HttpResponse(json.dumps({'error': err_msg}),
                             status=500, content_type=content_type)
 
-    dir_list = []
-    file_list = []
-
     try:
         dir_id = seafile_api.get_dir_id_by_path(repo.id, path)
     except SearpcError as e:
@@ -249,31 +250,9 @@ def list_lib_dir(request, repo_id):
         return HttpResponse(json.dumps({'error': err_msg}),
                             status=404, content_type=content_type)
 
-    dirs = seafserv_threaded_rpc.list_dir_with_perm(repo_id, path, dir_id,
-            username, -1, -1)
+    dir_list, file_list = list_dir_sorted(repo, path, dir_id, username)
     starred_files = get_dir_starred_files(username, repo_id, path)
 
-    for dirent in dirs:
-        dirent.last_modified = dirent.mtime
-        if stat.S_ISDIR(dirent.mode):
-            dpath = posixpath.join(path, dirent.obj_name)
-            if dpath[-1] != '/':
-                dpath += '/'
-            dir_list.append(dirent)
-        else:
-            if repo.version == 0:
-                file_size = seafile_api.get_file_size(repo.store_id, repo.version, dirent.obj_id)
-            else:
-                file_size = dirent.size
-            dirent.file_size = file_size if file_size else 0
-
-            dirent.starred = False
-            fpath = posixpath.join(path, dirent.obj_name)
-            if fpath in starred_files:
-                dirent.starred = True
-
-            file_list.append(dirent)
-
     if is_org_context(request):
         repo_owner = seafile_api.get_org_repo_owner(repo.id)
     else:
@@ -321,26 +300,27 @@ def list_lib_dir(request, repo_id):
         d_ = {}
         d_['is_dir'] = True
         d_['obj_name'] = d.obj_name
-        d_['last_modified'] = d.last_modified
-        d_['last_update'] = translate_seahub_time(d.last_modified)
+        d_['last_modified'] = d.mtime
+        d_['last_update'] = translate_seahub_time(d.mtime)
         d_['p_dpath'] = posixpath.join(path, d.obj_name)
         d_['perm'] = d.permission # perm for sub dir in current dir
         dirent_list.append(d_)
 
     size = int(request.GET.get('thumbnail_size', THUMBNAIL_DEFAULT_SIZE))
 
-    for f in file_list:
+    file_types = file_type_classifier.classify_many(
+        [f.obj_name for f in file_list])
+    for f, (file_type, file_ext) in zip(file_list, file_types):
         f_ = {}
         f_['is_file'] = True
         f_['obj_name'] = f.obj_name
-        f_['last_modified'] = f.last_modified
-        f_['last_update'] = translate_seahub_time(f.last_modified)
-        f_['starred'] = f.starred
-        f_['file_size'] = filesizeformat(f.file_size)
+        f_['last_modified'] = f.mtime
+        f_['last_update'] = translate_seahub_time(f.mtime)
+        f_['starred'] = posixpath.join(path, f.obj_name) in starred_files
+        f_['file_size'] = filesizeformat(f.size)
         f_['obj_id'] = f.obj_id
         f_['perm'] = f.permission # perm for file in current dir
 
-        file_type, file_ext = get_file_type_and_ext(f.obj_name)
         if file_type == IMAGE:
             f_['is_img'] = True
         if file_type == VIDEO:
@@ -984,49 +964,7 @@ def get_groups_by_user(request):
 def get_group_repos(request, groups):
     """Get repos shared to groups.
     """
-    group_repos = []
-    if is_org_context(request):
-        org_id = request.user.org.org_id
-        # For each group I joined...
-        for grp in groups:
-            # Get group repos, and for each group repos...
-            for r_id in seafile_api.get_org_group_repoids(org_id, grp.id):
-                repo_owner = seafile_api.get_org_repo_owner(r_id)
-                # Convert repo properties due to the different collumns in Repo
-                # and SharedRepo
-                r = get_repo(r_id)
-                if not r:
-                    continue
-                r.repo_id = r.id
-                r.repo_name = r.name
-                r.repo_desc = r.desc
-                r.last_modified = get_repo_last_modify(r)
-                r.share_type = 'group'
-                r.user = repo_owner
-                r.user_perm = check_folder_permission(request, r_id, '/')
-                r.group = grp
-                group_repos.append(r)
-    else:
-        # For each group I joined...
-        for grp in groups:
-            # Get group repos, and for each group repos...
-            for r_id in seafile_api.get_group_repoids(grp.id):
-                repo_owner = seafile_api.get_repo_owner(r_id)
-                # Convert repo properties due to the different collumns in Repo
-                # and SharedRepo
-                r = get_repo(r_id)
-                if not r:
-                    continue
-                r.repo_id = r.id
-                r.repo_name = r.name
-                r.repo_desc = r.desc
-                r.last_modified = get_repo_last_modify(r)
-                r.share_type = 'group'
-                r.user = repo_owner
-                r.user_perm = check_folder_permission(request, r_id, '/')
-                r.group = grp
-                group_repos.append(r)
-    return group_repos
+    return GroupReposResolver.for_request(request).resolve(groups)
 
 def get_file_upload_url_ul(request, token):
     """Get file upload url in dir upload link.
@@ -1158,6 +1096,8 @@ def _create_repo_common(request, repo_name, repo_desc, encryption,
     except SearpcError as e:
         logger.error(e)
         repo_id = None
+    else:
+        index_repo_name(repo_id, repo_name)
 
     return repo_id
 
@@ -1216,65 +1156,29 @@ def ajax_group_members_import(request, group_id):
                         content_type=content_type)
 
     # prepare email list from uploaded file
-    emails_list = []
+    items = []
     for row in reader:
         if not row:
             continue
 
         email = row[0].strip().lower()
-        emails_list.append(email)
+        items.append({'email': email})
 
     org_id = None
     if is_org_context(request):
         org_id = request.user.org.org_id
 
-    result = {}
-    result['failed'] = []
-    result['success'] = []
-    emails_need_add = []
-
-    # check email validation
-    for email in emails_list:
-        try:
-            User.objects.get(email=email)
-        except User.DoesNotExist:
-            result['failed'].append({
-                'email': email,
-                'error_msg': 'User %s not found.' % email
-                })
-            continue
+    job = submit_job(username, JOB_GROUP_MEMBERS_IMPORT, items,
+                     {'group_id': group_id, 'org_id': org_id})
 
-        if is_group_member(group_id, email):
-            result['failed'].append({
-                'email': email,
-                'error_msg': _(u'User %s is already a group member.') % email
-                })
-            continue
+    # job is left to the background worker, clients poll its status
+    if not job.is_finished():
+        return HttpResponse(json.dumps(get_background_job_info(job)),
+                            status=202, content_type=content_type)
 
-        # Can only invite organization users to group
-        if org_id and not \
-            seaserv.ccnet_threaded_rpc.org_user_exists(org_id, email):
-            result['failed'].append({
-                'email': email,
-                'error_msg': _(u'User %s not found in organization.') % email
-                })
-            continue
-
-        emails_need_add.append(email)
-
-    # Add email to group.
-    for email in emails_need_add:
-        try:
-            seaserv.ccnet_threaded_rpc.group_add_member(group_id,
-                username, email)
-            member_info = get_group_member_info(request, group_id, email)
-            result['success'].append(member_info)
-        except SearpcError as e:
-            logger.error(e)
-            result['failed'].append({
-                'email': email,
-                'error_msg': 'Internal Server Error'
-                })
+    result = BackgroundJobResult.objects.get_results(job)
+    result['success'] = [get_group_member_info(request, group_id, x['email'])
+                         for x in result['success']]
 
     return HttpResponse(json.dumps(result), content_type=content_type)
 
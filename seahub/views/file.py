@@ -18,13 +18,13 @@ import mimetypes
 import urlparse
 import datetime
 import hashlib
+import codecs
 
 from django.core import signing
 from django.core.cache import cache
 from django.contrib.sites.models import RequestSite
 from django.contrib import messages
 from django.core.urlresolvers import reverse
-from django.db.models import F
 from django.http import HttpResponse, Http404, HttpResponseRedirect, HttpResponseBadRequest, HttpResponseForbidden
 from django.shortcuts import render_to_response
 from django.template import RequestContext
@@ -48,20 +48,23 @@ from seahub.auth.decorators import login_required
 from seahub.base.decorators import repo_passwd_set_required
 from seahub.share.models import FileShare, check_share_link_common
 from seahub.share.decorators import share_link_audit
+from seahub.share.utils import incr_view_cnt
 from seahub.wiki.utils import get_wiki_dirent
 from seahub.wiki.models import WikiDoesNotExist, WikiPageMissing
 from seahub.utils import render_error, is_org_context, \
     get_file_type_and_ext, gen_file_get_url, gen_file_share_link, \
     render_permission_error, is_pro_version, is_textual_file, \
-    mkstemp, EMPTY_SHA1, HtmlDiff, gen_inner_file_get_url, \
-    user_traffic_over_limit, get_file_audit_events_by_path, \
+    mkstemp, EMPTY_SHA1, gen_inner_file_get_url, \
+    user_traffic_over_limit, add_user_traffic, get_file_audit_events_by_path, \
     generate_file_audit_event_type, FILE_AUDIT_ENABLED, gen_token, \
-    get_site_scheme_and_netloc,get_conf_text_ext
+    get_site_scheme_and_netloc,get_conf_text_ext, file_type_classifier, \
+    normalize_cache_key
 from seahub.utils.ip import get_remote_ip
 from seahub.utils.timeutils import utc_to_local
 from seahub.utils.file_types import (IMAGE, PDF, DOCUMENT, SPREADSHEET, AUDIO,
                                      MARKDOWN, TEXT, VIDEO)
 from seahub.utils.star import is_file_starred
+from seahub.utils.textdiff import make_table
 from seahub.utils import HAS_OFFICE_CONVERTER, FILEEXT_TYPE_MAP
 from seahub.utils.http import json_response, int_param, BadRequestException, RequestForbbiddenException
 from seahub.views import check_folder_permission, check_file_lock, \
@@ -75,7 +78,10 @@ if HAS_OFFICE_CONVERTER:
 
 import seahub.settings as settings
 from seahub.settings import FILE_ENCODING_LIST, FILE_PREVIEW_MAX_SIZE, \
-    FILE_ENCODING_TRY_LIST, USE_PDFJS, MEDIA_URL
+    FILE_ENCODING_TRY_LIST, USE_PDFJS, MEDIA_URL, TEXT_DIFF_MAX_SIZE, \
+    TEXT_DIFF_MAX_LINES, TEXT_DIFF_CACHE_TIMEOUT, FILE_READ_CHUNK_SIZE, \
+    FILE_ENCODING_DETECT_SAMPLE_SIZE, TEXT_PREVIEW_CACHE_MAX_SIZE, \
+    TEXT_PREVIEW_CACHE_TIMEOUT
 
 try:
     from seahub.settings import ENABLE_OFFICE_WEB_APP
@@ -131,25 +137,76 @@ def gen_path_link(path, repo_name):
 
     return zipped
 
-def get_file_content(file_type, raw_path, file_enc):
+def get_file_content(file_type, raw_path, file_enc, obj_id=None):
     """Get textual file content, including txt/markdown/seaf.
     """
-    return repo_file_get(raw_path, file_enc) if is_textual_file(
+    return repo_file_get(raw_path, file_enc, obj_id) if is_textual_file(
         file_type=file_type) else ('', '', '')
 
-def repo_file_get(raw_path, file_enc):
+def text_preview_cache_id(repo, obj_id):
+    """Return the id textual content of a file is cached by, decoded content
+    of files in encrypted libraries is never cached.
+    """
+    return None if repo.encrypted else obj_id
+
+def _read_file_content(raw_path):
+    file_response = urllib2.urlopen(raw_path)
+    chunks = []
+    while True:
+        chunk = file_response.read(FILE_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return ''.join(chunks)
+
+def _detect_encoding(content):
+    """Return (encoding, decoded content) of `content`, or (None, None).
+
+    Encodings in FILE_ENCODING_TRY_LIST are first checked on a prefix
+    sample, so that content is fully decoded only with a likely encoding.
+    chardet is run on the sample as well.
+    """
+    sample = content[:FILE_ENCODING_DETECT_SAMPLE_SIZE]
+    for enc in FILE_ENCODING_TRY_LIST:
+        try:
+            # sample may end in the middle of a multibyte character
+            codecs.getincrementaldecoder(enc)().decode(sample)
+            return enc, content.decode(enc)
+        except UnicodeDecodeError:
+            continue
+
+    encoding = chardet.detect(sample)['encoding']
+    if encoding:
+        try:
+            return encoding, content.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return None, None
+
+def repo_file_get(raw_path, file_enc, obj_id=None):
     """
     Get file content and encoding.
+
+    If `obj_id` is given, detected encoding and decoded content (up to
+    TEXT_PREVIEW_CACHE_MAX_SIZE) are cached by it.
     """
     err = ''
-    file_content = ''
     encoding = None
     if file_enc != 'auto':
         encoding = file_enc
 
+    if obj_id:
+        enc_key = normalize_cache_key(obj_id, 'file_encoding_')
+        if not encoding:
+            encoding = cache.get(enc_key)
+        if encoding:
+            u_content = cache.get(normalize_cache_key(
+                '%s_%s' % (obj_id, encoding), 'text_preview_'))
+            if u_content is not None:
+                return err, u_content, encoding
+
     try:
-        file_response = urllib2.urlopen(raw_path)
-        content = file_response.read()
+        content = _read_file_content(raw_path)
     except urllib2.HTTPError, e:
         logger.error(e)
         err = _(u'HTTPError: failed to open file online')
@@ -158,37 +215,29 @@ def repo_file_get(raw_path, file_enc):
         logger.error(e)
         err = _(u'URLError: failed to open file online')
         return err, '', None
+
+    if encoding:
+        try:
+            u_content = content.decode(encoding)
+        except UnicodeDecodeError:
+            err = _(u'The encoding you chose is not proper.')
+            return err, '', encoding
     else:
-        if encoding:
-            try:
-                u_content = content.decode(encoding)
-            except UnicodeDecodeError:
-                err = _(u'The encoding you chose is not proper.')
-                return err, '', encoding
-        else:
-            for enc in FILE_ENCODING_TRY_LIST:
-                try:
-                    u_content = content.decode(enc)
-                    encoding = enc
-                    break
-                except UnicodeDecodeError:
-                    if enc != FILE_ENCODING_TRY_LIST[-1]:
-                        continue
-                    else:
-                        encoding = chardet.detect(content)['encoding']
-                        if encoding:
-                            try:
-                                u_content = content.decode(encoding)
-                            except UnicodeDecodeError:
-                                err = _(u'Unknown file encoding')
-                                return err, '', ''
-                        else:
-                            err = _(u'Unknown file encoding')
-                            return err, '', ''
-
-        file_content = u_content
-
-    return err, file_content, encoding
+        encoding, u_content = _detect_encoding(content)
+        if not encoding:
+            err = _(u'Unknown file encoding')
+            return err, '', ''
+
+    if obj_id:
+        # file objects are immutable, so are their encoding and content
+        if file_enc == 'auto':
+            cache.set(enc_key, encoding, TEXT_PREVIEW_CACHE_TIMEOUT)
+        if len(content) <= TEXT_PREVIEW_CACHE_MAX_SIZE:
+            cache.set(normalize_cache_key('%s_%s' % (obj_id, encoding),
+                                          'text_preview_'),
+                      u_content, TEXT_PREVIEW_CACHE_TIMEOUT)
+
+    return err, u_content, encoding
 
 
 def get_file_view_path_and_perm(request, repo_id, obj_id, path, use_onetime=True):
@@ -211,13 +260,13 @@ def get_file_view_path_and_perm(request, repo_id, obj_id, path, use_onetime=True
         inner_url = gen_inner_file_get_url(token, filename)
         return (outer_url, inner_url, user_perm)
 
-def handle_textual_file(request, filetype, raw_path, ret_dict):
+def handle_textual_file(request, filetype, raw_path, ret_dict, obj_id=None):
     # encoding option a user chose
     file_enc = request.GET.get('file_enc', 'auto')
     if not file_enc in FILE_ENCODING_LIST:
         file_enc = 'auto'
     err, file_content, encoding = get_file_content(filetype,
-                                                   raw_path, file_enc)
+                                                   raw_path, file_enc, obj_id)
     file_encoding_list = FILE_ENCODING_LIST
     if encoding and encoding not in FILE_ENCODING_LIST:
         file_encoding_list.append(encoding)
@@ -511,7 +560,8 @@ def _file_view(request, repo_id, path):
 
         """Choose different approach when dealing with different type of file."""
         if is_textual_file(file_type=filetype):
-            handle_textual_file(request, filetype, inner_path, ret_dict)
+            handle_textual_file(request, filetype, inner_path, ret_dict,
+                                text_preview_cache_id(repo, obj_id))
             if filetype == MARKDOWN:
                 c = ret_dict['file_content']
                 ret_dict['file_content'] = convert_md_link(c, repo_id, username)
@@ -528,12 +578,10 @@ def _file_view(request, repo_id, path):
             if not dirs:
                 raise Http404
 
-            img_list = []
-            for dirent in dirs:
-                if not stat.S_ISDIR(dirent.props.mode):
-                    fltype, flext = get_file_type_and_ext(dirent.obj_name)
-                    if fltype == 'Image':
-                        img_list.append(dirent.obj_name)
+            names = [d.obj_name for d in dirs if not stat.S_ISDIR(d.props.mode)]
+            img_list = [name for name, (fltype, flext) in
+                        zip(names, file_type_classifier.classify_many(names))
+                        if fltype == IMAGE]
 
             if len(img_list) > 1:
                 img_list.sort(lambda x, y : cmp(x.lower(), y.lower()))
@@ -675,7 +723,8 @@ def view_history_file_common(request, repo_id, ret_dict):
             send_file_access_msg_when_preview(request, repo, path, 'web')
             """Choose different approach when dealing with different type of file."""
             if is_textual_file(file_type=filetype):
-                handle_textual_file(request, filetype, inner_path, ret_dict)
+                handle_textual_file(request, filetype, inner_path, ret_dict,
+                                    text_preview_cache_id(repo, obj_id))
             elif filetype == DOCUMENT:
                 handle_document(inner_path, obj_id, fileext, ret_dict)
             elif filetype == SPREADSHEET:
@@ -787,6 +836,7 @@ def _download_file_from_share_link(request, fileshare):
                                               obj_id)
         send_message('seahub.stats', 'file-download\t%s\t%s\t%s\t%s' %
                      (repo.id, shared_by, obj_id, file_size))
+        add_user_traffic(shared_by, file_size)
     except Exception as e:
         logger.error('Error when sending file-download message: %s' % str(e))
 
@@ -825,8 +875,7 @@ def view_shared_file(request, fileshare):
     filetype, fileext = get_file_type_and_ext(filename)
 
     # Increase file shared link view_cnt, this operation should be atomic
-    fileshare.view_cnt = F('view_cnt') + 1
-    fileshare.save()
+    incr_view_cnt(fileshare)
 
     # send statistic messages
     file_size = seafile_api.get_file_size(repo.store_id, repo.version, obj_id)
@@ -848,6 +897,7 @@ def view_shared_file(request, fileshare):
         send_file_access_msg(request, repo, path, 'share-link')
         send_message('seahub.stats', 'file-download\t%s\t%s\t%s\t%s' %
                      (repo_id, shared_by, obj_id, file_size))
+        add_user_traffic(shared_by, file_size)
 
         # view raw shared file, directly show/download file depends on
         # browsers
@@ -864,7 +914,8 @@ def view_shared_file(request, fileshare):
         """Choose different approach when dealing with different type of file."""
         inner_path = gen_inner_file_get_url(access_token, filename)
         if is_textual_file(file_type=filetype):
-            handle_textual_file(request, filetype, inner_path, ret_dict)
+            handle_textual_file(request, filetype, inner_path, ret_dict,
+                                text_preview_cache_id(repo, obj_id))
         elif filetype == DOCUMENT:
             handle_document(inner_path, obj_id, fileext, ret_dict)
         elif filetype == SPREADSHEET:
@@ -1028,7 +1079,8 @@ def view_file_via_shared_dir(request, fileshare):
 
         """Choose different approach when dealing with different type of file."""
         if is_textual_file(file_type=filetype):
-            handle_textual_file(request, filetype, inner_path, ret_dict)
+            handle_textual_file(request, filetype, inner_path, ret_dict,
+                                text_preview_cache_id(repo, obj_id))
         elif filetype == DOCUMENT:
             handle_document(inner_path, obj_id, fileext, ret_dict)
         elif filetype == SPREADSHEET:
@@ -1044,12 +1096,10 @@ def view_file_via_shared_dir(request, fileshare):
             if not dirs:
                 raise Http404
 
-            img_list = []
-            for dirent in dirs:
-                if not stat.S_ISDIR(dirent.props.mode):
-                    fltype, flext = get_file_type_and_ext(dirent.obj_name)
-                    if fltype == 'Image':
-                        img_list.append(dirent.obj_name)
+            names = [d.obj_name for d in dirs if not stat.S_ISDIR(d.props.mode)]
+            img_list = [name for name, (fltype, flext) in
+                        zip(names, file_type_classifier.classify_many(names))
+                        if fltype == IMAGE]
 
             if len(img_list) > 1:
                 img_list.sort(lambda x, y : cmp(x.lower(), y.lower()))
@@ -1229,7 +1279,8 @@ def file_edit(request, repo_id):
             file_enc = request.GET.get('file_enc', 'auto')
             if not file_enc in FILE_ENCODING_LIST:
                 file_enc = 'auto'
-            err, file_content, encoding = repo_file_get(inner_path, file_enc)
+            err, file_content, encoding = repo_file_get(
+                inner_path, file_enc, text_preview_cache_id(repo, obj_id))
             if encoding and encoding not in FILE_ENCODING_LIST:
                 file_encoding_list.append(encoding)
     else:
@@ -1362,6 +1413,9 @@ def get_file_content_by_commit_and_path(request, repo_id, commit_id, path, file_
     except:
         return None, 'bad path'
 
+    return get_file_content_by_obj_id(request, repo_id, obj_id, path, file_enc)
+
+def get_file_content_by_obj_id(request, repo_id, obj_id, path, file_enc):
     if not obj_id or obj_id == EMPTY_SHA1:
         return '', None
     else:
@@ -1383,6 +1437,16 @@ def get_file_content_by_commit_and_path(request, repo_id, commit_id, path, file_
             return None, 'error when read file from fileserver: %s' % e
         return file_content, err
 
+def text_diff_too_large(repo, obj_ids):
+    """Check whether revisions of a file are too large to be compared.
+    """
+    size = 0
+    for obj_id in obj_ids:
+        if obj_id and obj_id != EMPTY_SHA1:
+            size += seafile_api.get_file_size(repo.store_id, repo.version,
+                                              obj_id)
+    return size > TEXT_DIFF_MAX_SIZE
+
 @login_required
 def text_diff(request, repo_id):
     commit_id = request.GET.get('commit', '')
@@ -1409,24 +1473,52 @@ def text_diff(request, repo_id):
 
     path = path.encode('utf-8')
 
-    current_content, err = get_file_content_by_commit_and_path(request, \
-                                    repo_id, current_commit.id, path, file_enc)
-    if err:
-        return render_error(request, err)
-
-    prev_content, err = get_file_content_by_commit_and_path(request, \
-                                    repo_id, prev_commit.id, path, file_enc)
-    if err:
-        return render_error(request, err)
+    try:
+        current_id = seafserv_threaded_rpc.get_file_id_by_commit_and_path(
+            repo_id, current_commit.id, path)
+        prev_id = seafserv_threaded_rpc.get_file_id_by_commit_and_path(
+            repo_id, prev_commit.id, path)
+    except:
+        return render_error(request, 'bad path')
 
     is_new_file = False
+    diff_too_large = False
     diff_result_table = ''
-    if prev_content == '' and current_content == '':
+    if current_id in (None, '', EMPTY_SHA1) and \
+       prev_id in (None, '', EMPTY_SHA1):
         is_new_file = True
     else:
-        diff = HtmlDiff()
-        diff_result_table = diff.make_table(prev_content.splitlines(),
-                                        current_content.splitlines(), True)
+        if not check_folder_permission(request, repo_id, '/'):
+            return render_error(request, 'permission denied')
+
+        # both revisions are immutable, so is the diff of them
+        cache_key = normalize_cache_key(
+            '%s_%s_%s' % (prev_id, current_id, file_enc), 'text_diff_')
+        diff_result_table = cache.get(cache_key)
+        if diff_result_table is None:
+            diff_result_table = ''
+            if text_diff_too_large(repo, (prev_id, current_id)):
+                diff_too_large = True
+            else:
+                current_content, err = get_file_content_by_obj_id(
+                    request, repo_id, current_id, path, file_enc)
+                if err:
+                    return render_error(request, err)
+
+                prev_content, err = get_file_content_by_obj_id(
+                    request, repo_id, prev_id, path, file_enc)
+                if err:
+                    return render_error(request, err)
+
+                prev_lines = prev_content.splitlines()
+                current_lines = current_content.splitlines()
+                if len(prev_lines) + len(current_lines) > TEXT_DIFF_MAX_LINES:
+                    diff_too_large = True
+                else:
+                    diff_result_table = make_table(prev_lines, current_lines,
+                                                   context=True)
+                    cache.set(cache_key, diff_result_table,
+                              TEXT_DIFF_CACHE_TIMEOUT)
 
     zipped = gen_path_link(path, repo.name)
 
@@ -1441,6 +1533,7 @@ def text_diff(request, repo_id):
         'prev_commit': prev_commit,
         'diff_result_table': diff_result_table,
         'is_new_file': is_new_file,
+        'diff_too_large': diff_too_large,
         'referer': referer,
     }, context_instance=RequestContext(request))
 
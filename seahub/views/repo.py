@@ -5,7 +5,6 @@ import posixpath
 import logging
 
 from django.core.urlresolvers import reverse
-from django.db.models import F
 from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import render_to_response
 from django.template import RequestContext
@@ -18,6 +17,7 @@ from seaserv import seafile_api
 from seahub.auth.decorators import login_required
 from seahub.options.models import UserOptions, CryptoOptionNotSetError
 from seahub.share.decorators import share_link_audit
+from seahub.share.utils import incr_view_cnt
 from seahub.share.models import FileShare, UploadLinkShare, \
     check_share_link_common
 from seahub.views import gen_path_link, get_repo_dirents, \
@@ -25,7 +25,7 @@ from seahub.views import gen_path_link, get_repo_dirents, \
 
 from seahub.utils import gen_file_upload_url, gen_dir_share_link, \
     gen_shared_upload_link, user_traffic_over_limit, render_error, \
-    get_file_type_and_ext
+    file_type_classifier
 from seahub.settings import ENABLE_UPLOAD_FOLDER, \
     ENABLE_RESUMABLE_FILEUPLOAD, ENABLE_THUMBNAIL, \
     THUMBNAIL_ROOT, THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_SIZE_FOR_GRID, \
@@ -213,9 +213,7 @@ def view_shared_dir(request, fileshare):
 
     if req_path == '/':  # When user view the root of shared dir..
         # increase shared link view_cnt,
-        fileshare = FileShare.objects.get(token=token)
-        fileshare.view_cnt = F('view_cnt') + 1
-        fileshare.save()
+        incr_view_cnt(fileshare)
 
     traffic_over_limit = user_traffic_over_limit(fileshare.username)
 
@@ -227,8 +225,9 @@ def view_shared_dir(request, fileshare):
         mode = 'grid'
     thumbnail_size = THUMBNAIL_DEFAULT_SIZE if mode == 'list' else THUMBNAIL_SIZE_FOR_GRID
 
-    for f in file_list:
-        file_type, file_ext = get_file_type_and_ext(f.obj_name)
+    file_types = file_type_classifier.classify_many(
+        [f.obj_name for f in file_list])
+    for f, (file_type, file_ext) in zip(file_list, file_types):
         if file_type == IMAGE:
             f.is_img = True
         if file_type == VIDEO:
@@ -285,8 +284,7 @@ def view_shared_upload_link(request, uploadlink):
     if not repo:
         raise Http404
 
-    uploadlink.view_cnt = F('view_cnt') + 1
-    uploadlink.save()
+    incr_view_cnt(uploadlink)
 
     no_quota = True if seaserv.check_quota(repo_id) < 0 else False
 
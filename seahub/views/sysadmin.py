@@ -9,13 +9,16 @@ import re
 import datetime
 import csv, chardet, StringIO
 import time
+from multiprocessing.dummy import Pool
 from constance import config
 
 from django.db.models import Q
 from django.conf import settings as dj_settings
+from django.core.servers.basehttp import FileWrapper
 from django.core.urlresolvers import reverse
 from django.contrib import messages
-from django.http import HttpResponse, Http404, HttpResponseRedirect, HttpResponseNotAllowed
+from django.http import HttpResponse, Http404, HttpResponseRedirect, \
+    HttpResponseNotAllowed, StreamingHttpResponse
 from django.shortcuts import render_to_response
 from django.template import RequestContext
 from django.utils import timezone
@@ -31,7 +34,7 @@ from seahub.base.accounts import User
 from seahub.base.models import UserLastLogin
 from seahub.base.decorators import sys_staff_required, require_POST
 from seahub.base.sudo_mode import update_sudo_mode_ts
-from seahub.base.templatetags.seahub_tags import tsstr_sec, email2nickname
+from seahub.base.templatetags.seahub_tags import tsstr_sec
 from seahub.auth import authenticate
 from seahub.auth.decorators import login_required, login_required_ajax
 from seahub.constants import GUEST_USER, DEFAULT_USER
@@ -39,18 +42,21 @@ from seahub.institutions.models import (Institution, InstitutionAdmin,
                                         InstitutionQuota)
 from seahub.institutions.utils import get_institution_space_usage
 from seahub.invitations.models import Invitation
+from seahub.jobs.handlers import JOB_BATCH_ADD_USER
+from seahub.jobs.models import BackgroundJobResult
+from seahub.jobs.utils import submit_job
 from seahub.role_permissions.utils import get_available_roles
 from seahub.utils import IS_EMAIL_CONFIGURED, string2list, is_valid_username, \
     is_pro_version, send_html_email, get_user_traffic_list, get_server_id, \
     clear_token, handle_virus_record, get_virus_record_by_id, \
-    get_virus_record, FILE_AUDIT_ENABLED, get_max_upload_file_size
+    get_virus_record, FILE_AUDIT_ENABLED, get_max_upload_file_size, \
+    file_type_classifier
 from seahub.utils.file_size import get_file_size_unit
 from seahub.utils.ldap import get_ldap_info
 from seahub.utils.licenseparse import parse_license, user_number_over_limit
 from seahub.utils.rpc import mute_seafile_api
 from seahub.utils.sysinfo import get_platform_name
-from seahub.utils.mail import send_html_email_with_dj_template
-from seahub.utils.ms_excel import write_xls
+from seahub.utils.ms_excel import save_xls
 from seahub.utils.user_permissions import (get_basic_user_roles,
                                            get_user_role)
 from seahub.views import get_system_default_repo_id
@@ -60,10 +66,11 @@ from seahub.options.models import UserOptions
 from seahub.profile.models import Profile, DetailedProfile
 from seahub.signals import repo_deleted
 from seahub.share.models import FileShare, UploadLinkShare
+from seahub.share.utils import add_pending_view_cnts
 from seahub.admin_log.signals import admin_operation
 from seahub.admin_log.models import USER_DELETE, USER_ADD
 import seahub.settings as settings
-from seahub.settings import INIT_PASSWD, SITE_NAME, SITE_ROOT, \
+from seahub.settings import INIT_PASSWD, SITE_NAME, \
     SEND_EMAIL_ON_ADDING_SYSTEM_MEMBER, SEND_EMAIL_ON_RESETTING_USER_PASSWD, \
     ENABLE_SYS_ADMIN_VIEW_REPO, ENABLE_GUEST_INVITATION
 try:
@@ -81,6 +88,14 @@ from termsandconditions.models import TermsAndConditions
 
 logger = logging.getLogger(__name__)
 
+# page size and number of parallel quota lookups of users/groups export
+USER_EXPORT_PAGE_SIZE = 500
+USER_QUOTA_LOOKUP_WORKERS = 8
+GROUP_EXPORT_PAGE_SIZE = 1000
+
+# max number of failed rows of a CSV user import shown to the admin
+BATCH_ADD_USER_MAX_ERRORS = 10
+
 @login_required
 @sys_staff_required
 def sysadmin(request):
@@ -117,17 +132,6 @@ def can_view_sys_admin_repo(repo):
     else:
         return False
 
-def populate_user_info(user):
-    """Populate contact email and name to user.
-    """
-    user_profile = Profile.objects.get_profile_by_user(user.email)
-    if user_profile:
-        user.contact_email = user_profile.contact_email
-        user.name = user_profile.nickname
-    else:
-        user.contact_email = ''
-        user.name = ''
-
 def _populate_user_quota_usage(user):
     """Populate space/share quota to user.
 
@@ -149,6 +153,80 @@ def _populate_user_quota_usage(user):
         user.space_usage = -1
         user.space_quota = -1
 
+def populate_users_info(users):
+    """Populate contact email and name to `users`, in one query.
+    """
+    profiles = dict((p.user, p) for p in Profile.objects.filter(
+        user__in=[x.email for x in users]))
+    for user in users:
+        user_profile = profiles.get(user.email)
+        if user_profile:
+            user.contact_email = user_profile.contact_email
+            user.name = user_profile.nickname
+        else:
+            user.contact_email = ''
+            user.name = ''
+
+def _populate_users_quota_usage(users):
+    """Populate space/share quota to `users`, looked up in parallel.
+    """
+    if len(users) <= 1:
+        for user in users:
+            _populate_user_quota_usage(user)
+        return
+
+    pool = Pool(min(USER_QUOTA_LOOKUP_WORKERS, len(users)))
+    try:
+        pool.map(_populate_user_quota_usage, users)
+    finally:
+        pool.close()
+
+def populate_users_last_login(users):
+    """Populate last login time to `users`, in one query.
+    """
+    last_logins = dict(UserLastLogin.objects.filter(
+        username__in=[x.email for x in users]).values_list(
+            'username', 'last_login'))
+    for user in users:
+        user.last_login = last_logins.get(user.email)
+
+def populate_users_trial_info(users):
+    """Populate trial account info to `users`, in one query.
+    """
+    trial_users = {}
+    if ENABLE_TRIAL_ACCOUNT:
+        trial_users = dict((x.user_or_org, x) for x in TrialAccount.objects.filter(
+            user_or_org__in=[x.email for x in users]))
+
+    for user in users:
+        trial_user = trial_users.get(user.email)
+        if trial_user:
+            user.trial_info = {'expire_date': trial_user.expire_date}
+        else:
+            user.trial_info = None
+
+def populate_users(users, profile=True, role=False, trial_info=False):
+    """Populate what the user list pages show to `users`: space usage/quota
+    and last login, plus name and contact email if `profile`, role flags if
+    `role` and trial account info if `trial_info`.
+
+    Each kind of info is looked up once for all users, quota/usage RPCs
+    run in parallel.
+    """
+    if profile:
+        populate_users_info(users)
+    _populate_users_quota_usage(users)
+    populate_users_last_login(users)
+
+    if trial_info:
+        populate_users_trial_info(users)
+
+    if role:
+        for user in users:
+            user_role = get_user_role(user)
+            user.is_guest = True if user_role == GUEST_USER else False
+            user.is_default = True if user_role == DEFAULT_USER else False
+
 @login_required
 @sys_staff_required
 def sys_user_admin(request):
@@ -170,14 +248,9 @@ def sys_user_admin(request):
             except User.DoesNotExist:
                 continue
 
-            _populate_user_quota_usage(u)
             users.append(u)
 
-        last_logins = UserLastLogin.objects.filter(username__in=[x.username for x in users])
-        for u in users:
-            for e in last_logins:
-                if e.username == u.username:
-                    u.last_login = e.last_login
+        populate_users(users, profile=False)
 
         return render_to_response('sysadmin/sys_useradmin_paid.html', {
             'users': users,
@@ -200,34 +273,11 @@ def sys_user_admin(request):
         page_next = False
 
     users = users_plus_one[:per_page]
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in users])
-    if ENABLE_TRIAL_ACCOUNT:
-        trial_users = TrialAccount.objects.filter(user_or_org__in=[x.email for x in users])
-    else:
-        trial_users = []
-
+    populate_users(users, role=True, trial_info=True)
     for user in users:
         if user.email == request.user.email:
             user.is_self = True
 
-        populate_user_info(user)
-        _populate_user_quota_usage(user)
-
-        # check user's role
-        user.is_guest = True if get_user_role(user) == GUEST_USER else False
-        user.is_default = True if get_user_role(user) == DEFAULT_USER else False
-
-        # populate user last login time
-        user.last_login = None
-        for last_login in last_logins:
-            if last_login.username == user.email:
-                user.last_login = last_login.last_login
-
-        user.trial_info = None
-        for trial_user in trial_users:
-            if trial_user.user_or_org == user.email:
-                user.trial_info = {'expire_date': trial_user.expire_date}
-
     platform = get_platform_name()
     server_id = get_server_id()
     pro_server = 1 if is_pro_version() else 0
@@ -253,72 +303,38 @@ def sys_user_admin(request):
             'extra_user_roles': extra_user_roles,
         }, context_instance=RequestContext(request))
 
-@login_required
-@sys_staff_required
-def sys_useradmin_export_excel(request):
-    """ Export all users from database to excel
+def iter_export_users(sources, page_size=USER_EXPORT_PAGE_SIZE):
+    """Yield users of `sources` page by page, with name, contact email,
+    space usage/quota and last login populated by batched lookups.
     """
-    next = request.META.get('HTTP_REFERER', None)
-    if not next:
-        next = SITE_ROOT
-
-    try:
-        users = ccnet_api.get_emailusers('DB', -1, -1) + \
-                ccnet_api.get_emailusers('LDAPImport', -1, -1)
-    except Exception as e:
-        logger.error(e)
-        messages.error(request, _(u'Failed to export Excel'))
-        return HttpResponseRedirect(next)
-
-    if is_pro_version():
-        is_pro = True
-    else:
-        is_pro = False
-
-    if is_pro:
-        head = [_("Email"), _("Name"), _("Contact Email"), _("Status"), _("Role"),
-                _("Space Usage") + "(MB)", _("Space Quota") + "(MB)",
-                _("Create At"), _("Last Login"), _("Admin"), _("LDAP(imported)"),]
-    else:
-        head = [_("Email"), _("Name"), _("Contact Email"), _("Status"),
-                _("Space Usage") + "(MB)", _("Space Quota") + "(MB)",
-                _("Create At"), _("Last Login"), _("Admin"), _("LDAP(imported)"),]
-
-    data_list = []
+    for source in sources:
+        start = 0
+        while True:
+            users = ccnet_api.get_emailusers(source, start, page_size)
+            if not users:
+                break
+
+            populate_users(users)
+            for user in users:
+                yield user
+
+            if len(users) < page_size:
+                break
+            start += page_size
+
+def _export_size_MB(size):
+    if size > 0:
+        try:
+            return round(float(size) / get_file_size_unit('MB'), 2)
+        except Exception as e:
+            logger.error(e)
+            return '--'
+    return ''
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in users])
+def iter_export_user_rows(users, is_pro):
     for user in users:
-
-        # populate name and contact email
-        populate_user_info(user)
-
-        # populate space usage and quota
-        MB = get_file_size_unit('MB')
-
-        _populate_user_quota_usage(user)
-        if user.space_usage > 0:
-            try:
-                space_usage_MB = round(float(user.space_usage) / MB, 2)
-            except Exception as e:
-                logger.error(e)
-                space_usage_MB = '--'
-        else:
-            space_usage_MB = ''
-
-        if user.space_quota > 0:
-            try:
-                space_quota_MB = round(float(user.space_quota) / MB, 2)
-            except Exception as e:
-                logger.error(e)
-                space_quota_MB = '--'
-        else:
-            space_quota_MB = ''
-
-        # populate user last login time
-        user.last_login = None
-        for last_login in last_logins:
-            if last_login.username == user.email:
-                user.last_login = last_login.last_login
+        space_usage_MB = _export_size_MB(user.space_usage)
+        space_quota_MB = _export_size_MB(user.space_quota)
 
         if user.is_active:
             status = _('Active')
@@ -346,16 +362,46 @@ def sys_useradmin_export_excel(request):
                     space_usage_MB, space_quota_MB, create_at,
                     last_login, is_admin, ldap_import]
 
-        data_list.append(row)
+        yield row
+
+@login_required
+@sys_staff_required
+def sys_useradmin_export_excel(request):
+    """ Export all users from database to excel
+
+    Users are fetched page by page and written to a write only workbook, so
+    memory usage stays flat however many users there are. The file is only
+    sent once all users are written, so a very large export may still exceed
+    a proxy timeout.
+    """
+    next = request.META.get('HTTP_REFERER', reverse(sys_user_admin))
+
+    if is_pro_version():
+        is_pro = True
+    else:
+        is_pro = False
+
+    if is_pro:
+        head = [_("Email"), _("Name"), _("Contact Email"), _("Status"), _("Role"),
+                _("Space Usage") + "(MB)", _("Space Quota") + "(MB)",
+                _("Create At"), _("Last Login"), _("Admin"), _("LDAP(imported)"),]
+    else:
+        head = [_("Email"), _("Name"), _("Contact Email"), _("Status"),
+                _("Space Usage") + "(MB)", _("Space Quota") + "(MB)",
+                _("Create At"), _("Last Login"), _("Admin"), _("LDAP(imported)"),]
 
-    wb = write_xls('users', head, data_list)
-    if not wb:
+    users = iter_export_users(['DB', 'LDAPImport'])
+    rows = iter_export_user_rows(users, is_pro)
+    try:
+        f = save_xls('users', head, rows)
+    except Exception as e:
+        logger.error(e)
         messages.error(request, _(u'Failed to export Excel'))
         return HttpResponseRedirect(next)
 
-    response = HttpResponse(content_type='application/ms-excel')
+    response = StreamingHttpResponse(FileWrapper(f),
+                                     content_type='application/ms-excel')
     response['Content-Disposition'] = 'attachment; filename=users.xlsx'
-    wb.save(response)
     return response
 
 @login_required
@@ -379,20 +425,11 @@ def sys_user_admin_ldap_imported(request):
         page_next = False
 
     users = users_plus_one[:per_page]
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in users])
+    populate_users(users)
     for user in users:
         if user.email == request.user.email:
             user.is_self = True
 
-        populate_user_info(user)
-        _populate_user_quota_usage(user)
-
-        # populate user last login time
-        user.last_login = None
-        for last_login in last_logins:
-            if last_login.username == user.email:
-                user.last_login = last_login.last_login
-
     return render_to_response(
         'sysadmin/sys_user_admin_ldap_imported.html', {
             'users': users,
@@ -425,19 +462,11 @@ def sys_user_admin_ldap(request):
         page_next = False
 
     users = users_plus_one[:per_page]
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in users])
+    populate_users(users, profile=False)
     for user in users:
         if user.email == request.user.email:
             user.is_self = True
 
-        _populate_user_quota_usage(user)
-
-        # populate user last login time
-        user.last_login = None
-        for last_login in last_logins:
-            if last_login.username == user.email:
-                user.last_login = last_login.last_login
-
     return render_to_response(
         'sysadmin/sys_useradmin_ldap.html', {
             'users': users,
@@ -467,14 +496,11 @@ def sys_user_admin_admins(request):
         else:
             not_admin_users.append(user)
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in admin_users])
-
+    populate_users(admin_users, profile=False)
     for user in admin_users:
         if user.email == request.user.email:
             user.is_self = True
 
-        _populate_user_quota_usage(user)
-
         # check db user's role
         if user.source == "DB":
             if user.role == GUEST_USER:
@@ -482,12 +508,6 @@ def sys_user_admin_admins(request):
             else:
                 user.is_guest = False
 
-        # populate user last login time
-        user.last_login = None
-        for last_login in last_logins:
-            if last_login.username == user.email:
-                user.last_login = last_login.last_login
-
     return render_to_response(
         'sysadmin/sys_useradmin_admins.html', {
             'users': admin_users,
@@ -1043,37 +1063,43 @@ def user_add(request):
     else:
         return HttpResponse(json.dumps({'error': str(form.errors.values()[0])}), status=400, content_type=content_type)
 
+def iter_export_groups(page_size=GROUP_EXPORT_PAGE_SIZE):
+    """Yield all groups, fetched page by page.
+    """
+    start = 0
+    while True:
+        groups = ccnet_api.get_all_groups(start, page_size)
+        for grp in groups:
+            yield grp
+
+        if len(groups) < page_size:
+            break
+        start += page_size
+
+def iter_export_group_rows(groups):
+    for grp in groups:
+        create_at = tsstr_sec(grp.timestamp) if grp.timestamp else ''
+        yield [grp.group_name, grp.creator_name, create_at]
+
 @login_required
 @sys_staff_required
 def sys_group_admin_export_excel(request):
     """ Export all groups to excel
     """
-    next = request.META.get('HTTP_REFERER', None)
-    if not next:
-        next = SITE_ROOT
+    next = request.META.get('HTTP_REFERER', reverse('sysadmin'))
 
+    head = [_("Name"), _("Creator"), _("Create At")]
+    rows = iter_export_group_rows(iter_export_groups())
     try:
-        groups = ccnet_threaded_rpc.get_all_groups(-1, -1)
+        f = save_xls('groups', head, rows)
     except Exception as e:
         logger.error(e)
         messages.error(request, _(u'Failed to export Excel'))
         return HttpResponseRedirect(next)
 
-    head = [_("Name"), _("Creator"), _("Create At")]
-    data_list = []
-    for grp in groups:
-        create_at = tsstr_sec(grp.timestamp) if grp.timestamp else ''
-        row = [grp.group_name, grp.creator_name, create_at]
-        data_list.append(row)
-
-    wb = write_xls('groups', head, data_list)
-    if not wb:
-        messages.error(request, _(u'Failed to export Excel'))
-        return HttpResponseRedirect(next)
-
-    response = HttpResponse(content_type='application/ms-excel')
+    response = StreamingHttpResponse(FileWrapper(f),
+                                     content_type='application/ms-excel')
     response['Content-Disposition'] = 'attachment; filename=groups.xlsx'
-    wb.save(response)
     return response
 
 @login_required
@@ -1398,11 +1424,13 @@ def sys_publink_admin(request):
     else:
         publinks = FileShare.objects.all().order_by('-ctime')[offset:offset+limit]
 
+    publinks = list(publinks)
     if len(publinks) == per_page + 1:
         page_next = True
     else:
         page_next = False
 
+    add_pending_view_cnts(publinks)
     for l in publinks:
         if l.is_file_share_link():
             l.name = os.path.basename(l.path)
@@ -1494,29 +1522,7 @@ def user_search(request):
 
         users.append(user_obj)
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in users])
-    if ENABLE_TRIAL_ACCOUNT:
-        trial_users = TrialAccount.objects.filter(user_or_org__in=[x.email for x in users])
-    else:
-        trial_users = []
-
-    for user in users:
-        populate_user_info(user)
-        _populate_user_quota_usage(user)
-
-        # check user's role
-        user.is_guest = True if get_user_role(user) == GUEST_USER else False
-        user.is_default = True if get_user_role(user) == DEFAULT_USER else False
-        # populate user last login time
-        user.last_login = None
-        for last_login in last_logins:
-            if last_login.username == user.email:
-                user.last_login = last_login.last_login
-
-        user.trial_info = None
-        for trial_user in trial_users:
-            if trial_user.user_or_org == user.email:
-                user.trial_info = {'expire_date': trial_user.expire_date}
+    populate_users(users, role=True, trial_info=True)
 
     extra_user_roles = [x for x in get_available_roles()
                         if x not in get_basic_user_roles()]
@@ -1809,86 +1815,31 @@ def batch_add_user(request):
             content = content.decode(encoding, 'replace').encode('utf-8')
 
         filestream = StringIO.StringIO(content)
-        reader = csv.reader(filestream)
-        new_users_count = len(list(reader))
-        if user_number_over_limit(new_users=new_users_count):
+        rows = [row for row in csv.reader(filestream) if row]
+        # passwords are handed over as secrets, stored encrypted with the job
+        items = [{'email': row[0].strip(), 'row': row[:1] + [''] + row[2:]}
+                 for row in rows]
+        passwords = [row[1] if len(row) > 1 else '' for row in rows]
+        if user_number_over_limit(new_users=len(items)):
             messages.error(request, _(u'The number of users exceeds the limit.'))
             return HttpResponseRedirect(next)
 
-        # return to the top of the file
-        filestream.seek(0)
-        reader = csv.reader(filestream)
-        for row in reader:
-
-            if not row:
-                continue
-
-            try:
-                username = row[0].strip()
-                password = row[1].strip()
-                if not is_valid_username(username) or not password:
-                    continue
-            except Exception as e:
-                logger.error(e)
-                continue
-
-            try:
-                User.objects.get(email=username)
-            except User.DoesNotExist:
-                User.objects.create_user(
-                    username, password, is_staff=False, is_active=True)
-
-                if config.FORCE_PASSWORD_CHANGE:
-                    UserOptions.objects.set_force_passwd_change(username)
-
-                # then update the user's optional info
-                try:
-                    nickname = row[2].strip()
-                    if len(nickname) <= 64 and '/' not in nickname:
-                        Profile.objects.add_or_update(username, nickname, '')
-                except Exception as e:
-                    logger.error(e)
-
-                try:
-                    department = row[3].strip()
-                    if len(department) <= 512:
-                        DetailedProfile.objects.add_or_update(username, department, '')
-                except Exception as e:
-                    logger.error(e)
-
-                try:
-                    role = row[4].strip()
-                    if is_pro_version() and role in get_available_roles():
-                        User.objects.update_role(username, role)
-                except Exception as e:
-                    logger.error(e)
+        job = submit_job(request.user.username, JOB_BATCH_ADD_USER, items,
+                         secrets=passwords)
+        if not job.is_finished():
+            job_url = reverse('api-v2.1-background-job', args=[job.pk])
+            messages.success(request, _(u'Import is running in background, users will be added in a while. Progress and failed rows: %s') % job_url)
+            return HttpResponseRedirect(next)
 
-                try:
-                    space_quota_mb = row[5].strip()
-                    space_quota_mb = int(space_quota_mb)
-                    if space_quota_mb >= 0:
-                        space_quota = int(space_quota_mb) * get_file_size_unit('MB')
-                        seafile_api.set_user_quota(username, space_quota)
-                except Exception as e:
-                    logger.error(e)
-
-                send_html_email_with_dj_template(
-                    username, dj_template='sysadmin/user_batch_add_email.html',
-                    subject=_(u'You are invited to join %s') % SITE_NAME,
-                    context={
-                        'user': email2nickname(request.user.username),
-                        'email': username,
-                        'password': password,
-                    })
-
-                # send admin operation log signal
-                admin_op_detail = {
-                    "email": username,
-                }
-                admin_operation.send(sender=None, admin_name=request.user.username,
-                                     operation=USER_ADD, detail=admin_op_detail)
-
-        messages.success(request, _('Import succeeded'))
+        failed = BackgroundJobResult.objects.get_results(job)['failed']
+        for item in failed[:BATCH_ADD_USER_MAX_ERRORS]:
+            messages.error(request, _(u'Failed to add %(email)s: %(error)s') % {
+                'email': item['email'], 'error': item['error_msg']})
+        if len(failed) > BATCH_ADD_USER_MAX_ERRORS:
+            messages.error(request, _(u'Failed to add %d more users.') % (
+                len(failed) - BATCH_ADD_USER_MAX_ERRORS))
+        if job.success_count:
+            messages.success(request, _('Import succeeded'))
     else:
         messages.error(request, _(u'Please select a csv file first.'))
 
@@ -1975,6 +1926,8 @@ def sys_settings(request):
 
         try:
             setattr(config, key, value)
+            if key == 'TEXT_PREVIEW_EXT':
+                file_type_classifier.invalidate()
             result['success'] = True
             return HttpResponse(json.dumps(result), content_type=content_type)
         except AttributeError as e:
@@ -2111,21 +2064,13 @@ def sys_inst_info_user(request, inst_id):
         page_next = False
     users = [User.objects.get(x) for x in usernames[:per_page]]
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in users])
+    populate_users(users, profile=False)
     for u in users:
-        _populate_user_quota_usage(u)
-
         if u.username in inst_admins:
             u.inst_admin = True
         else:
             u.inst_admin = False
 
-        # populate user last login time
-        u.last_login = None
-        for last_login in last_logins:
-            if last_login.username == u.email:
-                u.last_login = last_login.last_login
-
     users_count = Profile.objects.filter(institution=inst.name).count()
     space_quota = InstitutionQuota.objects.get_or_none(institution=inst)
     space_usage = get_institution_space_usage(inst)
@@ -2162,21 +2107,13 @@ def sys_inst_search_user(request, inst_id):
     users = [User.objects.get(x) for x in usernames]
 
     inst_admins = [x.user for x in InstitutionAdmin.objects.filter(institution=inst)]
-    last_logins = UserLastLogin.objects.filter(username__in=[x for x in users])
+    populate_users(users, profile=False)
     for u in users:
-        _populate_user_quota_usage(u)
-
         if u.username in inst_admins:
             u.inst_admin = True
         else:
             u.inst_admin = False
 
-        # populate user last login time
-        u.last_login = None
-        for last_login in last_logins:
-            if last_login.username == u.email:
-                u.last_login = last_login.last_login
-
     users_count = Profile.objects.filter(institution=inst.name).count()
 
     return render_to_response('sysadmin/sys_inst_search_user.html', {
@@ -2199,15 +2136,7 @@ def sys_inst_info_admins(request, inst_id):
     inst_admins = [x.user for x in InstitutionAdmin.objects.filter(institution=inst)]
     admins = [User.objects.get(x) for x in inst_admins]
 
-    last_logins = UserLastLogin.objects.filter(username__in=[x.email for x in admins])
-    for u in admins:
-        _populate_user_quota_usage(u)
-
-        # populate user last login time
-        u.last_login = None
-        for last_login in last_logins:
-            if last_login.username == u.email:
-                u.last_login = last_login.last_login
+    populate_users(admins, profile=False)
 
     users_count = Profile.objects.filter(institution=inst.name).count()
 
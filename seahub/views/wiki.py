@@ -32,6 +32,7 @@ from pysearpc import SearpcError
 
 from seahub.auth.decorators import login_required
 from seahub.base.decorators import user_mods_check
+from seahub.base.models import index_repo_name
 from seahub.wiki.models import PersonalWiki, WikiDoesNotExist, WikiPageMissing
 from seahub.wiki import get_personal_wiki_page, get_personal_wiki_repo, \
     convert_wiki_link, get_wiki_pages
@@ -175,6 +176,7 @@ def personal_wiki_create(request):
     repo_id = seaserv.create_repo(repo_name, repo_desc, username, passwd)
     if not repo_id:
         return json_error(_(u'Failed to create'), 500)
+    index_repo_name(repo_id, repo_name)
 
     PersonalWiki.objects.save_personal_wiki(username=username, repo_id=repo_id)
 
@@ -113,6 +113,21 @@ CREATE TABLE `base_commandslastcheck` (
 /*!40000 ALTER TABLE `base_commandslastcheck` ENABLE KEYS */;
 /*!40101 SET @saved_cs_client     = @@character_set_client */;
 /*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `base_reponameindex` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `repo_id` varchar(36) NOT NULL,
+  `name` varchar(255) NOT NULL,
+  `name_lower` varchar(255) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `repo_id` (`repo_id`),
+  KEY `base_reponameindex_509aab09` (`name_lower`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+/*!40000 ALTER TABLE `base_reponameindex` DISABLE KEYS */;
+/*!40000 ALTER TABLE `base_reponameindex` ENABLE KEYS */;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
 CREATE TABLE `base_devicetoken` (
   `id` int(11) NOT NULL AUTO_INCREMENT,
   `token` varchar(80) NOT NULL,
@@ -319,7 +334,7 @@ CREATE TABLE `django_migrations` (
 /*!40101 SET character_set_client = @saved_cs_client */;
 
 /*!40000 ALTER TABLE `django_migrations` DISABLE KEYS */;
-INSERT INTO `django_migrations` VALUES (1,'admin_log','0001_initial','2017-05-09 06:46:37.744868'),(2,'captcha','0001_initial','2017-05-09 06:46:37.935266'),(3,'contenttypes','0001_initial','2017-05-09 06:46:37.979257'),(4,'contenttypes','0002_remove_content_type_name','2017-05-09 06:46:38.208170'),(5,'database','0001_initial','2017-05-09 06:46:38.236030'),(6,'institutions','0001_initial','2017-05-09 06:46:38.448271'),(7,'institutions','0002_institutionquota','2017-05-09 06:46:38.646454'),(8,'invitations','0001_initial','2017-05-09 06:46:38.691074'),(9,'invitations','0002_invitation_invite_type','2017-05-09 06:46:38.732389'),(10,'invitations','0003_auto_20160510_1703','2017-05-09 06:46:38.784129'),(11,'invitations','0004_auto_20160629_1610','2017-05-09 06:46:38.862351'),(12,'invitations','0005_auto_20160629_1614','2017-05-09 06:46:38.884639'),(13,'post_office','0001_initial','2017-05-09 06:46:39.224068'),(14,'post_office','0002_add_i18n_and_backend_alias','2017-05-09 06:46:39.708011'),(15,'sessions','0001_initial','2017-05-09 06:46:39.746055'),(16,'termsandconditions','0001_initial','2017-05-09 06:46:39.880406'),(17,'two_factor','0001_initial','2017-05-09 06:46:40.161967');
+INSERT INTO `django_migrations` VALUES (1,'admin_log','0001_initial','2017-05-09 06:46:37.744868'),(2,'captcha','0001_initial','2017-05-09 06:46:37.935266'),(3,'contenttypes','0001_initial','2017-05-09 06:46:37.979257'),(4,'contenttypes','0002_remove_content_type_name','2017-05-09 06:46:38.208170'),(5,'database','0001_initial','2017-05-09 06:46:38.236030'),(6,'institutions','0001_initial','2017-05-09 06:46:38.448271'),(7,'institutions','0002_institutionquota','2017-05-09 06:46:38.646454'),(8,'invitations','0001_initial','2017-05-09 06:46:38.691074'),(9,'invitations','0002_invitation_invite_type','2017-05-09 06:46:38.732389'),(10,'invitations','0003_auto_20160510_1703','2017-05-09 06:46:38.784129'),(11,'invitations','0004_auto_20160629_1610','2017-05-09 06:46:38.862351'),(12,'invitations','0005_auto_20160629_1614','2017-05-09 06:46:38.884639'),(13,'post_office','0001_initial','2017-05-09 06:46:39.224068'),(14,'post_office','0002_add_i18n_and_backend_alias','2017-05-09 06:46:39.708011'),(15,'sessions','0001_initial','2017-05-09 06:46:39.746055'),(16,'termsandconditions','0001_initial','2017-05-09 06:46:39.880406'),(17,'two_factor','0001_initial','2017-05-09 06:46:40.161967'),(18,'jobs','0001_initial','2017-05-09 06:46:40.201382');
 /*!40000 ALTER TABLE `django_migrations` ENABLE KEYS */;
 /*!40101 SET @saved_cs_client     = @@character_set_client */;
 /*!40101 SET character_set_client = utf8 */;
@@ -336,6 +351,20 @@ CREATE TABLE `django_session` (
 /*!40000 ALTER TABLE `django_session` ENABLE KEYS */;
 /*!40101 SET @saved_cs_client     = @@character_set_client */;
 /*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `group_groupmessagesummary` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `group_id` int(11) NOT NULL,
+  `msg_count` int(11) NOT NULL,
+  `last_msg_timestamp` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `group_id` (`group_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+/*!40000 ALTER TABLE `group_groupmessagesummary` DISABLE KEYS */;
+/*!40000 ALTER TABLE `group_groupmessagesummary` ENABLE KEYS */;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
 CREATE TABLE `group_groupmessage` (
   `id` int(11) NOT NULL AUTO_INCREMENT,
   `group_id` int(11) NOT NULL,
@@ -455,6 +484,49 @@ CREATE TABLE `invitations_invitation` (
 /*!40000 ALTER TABLE `invitations_invitation` ENABLE KEYS */;
 /*!40101 SET @saved_cs_client     = @@character_set_client */;
 /*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `jobs_backgroundjob` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `username` varchar(255) NOT NULL,
+  `job_type` varchar(50) NOT NULL,
+  `status` varchar(20) NOT NULL,
+  `params` longtext NOT NULL,
+  `items` longtext NOT NULL,
+  `total` int(11) NOT NULL,
+  `processed` int(11) NOT NULL,
+  `success_count` int(11) NOT NULL,
+  `failed_count` int(11) NOT NULL,
+  `worker` varchar(32) NOT NULL,
+  `error_msg` longtext NOT NULL,
+  `created_at` datetime NOT NULL,
+  `updated_at` datetime NOT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `jobs_backgroundjob_14c4b06b` (`username`),
+  KEY `jobs_backgroundjob_9acb4454` (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+/*!40000 ALTER TABLE `jobs_backgroundjob` DISABLE KEYS */;
+/*!40000 ALTER TABLE `jobs_backgroundjob` ENABLE KEYS */;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `jobs_backgroundjobresult` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `row` int(11) NOT NULL,
+  `email` varchar(255) NOT NULL,
+  `success` tinyint(1) NOT NULL,
+  `detail` longtext NOT NULL,
+  `job_id` int(11) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `job_id` (`job_id`,`row`),
+  CONSTRAINT `jobs_backgroundj_job_id_8c2eb9b9841ccfb_fk_jobs_backgroundjob_id` FOREIGN KEY (`job_id`) REFERENCES `jobs_backgroundjob` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+/*!40000 ALTER TABLE `jobs_backgroundjobresult` DISABLE KEYS */;
+/*!40000 ALTER TABLE `jobs_backgroundjobresult` ENABLE KEYS */;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
 CREATE TABLE `notifications_notification` (
   `id` int(11) NOT NULL AUTO_INCREMENT,
   `message` varchar(512) NOT NULL,
@@ -467,6 +539,20 @@ CREATE TABLE `notifications_notification` (
 /*!40000 ALTER TABLE `notifications_notification` ENABLE KEYS */;
 /*!40101 SET @saved_cs_client     = @@character_set_client */;
 /*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `notifications_groupmsgunreadcount` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `to_user` varchar(255) NOT NULL,
+  `group_id` int(11) NOT NULL,
+  `count` int(11) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `to_user` (`to_user`,`group_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+/*!40000 ALTER TABLE `notifications_groupmsgunreadcount` DISABLE KEYS */;
+/*!40000 ALTER TABLE `notifications_groupmsgunreadcount` ENABLE KEYS */;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
 CREATE TABLE `notifications_usernotification` (
   `id` int(11) NOT NULL AUTO_INCREMENT,
   `to_user` varchar(255) NOT NULL,
@@ -18,6 +18,7 @@ INSERT INTO "django_migrations" VALUES(14,'post_office','0002_add_i18n_and_backe
 INSERT INTO "django_migrations" VALUES(15,'sessions','0001_initial','2017-05-09 06:48:33.020038');
 INSERT INTO "django_migrations" VALUES(16,'termsandconditions','0001_initial','2017-05-09 06:48:33.140719');
 INSERT INTO "django_migrations" VALUES(17,'two_factor','0001_initial','2017-05-09 06:48:33.226658');
+INSERT INTO "django_migrations" VALUES(18,'jobs','0001_initial','2017-05-09 06:48:33.262117');
 CREATE TABLE "registration_registrationprofile" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "emailuser_id" integer NOT NULL, "activation_key" varchar(40) NOT NULL);
 CREATE TABLE "api2_token" ("key" varchar(40) NOT NULL PRIMARY KEY, "user" varchar(255) NOT NULL UNIQUE, "created" datetime NOT NULL);
 CREATE TABLE "api2_tokenv2" ("key" varchar(40) NOT NULL PRIMARY KEY, "user" varchar(255) NOT NULL, "platform" varchar(32) NOT NULL, "device_id" varchar(40) NOT NULL, "device_name" varchar(40) NOT NULL, "platform_version" varchar(16) NOT NULL, "client_version" varchar(16) NOT NULL, "last_accessed" datetime NOT NULL, "last_login_ip" char(39) NULL, "created_at" datetime NOT NULL, "wiped_at" datetime NULL, UNIQUE ("user", "platform", "device_id"));
@@ -34,14 +35,17 @@ CREATE TABLE "base_innerpubmsg" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT
 CREATE TABLE "base_innerpubmsgreply" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "reply_to_id" integer NOT NULL REFERENCES "base_innerpubmsg" ("id"), "from_email" varchar(254) NOT NULL, "message" varchar(150) NOT NULL, "timestamp" datetime NOT NULL);
 CREATE TABLE "base_devicetoken" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "token" varchar(80) NOT NULL, "user" varchar(255) NOT NULL, "platform" varchar(32) NOT NULL, "version" varchar(16) NOT NULL, "pversion" varchar(16) NOT NULL, UNIQUE ("token", "user"));
 CREATE TABLE "base_clientlogintoken" ("token" varchar(32) NOT NULL PRIMARY KEY, "username" varchar(255) NOT NULL, "timestamp" datetime NOT NULL);
+CREATE TABLE "base_reponameindex" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "repo_id" varchar(36) NOT NULL UNIQUE, "name" varchar(255) NOT NULL, "name_lower" varchar(255) NOT NULL);
 CREATE TABLE "contacts_contact" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user_email" varchar(255) NOT NULL, "contact_email" varchar(255) NOT NULL, "contact_name" varchar(255) NULL, "note" varchar(255) NULL);
 CREATE TABLE "wiki_personalwiki" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "username" varchar(255) NOT NULL UNIQUE, "repo_id" varchar(36) NOT NULL);
 CREATE TABLE "wiki_groupwiki" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "group_id" integer NOT NULL UNIQUE, "repo_id" varchar(36) NOT NULL);
+CREATE TABLE "group_groupmessagesummary" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "group_id" integer NOT NULL UNIQUE, "msg_count" integer NOT NULL, "last_msg_timestamp" datetime NULL);
 CREATE TABLE "group_groupmessage" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "group_id" integer NOT NULL, "from_email" varchar(255) NOT NULL, "message" text NOT NULL, "timestamp" datetime NOT NULL);
 CREATE TABLE "group_messagereply" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "reply_to_id" integer NOT NULL REFERENCES "group_groupmessage" ("id"), "from_email" varchar(255) NOT NULL, "message" text NOT NULL, "timestamp" datetime NOT NULL);
 CREATE TABLE "group_messageattachment" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "group_message_id" integer NOT NULL REFERENCES "group_groupmessage" ("id"), "repo_id" varchar(40) NOT NULL, "attach_type" varchar(5) NOT NULL, "path" text NOT NULL, "src" varchar(20) NOT NULL);
 CREATE TABLE "group_publicgroup" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "group_id" integer NOT NULL);
 CREATE TABLE "notifications_notification" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "message" varchar(512) NOT NULL, "primary" bool NOT NULL);
+CREATE TABLE "notifications_groupmsgunreadcount" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "to_user" varchar(255) NOT NULL, "group_id" integer NOT NULL, "count" integer NOT NULL, UNIQUE ("to_user", "group_id"));
 CREATE TABLE "notifications_usernotification" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "to_user" varchar(255) NOT NULL, "msg_type" varchar(30) NOT NULL, "detail" text NOT NULL, "timestamp" datetime NOT NULL, "seen" bool NOT NULL);
 CREATE TABLE "options_useroptions" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "email" varchar(255) NOT NULL, "option_key" varchar(50) NOT NULL, "option_val" varchar(50) NOT NULL);
 CREATE TABLE "profile_profile" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user" varchar(254) NOT NULL UNIQUE, "nickname" varchar(64) NOT NULL, "intro" text NOT NULL, "lang_code" text NULL, "login_id" varchar(225) NULL UNIQUE, "contact_email" varchar(225) NULL, "institution" varchar(225) NULL);
@@ -115,6 +119,8 @@ CREATE TABLE "institutions_institution" ("id" integer NOT NULL PRIMARY KEY AUTOI
 CREATE TABLE "institutions_institutionadmin" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user" varchar(254) NOT NULL, "institution_id" integer NOT NULL REFERENCES "institutions_institution" ("id"));
 CREATE TABLE "institutions_institutionquota" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "quota" bigint NOT NULL, "institution_id" integer NOT NULL REFERENCES "institutions_institution" ("id"));
 CREATE TABLE "invitations_invitation" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "token" varchar(40) NOT NULL, "inviter" varchar(255) NOT NULL, "accepter" varchar(255) NOT NULL, "invite_time" datetime NOT NULL, "accept_time" datetime NULL, "invite_type" varchar(20) NOT NULL, "expire_time" datetime NOT NULL);
+CREATE TABLE "jobs_backgroundjob" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "username" varchar(255) NOT NULL, "job_type" varchar(50) NOT NULL, "status" varchar(20) NOT NULL, "params" text NOT NULL, "items" text NOT NULL, "total" integer NOT NULL, "processed" integer NOT NULL, "success_count" integer NOT NULL, "failed_count" integer NOT NULL, "worker" varchar(32) NOT NULL, "error_msg" text NOT NULL, "created_at" datetime NOT NULL, "updated_at" datetime NOT NULL, "finished_at" datetime NULL);
+CREATE TABLE "jobs_backgroundjobresult" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "row" integer NOT NULL, "email" varchar(255) NOT NULL, "success" bool NOT NULL, "detail" text NOT NULL, "job_id" integer NOT NULL REFERENCES "jobs_backgroundjob" ("id"), UNIQUE ("job_id", "row"));
 CREATE TABLE "post_office_attachment" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "file" varchar(100) NOT NULL, "name" varchar(255) NOT NULL);
 CREATE TABLE "post_office_log" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "date" datetime NOT NULL, "status" smallint unsigned NOT NULL, "exception_type" varchar(255) NOT NULL, "message" text NOT NULL, "email_id" integer NOT NULL REFERENCES "post_office_email" ("id"));
 CREATE TABLE "post_office_attachment_emails" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "attachment_id" integer NOT NULL REFERENCES "post_office_attachment" ("id"), "email_id" integer NOT NULL REFERENCES "post_office_email" ("id"), UNIQUE ("attachment_id", "email_id"));
@@ -128,7 +134,7 @@ CREATE TABLE "two_factor_staticdevice" ("id" integer NOT NULL PRIMARY KEY AUTOIN
 CREATE TABLE "two_factor_statictoken" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "token" varchar(16) NOT NULL, "device_id" integer NOT NULL REFERENCES "two_factor_staticdevice" ("id"));
 CREATE TABLE "two_factor_totpdevice" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user" varchar(255) NOT NULL UNIQUE, "name" varchar(64) NOT NULL, "confirmed" bool NOT NULL, "key" varchar(80) NOT NULL, "step" smallint unsigned NOT NULL, "t0" bigint NOT NULL, "digits" smallint unsigned NOT NULL, "tolerance" smallint unsigned NOT NULL, "drift" smallint NOT NULL, "last_t" bigint NOT NULL);
 DELETE FROM sqlite_sequence;
-INSERT INTO "sqlite_sequence" VALUES('django_migrations',17);
+INSERT INTO "sqlite_sequence" VALUES('django_migrations',18);
 INSERT INTO "sqlite_sequence" VALUES('django_content_type',54);
 INSERT INTO "sqlite_sequence" VALUES('invitations_invitation',0);
 INSERT INTO "sqlite_sequence" VALUES('post_office_email',0);
@@ -146,6 +152,7 @@ CREATE INDEX "base_groupenabledmodule_0e939a4f" ON "base_groupenabledmodule" ("g
 CREATE INDEX "base_userlastlogin_14c4b06b" ON "base_userlastlogin" ("username");
 CREATE INDEX "base_innerpubmsgreply_6ec85d95" ON "base_innerpubmsgreply" ("reply_to_id");
 CREATE INDEX "base_clientlogintoken_14c4b06b" ON "base_clientlogintoken" ("username");
+CREATE INDEX "base_reponameindex_509aab09" ON "base_reponameindex" ("name_lower");
 CREATE INDEX "contacts_contact_40c27bdc" ON "contacts_contact" ("user_email");
 CREATE INDEX "group_groupmessage_0e939a4f" ON "group_groupmessage" ("group_id");
 CREATE INDEX "group_messagereply_6ec85d95" ON "group_messagereply" ("reply_to_id");
@@ -176,6 +183,9 @@ CREATE INDEX "institutions_institutionadmin_a964baeb" ON "institutions_instituti
 CREATE INDEX "institutions_institutionquota_a964baeb" ON "institutions_institutionquota" ("institution_id");
 CREATE INDEX "invitations_invitation_94a08da1" ON "invitations_invitation" ("token");
 CREATE INDEX "invitations_invitation_d5dd16f8" ON "invitations_invitation" ("inviter");
+CREATE INDEX "jobs_backgroundjob_14c4b06b" ON "jobs_backgroundjob" ("username");
+CREATE INDEX "jobs_backgroundjob_9acb4454" ON "jobs_backgroundjob" ("status");
+CREATE INDEX "jobs_backgroundjobresult_d697ea38" ON "jobs_backgroundjobresult" ("job_id");
 CREATE INDEX "post_office_log_fdfd0ebf" ON "post_office_log" ("email_id");
 CREATE INDEX "post_office_attachment_emails_07ba63f5" ON "post_office_attachment_emails" ("attachment_id");
 CREATE INDEX "post_office_attachment_emails_fdfd0ebf" ON "post_office_attachment_emails" ("email_id");
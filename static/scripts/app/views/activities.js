@@ -19,7 +19,7 @@ define([
 
         initialize: function () {
             this.activities = new ActivityCollection();
-            this.moreOffset = 0;
+            this.moreCursor = '';
             this.render();
         },
 
@@ -33,7 +33,7 @@ define([
             this.$activitiesMore.hide();
             this.activities.fetch({
                 remove: false,
-                data: {'start': _this.moreOffset},
+                data: {'cursor': _this.moreCursor},
                 success: function() {
                     _this.renderActivities();
                 }
@@ -48,7 +48,7 @@ define([
 
             this.$loadingTip.hide();
             this.$activitiesMore.hide();
-            this.moreOffset = activitiesJson[len-1]['more_offset'];
+            this.moreCursor = activitiesJson[len-1]['more_cursor'];
             this.$activitiesBody.empty().show();
 
             for (var i = 0; i < len; i++) {
@@ -85,7 +85,7 @@ define([
             var _this = this;
 
             this.activities.fetch({
-                data: {'start': 0},
+                data: {'cursor': ''},
                 success: function() {
                     _this.renderActivities();
                 }
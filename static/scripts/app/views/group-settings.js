@@ -267,17 +267,22 @@ define([
                     contentType: false, // tell jQuery not to set contentType
                     beforeSend: Common.prepareCSRFToken,
                     success: function(data) {
-                        if (data.failed.length > 0) {
-                            var err_msg = '';
-                            $(data.failed).each(function(index, item) {
-                                err_msg += Common.HTMLescape(item.email) + ': ' + Common.HTMLescape(item.error_msg) + '<br />';
-                            });
-                            $error.html(err_msg).removeClass('hide');
+                        Common.waitForBackgroundJob(data, function(data) {
+                            if (data.failed.length > 0) {
+                                var err_msg = '';
+                                $(data.failed).each(function(index, item) {
+                                    err_msg += Common.HTMLescape(item.email) + ': ' + Common.HTMLescape(item.error_msg) + '<br />';
+                                });
+                                $error.html(err_msg).removeClass('hide');
+                                Common.enableButton($submitBtn);
+                            } else {
+                                $.modal.close();
+                                Common.feedback(gettext("Successfully imported."), 'success');
+                            }
+                        }, function(xhr) {
+                            $error.html(gettext("Failed. Please check the network.")).removeClass('hide');
                             Common.enableButton($submitBtn);
-                        } else {
-                            $.modal.close();
-                            Common.feedback(gettext("Successfully imported."), 'success');
-                        }
+                        });
                     },
                     error: function(xhr) {
                         var error_msg;
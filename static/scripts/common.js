@@ -140,6 +140,7 @@ define([
                 case 'group_member': return siteRoot + 'api/v2.1/groups/' + options.group_id + '/members/' + options.email + '/';
                 case 'group_member_bulk': return siteRoot + 'api/v2.1/groups/' + options.group_id + '/members/bulk/';
                 case 'group_import_members': return siteRoot + 'ajax/group/' + options.group_id + '/members/import/';
+                case 'background_job': return siteRoot + 'api/v2.1/background-jobs/' + options.job_id + '/';
                 case 'group_repos': return siteRoot + 'api2/groups/' + options.group_id + '/repos/';
                 case 'group_discussions': return siteRoot + 'api2/groups/' + options.group_id + '/discussions/';
                 case 'group_discussion': return siteRoot + 'api2/groups/' + options.group_id + '/discussions/' + options.discussion_id + '/';
@@ -386,6 +387,35 @@ define([
             }
         },
 
+        // Bulk operations may be queued as a background job, in which case
+        // `data` is the job status. Poll it until the job is finished, then
+        // call `callback` with the results.
+        waitForBackgroundJob: function(data, callback, error) {
+            var _this = this;
+            if (data.success) {
+                callback(data);
+                return;
+            }
+
+            var query = function() {
+                $.ajax({
+                    url: _this.getUrl({'name': 'background_job', 'job_id': data.id}),
+                    type: 'GET',
+                    cache: false,
+                    dataType: 'json',
+                    success: function(job) {
+                        if (job.status == 'done' || job.status == 'failed') {
+                            callback(job);
+                        } else {
+                            setTimeout(query, 2000);
+                        }
+                    },
+                    error: error
+                });
+            };
+            query();
+        },
+
         enableButton: function(btn) {
             btn.removeAttr('disabled').removeClass('btn-disabled');
         },
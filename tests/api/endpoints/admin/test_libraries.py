@@ -1,5 +1,7 @@
 import json
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
+from seahub.base.models import RepoNameIndex
 from seahub.test_utils import BaseTestCase
 from tests.common.utils import randstring
 
@@ -29,6 +31,44 @@ class LibrariesTest(BaseTestCase):
         assert json_resp['name'] == searched_args
         assert searched_args in json_resp['repos'][0]['name']
 
+    def test_can_search_by_name_with_index(self):
+        call_command('update_repo_name_index')
+        assert RepoNameIndex.objects.filter(repo_id=self.repo.id).exists()
+
+        self.login_as(self.admin)
+        searched_args = self.repo.repo_name[1:].upper()
+        url = self.libraries_url + '?name=%s&per_page=1' % searched_args
+        resp = self.client.get(url)
+
+        json_resp = json.loads(resp.content)
+        assert json_resp['repos'][0]['id'] == self.repo.id
+        assert json_resp['repos'][0]['owner'] == self.user.username
+        assert json_resp['page_info']['current_page'] == 1
+
+    def test_search_by_name_scans_until_index_is_built(self):
+        # a library created through the api does not make the index usable
+        RepoNameIndex.objects.update_repo('repo-1', 'other')
+        assert not RepoNameIndex.objects.is_built()
+
+        self.login_as(self.admin)
+        url = self.libraries_url + '?name=%s' % self.repo.repo_name
+        json_resp = json.loads(self.client.get(url).content)
+        assert self.repo.id in [r['id'] for r in json_resp['repos']]
+
+    def test_search_by_name_with_invalid_page(self):
+        call_command('update_repo_name_index')
+        assert RepoNameIndex.objects.is_built()
+
+        self.login_as(self.admin)
+        url = self.libraries_url + '?name=%s&page=0&per_page=-1' % \
+            self.repo.repo_name
+        resp = self.client.get(url)
+        self.assertEqual(200, resp.status_code)
+
+        json_resp = json.loads(resp.content)
+        assert json_resp['page_info']['current_page'] == 1
+        assert len(json_resp['repos']) == 1
+
     def test_get_with_invalid_user_permission(self):
         self.login_as(self.user)
         resp = self.client.get(self.libraries_url)
@@ -0,0 +1,42 @@
+import json
+
+from django.core.urlresolvers import reverse
+
+from seahub.jobs.handlers import JOB_USERS_SET_QUOTA
+from seahub.jobs.models import BackgroundJob
+from seahub.test_utils import BaseTestCase
+
+
+class BackgroundJobViewTest(BaseTestCase):
+
+    def setUp(self):
+        self.job = BackgroundJob.objects.add_job(
+            self.admin.username, JOB_USERS_SET_QUOTA,
+            [{'email': self.user.username}], {'quota_total': 1024})
+        self.url = reverse('api-v2.1-background-job', args=[self.job.pk])
+
+    def test_get_queued_job(self):
+        self.login_as(self.admin)
+
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+
+        json_resp = json.loads(resp.content)
+        assert json_resp['id'] == self.job.pk
+        assert json_resp['status'] == 'queued'
+        assert json_resp['total'] == 1
+        assert json_resp['processed'] == 0
+        assert 'success' not in json_resp
+
+    def test_get_with_invalid_user_permission(self):
+        self.login_as(self.user)
+
+        resp = self.client.get(self.url)
+        self.assertEqual(403, resp.status_code)
+
+    def test_get_not_exist_job(self):
+        self.login_as(self.admin)
+
+        url = reverse('api-v2.1-background-job', args=[self.job.pk + 1])
+        resp = self.client.get(url)
+        self.assertEqual(404, resp.status_code)
@@ -3,6 +3,8 @@ import os
 import json
 import posixpath
 
+from mock import patch
+from pysearpc import SearpcError
 from seaserv import seafile_api
 
 from django.core.urlresolvers import reverse
@@ -63,6 +65,85 @@ class DirViewTest(BaseTestCase):
         assert json_resp[0]['type'] == 'dir'
         assert json_resp[0]['name'] == self.folder_name
 
+    def test_can_get_dir_page(self):
+        file_name = os.path.basename(self.file)
+
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?offset=0&limit=1&sort_by=size')
+        self.assertEqual(200, resp.status_code)
+        json_resp = json.loads(resp.content)
+
+        assert json_resp['total_count'] == 2
+        assert json_resp['next_offset'] == 1
+        assert len(json_resp['dirent_list']) == 1
+        assert json_resp['dirent_list'][0]['name'] == self.folder_name
+
+        resp = self.client.get(self.url + '?offset=1&limit=1&sort_by=size')
+        json_resp = json.loads(resp.content)
+        assert json_resp['next_offset'] is None
+        assert json_resp['dirent_list'][0]['name'] == file_name
+
+    def test_can_stream_dir(self):
+        file_name = os.path.basename(self.file)
+
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?stream=1')
+        self.assertEqual(200, resp.status_code)
+        assert resp['oid']
+        json_resp = json.loads(''.join(resp.streaming_content))
+
+        assert json_resp['total_count'] == 2
+        assert json_resp['next_offset'] is None
+        assert [e['name'] for e in json_resp['dirent_list']] == \
+            [self.folder_name, file_name]
+
+    def test_get_dir_page_with_invalid_args(self):
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?limit=0')
+        self.assertEqual(400, resp.status_code)
+
+        resp = self.client.get(self.url + '?sort_by=type')
+        self.assertEqual(400, resp.status_code)
+
+    def test_can_get_dir_recursively(self):
+        seafile_api.post_dir(self.repo_id, self.folder_path, 'sub-folder',
+                             self.user_name)
+
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?t=d&recursive=1')
+        self.assertEqual(200, resp.status_code)
+        json_resp = json.loads(resp.content)
+        assert [e['name'] for e in json_resp] == [self.folder_name, 'sub-folder']
+        assert json_resp[1]['parent_dir'] == self.folder_path
+
+        resp = self.client.get(self.url + '?t=d&recursive=1&max_depth=1')
+        json_resp = json.loads(resp.content)
+        assert [e['name'] for e in json_resp] == [self.folder_name]
+
+    def test_can_stream_dir_recursively(self):
+        seafile_api.post_dir(self.repo_id, self.folder_path, 'sub-folder',
+                             self.user_name)
+
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?t=d&recursive=1&stream=1')
+        self.assertEqual(200, resp.status_code)
+        lines = ''.join(resp.streaming_content).splitlines()
+        assert [json.loads(l)['name'] for l in lines] == \
+            [self.folder_name, 'sub-folder']
+
+        resp = self.client.get(self.url + '?t=d&recursive=1&max_depth=0')
+        self.assertEqual(400, resp.status_code)
+
+    @patch('seahub.utils.repo.list_dir_sorted')
+    def test_stream_dir_recursively_ends_with_error(self, mock_list_dir_sorted):
+        mock_list_dir_sorted.side_effect = SearpcError('failed')
+
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?t=d&recursive=1&stream=1')
+        self.assertEqual(200, resp.status_code)
+        lines = ''.join(resp.streaming_content).splitlines()
+        assert json.loads(lines[-1]) == {'error_msg': 'Internal Server Error'}
+
     def test_get_dir_with_invalid_perm(self):
         # login as admin, then get dir info in user's repo
         self.login_as(self.admin)
@@ -1,5 +1,6 @@
 from seahub.test_utils import BaseTestCase
-from seahub.api2.models import TokenV2, TokenV2Manager
+from seahub.api2.models import TokenV2, TokenV2Manager, get_cached_token, \
+    set_cached_token, clear_user_token_cache
 
 class TokenV2ManagerTest(BaseTestCase):
     def setUp(self):
@@ -51,6 +52,27 @@ class TokenV2ManagerTest(BaseTestCase):
             self.token.user, self.token.platform, self.token.device_id)
         assert TokenV2.objects.all()[0].wiped_at is not None
 
+    def test_delete_device_token_clears_cache(self):
+        set_cached_token(self.token.key, {'token': self.token})
+        assert get_cached_token(self.token.key) is not None
+
+        TokenV2.objects.delete_device_token(
+            self.token.user, self.token.platform, self.token.device_id)
+        assert get_cached_token(self.token.key) is None
+
+    def test_remote_wipe_clears_cache(self):
+        set_cached_token(self.token.key, {'token': self.token})
+
+        TokenV2.objects.mark_device_to_be_remote_wiped(
+            self.token.user, self.token.platform, self.token.device_id)
+        assert get_cached_token(self.token.key) is None
+
+    def test_clear_user_token_cache(self):
+        set_cached_token(self.token.key, {'token': self.token})
+
+        clear_user_token_cache(self.user.username)
+        assert get_cached_token(self.token.key) is None
+
 
 class TokenV2Test(BaseTestCase):
     def test_save(self):
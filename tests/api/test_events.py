@@ -0,0 +1,47 @@
+import json
+from mock import patch
+
+from seahub.test_utils import BaseTestCase
+
+EVENTS_URL = '/api2/events/'
+
+
+@patch('seahub.api2.views.EVENTS_ENABLED', True)
+@patch('seahub.api2.views.get_events_page')
+class EventsViewTest(BaseTestCase):
+    def setUp(self):
+        self.login_as(self.user)
+
+    def test_first_page(self, mock_get_events_page):
+        mock_get_events_page.return_value = ([], '15:abc')
+
+        resp = self.client.get(EVENTS_URL)
+        self.assertEqual(200, resp.status_code)
+        json_resp = json.loads(resp.content)
+        assert json_resp['events'] == []
+        assert json_resp['more'] is False
+        assert json_resp['more_offset'] == 15
+        assert json_resp['more_cursor'] == '15:abc'
+        assert mock_get_events_page.call_args[0][1] == ''
+
+    def test_cursor(self, mock_get_events_page):
+        mock_get_events_page.return_value = ([], '30:def')
+
+        resp = self.client.get(EVENTS_URL + '?cursor=15:abc')
+        self.assertEqual(200, resp.status_code)
+        assert mock_get_events_page.call_args[0][1] == '15:abc'
+
+    def test_start(self, mock_get_events_page):
+        mock_get_events_page.return_value = ([], '30')
+
+        resp = self.client.get(EVENTS_URL + '?start=15')
+        self.assertEqual(200, resp.status_code)
+        assert mock_get_events_page.call_args[0][1] == '15'
+
+    def test_invalid(self, mock_get_events_page):
+        resp = self.client.get(EVENTS_URL + '?start=x')
+        self.assertEqual(400, resp.status_code)
+
+        resp = self.client.get(EVENTS_URL + '?cursor=x:abc')
+        self.assertEqual(400, resp.status_code)
+        assert not mock_get_events_page.called
@@ -1,7 +1,8 @@
 from seahub.test_utils import BaseTestCase
 
 from seahub.base.templatetags.seahub_tags import email2nickname, \
-    seahub_filesizeformat
+    seahub_filesizeformat, char2pinyin
+from seahub.cconvert import CConvert
 from seahub.profile.models import Profile
 
 
@@ -39,3 +40,14 @@ class SeahubFilesizeformatTest(BaseTestCase):
         assert seahub_filesizeformat(1000) == u'1.0\xa0KB'
         assert seahub_filesizeformat(1000000) == u'1.0\xa0MB'
         assert seahub_filesizeformat(1000000000) == u'1.0\xa0GB'
+
+
+class Char2pinyinTest(BaseTestCase):
+    def test_char2pinyin(self):
+        assert char2pinyin(u'\u4e2d\u6587') == 'zhongwen'
+        assert char2pinyin(u'abc') == 'abc'
+
+    def test_convert_many(self):
+        cc = CConvert()
+        assert cc.convert_many([u'\u4e2d', u'a b', u'\u4e2d']) == \
+            ['zhong', 'a-b', 'zhong']
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+import time
+
+from seahub.base.file_cache import ShardedFileBasedCache
+from seahub.test_utils import BaseTestCase
+
+
+class ShardedFileBasedCacheTest(BaseTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = ShardedFileBasedCache(self.dir, {
+            'OPTIONS': {'MAX_ENTRIES': 20, 'CULL_FREQUENCY': 4},
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_get_set_delete(self):
+        self.cache.set('foo', {'a': 1})
+        assert self.cache.get('foo') == {'a': 1}
+        assert self.cache.has_key('foo')
+
+        self.cache.delete('foo')
+        assert self.cache.get('foo') is None
+        assert self.cache.get('foo', 'default') == 'default'
+
+    def test_expire(self):
+        self.cache.set('foo', 'bar', 0.01)
+        time.sleep(0.05)
+        assert self.cache.get('foo') is None
+        assert self.cache._count() == 0
+
+    def test_incr(self):
+        self.cache.set('attempts', 1, 60)
+        assert self.cache.incr('attempts') == 2
+        assert self.cache.decr('attempts', 2) == 0
+
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_add(self):
+        assert self.cache.add('foo', 'bar')
+        assert not self.cache.add('foo', 'baz')
+        assert self.cache.get('foo') == 'bar'
+
+        self.cache.set('expired', 'bar', 0.01)
+        time.sleep(0.05)
+        assert self.cache.add('expired', 'baz')
+        assert self.cache.get('expired') == 'baz'
+
+    def test_cull(self):
+        for i in range(100):
+            self.cache.set('key_%d' % i, i)
+        # culling is left to cull()
+        assert self.cache._count() == 100
+
+        self.cache.get('key_0')
+        assert self.cache.cull() == 25
+        assert self.cache._count() == 75
+        assert self.cache.get('key_0') == 0
+        assert self.cache.get('key_1') is None
+        assert self.cache.get('key_99') == 99
+
+    def test_cull_expired_in_batches(self):
+        cache = ShardedFileBasedCache(self.dir, {
+            'OPTIONS': {'MAX_ENTRIES': 20, 'CULL_BATCH_SIZE': 3},
+        })
+        for i in range(10):
+            cache.set('key_%d' % i, i, 0.01)
+        cache.set('foo', 'bar')
+        time.sleep(0.05)
+
+        assert cache.cull() == 10
+        assert cache._count() == 1
+        assert cache.get('foo') == 'bar'
+
+    def test_clear(self):
+        self.cache.set('foo', 'bar')
+        self.cache.clear()
+        assert self.cache.get('foo') is None
+        assert self.cache._count() == 0
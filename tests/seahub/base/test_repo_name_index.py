@@ -0,0 +1,39 @@
+from mock import patch
+
+from seahub.base.models import RepoNameIndex, index_repo_name
+from seahub.signals import repo_created, repo_deleted, repo_renamed
+from seahub.test_utils import BaseTestCase
+
+
+class RepoNameIndexTest(BaseTestCase):
+    def test_search(self):
+        RepoNameIndex.objects.update_repo('repo-1', 'My Photos')
+        RepoNameIndex.objects.update_repo('repo-2', 'photos backup')
+        RepoNameIndex.objects.update_repo('repo-3', 'Documents')
+
+        assert RepoNameIndex.objects.search('PHOTO') == ['repo-1', 'repo-2']
+        assert RepoNameIndex.objects.search('photo', 1, 1) == ['repo-2']
+        assert RepoNameIndex.objects.search('xyz') == []
+
+    def test_updated_by_signals(self):
+        repo_created.send(sender=None, org_id=-1, creator=self.user.username,
+                          repo_id='repo-1', repo_name='old name',
+                          library_template=None)
+        assert RepoNameIndex.objects.search('old') == ['repo-1']
+
+        repo_renamed.send(sender=None, repo_id='repo-1', repo_name='new name')
+        assert RepoNameIndex.objects.search('old') == []
+        assert RepoNameIndex.objects.search('new') == ['repo-1']
+
+        repo_deleted.send(sender=None, org_id=-1, usernames=[],
+                          repo_owner=self.user.username, repo_id='repo-1',
+                          repo_name='new name')
+        assert RepoNameIndex.objects.count() == 0
+
+    def test_index_repo_name_logs_errors(self):
+        with patch.object(RepoNameIndex.objects, 'update_repo') as m:
+            m.side_effect = Exception('db error')
+            index_repo_name('repo-1', 'name')
+
+        index_repo_name('repo-1', 'name')
+        assert RepoNameIndex.objects.search('name') == ['repo-1']
@@ -0,0 +1,56 @@
+import datetime
+
+from seahub.group.models import GroupMessage, GroupMessageSummary
+from seahub.group.signals import grpmsg_added
+from seahub.test_utils import BaseTestCase
+
+
+class GroupMessageSummaryTest(BaseTestCase):
+    def _add_msg(self):
+        msg = GroupMessage.objects.create(group_id=self.group.id,
+                                          from_email=self.user.username,
+                                          message='hello')
+        grpmsg_added.send(sender=GroupMessage, group_id=self.group.id,
+                          from_email=self.user.username, message='hello',
+                          timestamp=msg.timestamp)
+        return msg
+
+    def _summary(self):
+        return GroupMessageSummary.objects.get_summaries(
+            [self.group.id])[self.group.id]
+
+    def test_no_message(self):
+        summary = self._summary()
+        assert summary.msg_count == 0
+        assert summary.last_msg_timestamp is None
+
+    def test_add_message(self):
+        self._add_msg()
+        msg = self._add_msg()
+
+        summary = self._summary()
+        assert summary.msg_count == 2
+        assert summary.last_msg_timestamp == msg.timestamp
+
+    def test_messages_before_summary(self):
+        GroupMessage.objects.create(group_id=self.group.id,
+                                    from_email=self.user.username,
+                                    message='hello',
+                                    timestamp=datetime.datetime(2016, 1, 1))
+        self._add_msg()
+
+        assert self._summary().msg_count == 2
+
+    def test_delete_message(self):
+        first = self._add_msg()
+        self._add_msg().delete()
+
+        summary = self._summary()
+        assert summary.msg_count == 1
+        assert summary.last_msg_timestamp == first.timestamp
+
+    def test_summaries_in_constant_queries(self):
+        self._add_msg()
+        self._summary()
+        with self.assertNumQueries(1):
+            GroupMessageSummary.objects.get_summaries([self.group.id])
@@ -0,0 +1,146 @@
+import json
+
+from django.core import mail
+from django.core.management import call_command
+from mock import patch
+
+from seahub.base.accounts import User
+from seahub.jobs.handlers import JOB_USERS_SET_QUOTA, JOB_GROUP_MEMBERS_IMPORT, \
+    JOB_BATCH_ADD_USER
+from seahub.jobs.models import BackgroundJob, BackgroundJobResult, \
+    STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE
+from seahub.jobs.utils import run_job, submit_job, encrypt_secret, \
+    decrypt_secret
+from seahub.test_utils import BaseTestCase
+
+
+class SubmitJobTest(BaseTestCase):
+
+    def test_run_inline(self):
+        job = submit_job(self.admin.username, JOB_USERS_SET_QUOTA,
+                         [{'email': self.user.username},
+                          {'email': 'not-exist@test.com'}],
+                         {'quota_total': 1024 * 1024})
+
+        assert job.status == STATUS_DONE
+        assert job.processed == 2
+        assert job.success_count == 1
+        assert job.failed_count == 1
+        assert job.get_items() == []
+
+        results = BackgroundJobResult.objects.get_results(job)
+        assert results['success'][0]['email'] == self.user.username
+        assert results['success'][0]['quota_total'] == 1024 * 1024
+        assert results['failed'][0]['email'] == 'not-exist@test.com'
+        assert results['failed'][0]['row'] == 1
+
+    @patch('seahub.jobs.utils.ENABLE_BACKGROUND_JOBS', True)
+    def test_queue_and_run_by_worker(self):
+        job = submit_job(self.user.username, JOB_GROUP_MEMBERS_IMPORT,
+                         [{'email': self.admin.username}],
+                         {'group_id': self.group.id, 'org_id': None})
+        assert job.status == STATUS_QUEUED
+
+        call_command('run_background_jobs', once=True)
+
+        job = BackgroundJob.objects.get(pk=job.pk)
+        assert job.status == STATUS_DONE
+        assert job.success_count == 1
+        assert self.is_group_member(self.group.id, self.admin.username)
+
+    @patch('seahub.jobs.utils.ENABLE_BACKGROUND_JOBS', True)
+    def test_secrets_are_not_stored(self):
+        emails = ['batch-add-1@test.com', 'batch-add-2@test.com']
+        job = submit_job(self.admin.username, JOB_BATCH_ADD_USER,
+                         [{'email': e, 'row': [e, '']} for e in emails],
+                         secrets=['secret-1', 'secret-2'])
+        items = BackgroundJob.objects.get(pk=job.pk).get_items()
+        assert 'secret-' not in json.dumps(items)
+        assert decrypt_secret(items[0]['secret']) == 'secret-1'
+
+        # the first user is added and checkpointed before the worker stops
+        job = BackgroundJob.objects.claim_next(600)
+        User.objects.create_user(emails[0], 'secret-1', is_active=True)
+        assert BackgroundJob.objects.checkpoint(job, 1, 1, 0)
+
+        assert run_job(job)
+
+        job = BackgroundJob.objects.get(pk=job.pk)
+        assert job.status == STATUS_DONE
+        assert job.success_count == 2
+        # only the user not checkpointed yet is invited
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [emails[1]]
+        assert 'secret-2' in mail.outbox[0].body
+        assert User.objects.get(emails[1]).check_password('secret-2')
+
+        for e in emails:
+            User.objects.get(e).delete()
+
+    def test_missing_secret(self):
+        job = submit_job(self.admin.username, JOB_BATCH_ADD_USER,
+                         [{'email': 'batch-add@test.com',
+                           'row': ['batch-add@test.com', ''],
+                           'secret': 'not encrypted'}])
+
+        results = BackgroundJobResult.objects.get_results(job)
+        assert 'can not be read' in results['failed'][0]['error_msg']
+
+    def test_encrypt_secret(self):
+        token = encrypt_secret(u'p\xe4ssword')
+        assert decrypt_secret(token) == u'p\xe4ssword'
+        assert decrypt_secret(token[:-2] + 'AA') is None
+        assert decrypt_secret('invalid') is None
+
+    def is_group_member(self, group_id, email):
+        from seaserv import ccnet_api
+        return ccnet_api.is_group_user(group_id, email)
+
+
+class RunJobTest(BaseTestCase):
+
+    def setUp(self):
+        self.items = [{'email': self.user.username},
+                      {'email': self.admin.username},
+                      {'email': 'not-exist@test.com'}]
+        self.job = BackgroundJob.objects.add_job(
+            self.admin.username, JOB_USERS_SET_QUOTA, self.items,
+            {'quota_total': 1024 * 1024})
+
+    def test_claim(self):
+        job = BackgroundJob.objects.claim_next(600)
+        assert job.pk == self.job.pk
+        assert job.status == STATUS_RUNNING
+        assert job.worker
+
+        # claimed jobs are not handed out again until stale
+        assert BackgroundJob.objects.claim_next(600) is None
+        assert BackgroundJob.objects.claim_next(-1).pk == self.job.pk
+
+    def test_resume_from_checkpoint(self):
+        job = BackgroundJob.objects.claim_next(600)
+        assert BackgroundJob.objects.checkpoint(job, 1, 1, 0)
+        BackgroundJobResult.objects.create(job=job, row=0,
+                                           email=self.user.username)
+        # left over by an interrupted chunk
+        BackgroundJobResult.objects.create(job=job, row=1,
+                                           email=self.admin.username)
+
+        with patch('seahub.jobs.handlers.seafile_api.set_user_quota') as m:
+            assert run_job(job, chunk_size=1)
+            assert m.call_count == 1
+            assert m.call_args[0][0] == self.admin.username
+
+        job = BackgroundJob.objects.get(pk=job.pk)
+        assert job.status == STATUS_DONE
+        assert job.processed == 3
+        assert job.success_count == 2
+        assert job.failed_count == 1
+        assert BackgroundJobResult.objects.filter(job=job).count() == 3
+
+    def test_stop_when_taken_over(self):
+        job = BackgroundJob.objects.claim_next(600)
+        BackgroundJob.objects.claim_next(-1)
+
+        assert not run_job(job, chunk_size=1)
+        assert BackgroundJob.objects.get(pk=job.pk).processed == 0
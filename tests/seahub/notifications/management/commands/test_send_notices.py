@@ -43,3 +43,35 @@ class CommandTest(BaseTestCase):
         assert mail.outbox[0].to[0] == 'a@a.com'
         assert 'new comment from user %s' % self.user.username in mail.outbox[0].body
         assert '/foo' in mail.outbox[0].body
+
+    def test_send_to_multiple_users_in_batches(self):
+        self.assertEqual(len(mail.outbox), 0)
+        for to_user in ('a@a.com', 'b@b.com', 'c@c.com'):
+            UserNotification.objects.add_repo_share_msg(
+                to_user, repo_share_msg_to_json('bar@bar.com', self.repo.id))
+        UserNotification.objects.add_repo_share_msg(
+            'a@a.com', repo_share_msg_to_json('bar@bar.com', self.repo.id))
+
+        call_command('send_notices', batch_size=2)
+        self.assertEqual(len(mail.outbox), 3)
+        assert sorted([m.to[0] for m in mail.outbox]) == [
+            'a@a.com', 'b@b.com', 'c@c.com']
+
+    def test_nickname_is_escaped(self):
+        UserNotification.objects.add_repo_share_msg(
+            self.user.username, repo_share_msg_to_json('bar@bar.com', self.repo.id))
+        Profile.objects.add_or_update('bar@bar.com', '<b>bar</b>')
+
+        call_command('send_notices')
+        self.assertEqual(len(mail.outbox), 1)
+        assert '&lt;b&gt;bar&lt;/b&gt; has shared a library' in mail.outbox[0].body
+        assert '<b>bar</b>' not in mail.outbox[0].body
+
+    def test_notice_of_deleted_repo_is_removed(self):
+        UserNotification.objects.add_repo_share_msg(
+            self.user.username, repo_share_msg_to_json('bar@bar.com', self.repo.id))
+        self.remove_repo()
+
+        call_command('send_notices')
+        self.assertEqual(len(mail.outbox), 0)
+        assert UserNotification.objects.count() == 0
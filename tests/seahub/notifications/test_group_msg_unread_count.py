@@ -0,0 +1,64 @@
+from seaserv import ccnet_api
+
+from seahub.group.models import GroupMessage
+from seahub.group.signals import grpmsg_added
+from seahub.notifications.models import UserNotification, \
+    GroupMsgUnreadCount, group_msg_to_json
+from seahub.test_utils import BaseTestCase
+
+
+class GroupMsgUnreadCountTest(BaseTestCase):
+    def setUp(self):
+        self.group_id = self.group.id
+        self.username = self.user.username
+        ccnet_api.group_add_member(self.group_id, self.username,
+                                   self.admin.username)
+
+    def tearDown(self):
+        self.remove_group()
+
+    def _count(self, username=None):
+        return GroupMsgUnreadCount.objects.get_counts(
+            username or self.username, [self.group_id])[self.group_id]
+
+    def _add_msg(self, from_email):
+        grpmsg_added.send(sender=GroupMessage, group_id=self.group_id,
+                          from_email=from_email, message='hello')
+
+    def test_counted_on_group_message(self):
+        self._add_msg(self.admin.username)
+        self._add_msg(self.admin.username)
+
+        assert self._count() == 2
+        # not counted for the sender
+        assert self._count(self.admin.username) == 0
+
+    def test_seen(self):
+        self._add_msg(self.admin.username)
+        self._add_msg(self.admin.username)
+
+        UserNotification.objects.seen_group_msg_notices(self.username,
+                                                        self.group_id)
+        assert self._count() == 0
+
+    def test_deleted(self):
+        self._add_msg(self.admin.username)
+        self._add_msg(self.admin.username)
+
+        notice = UserNotification.objects.get_user_notifications(
+            self.username, seen=False)[0]
+        notice.seen = True
+        notice.save()
+        assert self._count() == 1
+
+        UserNotification.objects.remove_user_notifications(self.username)
+        assert self._count() == 0
+
+    def test_rebuild(self):
+        detail = group_msg_to_json(self.group_id, 'a@a.com', 'hello')
+        UserNotification.objects.bulk_add_group_msg_notices(
+            [self.username, self.username], detail)
+        assert self._count() == 0
+
+        GroupMsgUnreadCount.objects.rebuild()
+        assert self._count() == 2
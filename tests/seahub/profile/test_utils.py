@@ -0,0 +1,53 @@
+from django.core.cache import cache
+
+from seahub.avatar.util import get_default_avatar_url
+from seahub.profile.models import Profile
+from seahub.profile.utils import get_user_profiles
+from seahub.test_utils import BaseTestCase
+
+
+class GetUserProfilesTest(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_can_get(self):
+        username = self.user.username
+        p = Profile.objects.add_or_update(username, 'nickname')
+        p.contact_email = 'contact@foo.com'
+        p.save()
+        cache.clear()
+
+        profiles = get_user_profiles([username, self.admin.username], 36)
+
+        assert profiles[username]['nickname'] == 'nickname'
+        assert profiles[username]['contact_email'] == 'contact@foo.com'
+        assert profiles[username]['avatar_url'] == get_default_avatar_url()
+        assert profiles[username]['is_default_avatar'] is True
+
+        admin_profile = profiles[self.admin.username]
+        assert admin_profile['nickname'] == self.admin.username.split('@')[0]
+        assert admin_profile['contact_email'] == self.admin.username
+
+    def test_served_from_cache(self):
+        username = self.user.username
+        get_user_profiles([username], 36)
+
+        with self.assertNumQueries(0):
+            profiles = get_user_profiles([username], 36)
+        assert profiles[username]['contact_email'] == username
+
+    def test_cache_refreshed_on_profile_save(self):
+        username = self.user.username
+        get_user_profiles([username])
+
+        Profile.objects.add_or_update(username, 'new nickname')
+        assert get_user_profiles([username])[username]['nickname'] == \
+            'new nickname'
+
+    def test_empty_username_and_invalid_size(self):
+        profiles = get_user_profiles(['', None, self.user.username], 'x')
+
+        assert profiles[''] == profiles[None]
+        assert profiles['']['nickname'] == ''
+        assert profiles['']['is_default_avatar'] is True
+        assert profiles[self.user.username]['avatar_url']
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from seahub.share.models import FileShare, UploadLinkShare, \
+    get_share_link_by_token, get_valid_share_link_by_token, \
+    remove_share_links
+from seahub.test_utils import BaseTestCase
+from seahub.utils import gen_token
+
+
+class ShareLinkCacheTest(BaseTestCase):
+    def setUp(self):
+        self.fs = FileShare.objects.create_file_link(
+            self.user.username, self.repo.id, self.file)
+        self.uls = UploadLinkShare.objects.create_upload_link_share(
+            self.user.username, self.repo.id, self.folder)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_resolve_any_token(self):
+        assert get_valid_share_link_by_token(self.fs.token) == self.fs
+        assert get_valid_share_link_by_token(self.uls.token) == self.uls
+        assert get_valid_share_link_by_token(gen_token()) is None
+
+    def test_cached(self):
+        get_share_link_by_token(self.fs.token)
+        with self.assertNumQueries(0):
+            link = get_share_link_by_token(self.fs.token)
+            assert isinstance(link, FileShare)
+            assert FileShare.objects.get_valid_file_link_by_token(
+                self.fs.token) == self.fs
+            assert UploadLinkShare.objects.get_valid_upload_link_by_token(
+                self.fs.token) is None
+
+    def test_unknown_token_cached(self):
+        token = gen_token()
+        assert get_share_link_by_token(token) is None
+        with self.assertNumQueries(0):
+            assert get_share_link_by_token(token) is None
+
+    def test_expired_without_db_hit(self):
+        self.fs.expire_date = timezone.now() - timedelta(days=1)
+        self.fs.save()
+
+        get_share_link_by_token(self.fs.token)
+        with self.assertNumQueries(0):
+            assert get_valid_share_link_by_token(self.fs.token) is None
+
+    def test_invalidated_by_update(self):
+        get_share_link_by_token(self.fs.token)
+
+        self.fs.permission = FileShare.PERM_VIEW_ONLY
+        self.fs.save()
+        assert get_share_link_by_token(self.fs.token).permission == \
+            FileShare.PERM_VIEW_ONLY
+
+    def test_not_invalidated_by_view_count(self):
+        get_share_link_by_token(self.fs.token)
+
+        self.fs.view_cnt = F('view_cnt') + 1
+        self.fs.save(update_fields=['view_cnt'])
+        with self.assertNumQueries(0):
+            get_share_link_by_token(self.fs.token)
+
+    def test_invalidated_by_delete(self):
+        get_share_link_by_token(self.fs.token)
+
+        self.fs.delete()
+        assert get_share_link_by_token(self.fs.token) is None
+
+    def test_invalidated_by_remove_share_links(self):
+        get_share_link_by_token(self.fs.token)
+        get_share_link_by_token(self.uls.token)
+
+        remove_share_links(None, repo_id=self.repo.id)
+        assert get_share_link_by_token(self.fs.token) is None
+        assert get_share_link_by_token(self.uls.token) is None
+
+    def test_new_link_of_negatively_cached_token(self):
+        token = gen_token()
+        assert get_share_link_by_token(token) is None
+
+        FileShare.objects.create(username=self.user.username,
+                                 repo_id=self.repo.id, path=self.file,
+                                 token=token)
+        assert get_share_link_by_token(token).token == token
@@ -0,0 +1,112 @@
+import datetime
+
+from django.core.cache import cache
+from mock import patch
+
+from seahub.base.models import CommandsLastCheck
+from seahub.share.models import FileShare, UploadLinkShare
+from seahub.share.utils import incr_view_cnt, get_pending_view_cnts, \
+    add_pending_view_cnts, flush_view_cnts, FLUSH_LOCK_NAME, \
+    FLUSH_LOCK_TIMEOUT, LOG_LEN_KEY
+from seahub.test_utils import BaseTestCase
+
+
+@patch('seahub.share.utils.ENABLE_SHARE_LINK_VIEW_CNT_BUFFER', True)
+class BufferedViewCntTest(BaseTestCase):
+    def setUp(self):
+        self.fs = FileShare.objects.create_file_link(
+            self.user.username, self.repo.id, self.file)
+        self.uls = UploadLinkShare.objects.create_upload_link_share(
+            self.user.username, self.repo.id, self.folder)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _view_cnt(self, link):
+        return link.__class__.objects.get(pk=link.pk).view_cnt
+
+    def test_incr_buffered(self):
+        with self.assertNumQueries(0):
+            incr_view_cnt(self.fs)
+            incr_view_cnt(self.fs)
+            incr_view_cnt(self.uls)
+
+        assert self._view_cnt(self.fs) == 0
+        assert get_pending_view_cnts([self.fs, self.uls]) == {
+            self.fs.token: 2, self.uls.token: 1}
+
+        add_pending_view_cnts([self.fs])
+        assert self.fs.view_cnt == 2
+
+    def test_flush(self):
+        incr_view_cnt(self.fs)
+        incr_view_cnt(self.fs)
+        incr_view_cnt(self.uls)
+
+        assert flush_view_cnts() == 2
+        assert self._view_cnt(self.fs) == 2
+        assert self._view_cnt(self.uls) == 1
+        assert get_pending_view_cnts([self.fs, self.uls]) == {}
+
+        # nothing left to flush
+        assert flush_view_cnts() == 0
+
+        incr_view_cnt(self.fs)
+        assert flush_view_cnts() == 1
+        assert self._view_cnt(self.fs) == 3
+
+    def test_view_during_flush_is_logged_again(self):
+        incr_view_cnt(self.fs)
+
+        orig_decr = cache.decr
+        def decr(key, delta=1):
+            # viewed between reading and decreasing the count
+            incr_view_cnt(self.fs)
+            return orig_decr(key, delta)
+
+        with patch.object(cache, 'decr', side_effect=decr):
+            assert flush_view_cnts() == 1
+
+        assert self._view_cnt(self.fs) == 1
+        assert flush_view_cnts() == 1
+        assert self._view_cnt(self.fs) == 2
+
+    def test_flush_locked(self):
+        incr_view_cnt(self.fs)
+        now = datetime.datetime.now()
+        CommandsLastCheck(command_type=FLUSH_LOCK_NAME, last_check=now).save()
+
+        assert flush_view_cnts() is None
+        assert self._view_cnt(self.fs) == 0
+
+        # a lock left by a crashed flush expires
+        CommandsLastCheck.objects.filter(command_type=FLUSH_LOCK_NAME).update(
+            last_check=now - datetime.timedelta(seconds=FLUSH_LOCK_TIMEOUT + 1))
+        assert flush_view_cnts() == 1
+        assert self._view_cnt(self.fs) == 1
+        assert flush_view_cnts() == 0
+
+    def test_sweep_unlogged(self):
+        incr_view_cnt(self.fs)
+        incr_view_cnt(self.uls)
+        # log entries are evicted
+        cache.delete(LOG_LEN_KEY)
+
+        assert flush_view_cnts() == 0
+        assert self._view_cnt(self.fs) == 0
+
+        assert flush_view_cnts(sweep=True) == 2
+        assert self._view_cnt(self.fs) == 1
+        assert self._view_cnt(self.uls) == 1
+        assert get_pending_view_cnts([self.fs, self.uls]) == {}
+
+
+class UnbufferedViewCntTest(BaseTestCase):
+    def setUp(self):
+        self.fs = FileShare.objects.create_file_link(
+            self.user.username, self.repo.id, self.file)
+
+    def test_incr(self):
+        incr_view_cnt(self.fs)
+        assert FileShare.objects.get(pk=self.fs.pk).view_cnt == 1
+        assert get_pending_view_cnts([self.fs]) == {}
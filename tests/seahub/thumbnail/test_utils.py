@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from StringIO import StringIO
+
+from mock import patch
+from PIL import Image
+
+from django.test import SimpleTestCase
+
+from seahub.thumbnail import utils
+from seahub.thumbnail.utils import generate_thumbnail_by_obj_id, \
+    _create_thumbnail_common
+
+FILE_ID = 'a' * 40
+
+
+class GenerateThumbnailTest(SimpleTestCase):
+    def setUp(self):
+        self.thumbnail_root = tempfile.mkdtemp()
+        patcher = patch.object(utils, 'THUMBNAIL_ROOT', self.thumbnail_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.thumbnail_root, ignore_errors=True)
+
+    def test_create_thumbnail_common(self):
+        image = StringIO()
+        Image.new('RGB', (200, 100)).save(image, 'png')
+        image.seek(0)
+
+        os.makedirs(os.path.join(self.thumbnail_root, '48'))
+        thumbnail_file = os.path.join(self.thumbnail_root, '48', FILE_ID)
+        assert _create_thumbnail_common(image, [(48, thumbnail_file)]) == \
+            (True, 200)
+
+        assert Image.open(thumbnail_file).size == (48, 24)
+        # no temp file left
+        assert os.listdir(os.path.dirname(thumbnail_file)) == [FILE_ID]
+
+    def test_create_multi_size_thumbnails(self):
+        image = StringIO()
+        Image.new('RGB', (400, 200)).save(image, 'jpeg')
+        image.seek(0)
+
+        thumbnail_files = []
+        for size in (48, 192, 96):
+            os.makedirs(os.path.join(self.thumbnail_root, str(size)))
+            thumbnail_files.append(
+                (size, os.path.join(self.thumbnail_root, str(size), FILE_ID)))
+
+        assert _create_thumbnail_common(image, thumbnail_files) == (True, 200)
+        for size, thumbnail_file in thumbnail_files:
+            assert Image.open(thumbnail_file).size == (size, size / 2)
+
+    @patch.object(utils, 'THUMBNAIL_SIZE_LADDER', [48, 96, 192])
+    def test_ladder_sizes_created_together(self):
+        calls = []
+
+        def fake_generate(repo, file_id, path, thumbnail_files):
+            calls.append(sorted(size for size, f in thumbnail_files))
+            for size, thumbnail_file in thumbnail_files:
+                open(thumbnail_file, 'w').close()
+            return (True, 200)
+
+        with patch.object(utils, '_generate_thumbnail', fake_generate):
+            for size in (96, 48, 192):
+                assert generate_thumbnail_by_obj_id(
+                    None, FILE_ID, size, '/a.jpg') == (True, 200)
+
+        assert calls == [[48, 96, 192]]
+
+    def test_concurrent_requests_are_coalesced(self):
+        calls = []
+
+        def fake_generate(repo, file_id, path, thumbnail_files):
+            calls.append(file_id)
+            time.sleep(0.2)
+            open(thumbnail_files[0][1], 'w').close()
+            return (True, 200)
+
+        results = []
+        with patch.object(utils, '_generate_thumbnail', fake_generate):
+            threads = [threading.Thread(target=lambda: results.append(
+                generate_thumbnail_by_obj_id(None, FILE_ID, 48, '/a.png')))
+                       for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert calls == [FILE_ID]
+        assert results == [(True, 200)] * 4
@@ -0,0 +1,37 @@
+from mock import patch
+
+from seahub.test_utils import BaseTestCase
+from seahub.utils import FileTypeClassifier, IMAGE, TEXT, PDF
+
+
+class FileTypeClassifierTest(BaseTestCase):
+    def setUp(self):
+        self.classifier = FileTypeClassifier(check_interval=60)
+
+    @patch('seahub.utils.config')
+    def test_classify(self, mock_config):
+        mock_config.TEXT_PREVIEW_EXT = 'txt, py'
+
+        assert self.classifier.classify('a.PNG') == (IMAGE, 'png')
+        assert self.classifier.classify('a.py') == (TEXT, 'py')
+        assert self.classifier.classify('a') == ('Unknown', '')
+        assert self.classifier.classify_many(['a.pdf', 'b.xyz']) == \
+            [(PDF, 'pdf'), ('Unknown', 'xyz')]
+
+    @patch('seahub.utils.config')
+    def test_rebuild_on_conf_change(self, mock_config):
+        mock_config.TEXT_PREVIEW_EXT = 'txt'
+        assert self.classifier.classify('a.py') == ('Unknown', 'py')
+
+        # not re-read within check interval
+        mock_config.TEXT_PREVIEW_EXT = 'txt, py'
+        assert self.classifier.classify('a.py') == ('Unknown', 'py')
+
+        self.classifier.invalidate()
+        assert self.classifier.classify('a.py') == (TEXT, 'py')
+
+    def test_get_icon(self):
+        assert self.classifier.get_icon('a.docx') == 'word.png'
+        assert self.classifier.get_icon('a.flac') == 'music.png'
+        assert self.classifier.get_icon('.bashrc') == 'file.png'
+        assert self.classifier.get_icon('a.xyz') == 'file.png'
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from seahub.utils.lru import LRUCache
+
+
+class LRUCacheTest(SimpleTestCase):
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+
+        cache.set('c', 3)
+        assert 'b' not in cache
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+
+    def test_bounded_by_size(self):
+        cache = LRUCache(10, sizeof=len)
+        cache.set('a', 'x' * 6)
+        cache.set('b', 'x' * 4)
+        assert cache.size == 10
+
+        cache.set('c', 'x' * 2)
+        assert 'a' not in cache
+        assert cache.size == 6
+
+        # too large to be cached at all
+        cache.set('d', 'x' * 11)
+        assert 'd' not in cache
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.set('a', 1)
+        assert cache.get('a') is None
+        assert len(cache) == 0
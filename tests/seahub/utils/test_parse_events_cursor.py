@@ -0,0 +1,16 @@
+from django.test import SimpleTestCase
+
+from seahub.utils import parse_events_cursor
+
+
+class ParseEventsCursorTest(SimpleTestCase):
+    def test_cursor(self):
+        assert parse_events_cursor('15:abc') == (15, 'abc')
+
+    def test_offset(self):
+        assert parse_events_cursor('15') == (15, None)
+
+    def test_invalid(self):
+        for cursor in ('', 'abc', '-1', 'x:abc'):
+            with self.assertRaises(ValueError):
+                parse_events_cursor(cursor)
@@ -1,4 +1,7 @@
-from seahub.utils.repo import get_repo_shared_users, get_repo_owner
+from mock import patch
+
+from seahub.utils.repo import get_repo_shared_users, get_repo_owner, \
+    GroupReposResolver, list_dir_sorted, dir_listing_cache
 from seahub.test_utils import BaseTestCase
 
 import seaserv
@@ -37,3 +40,74 @@ class GetRepoSharedUsersTest(BaseTestCase):
         seafile_api.set_group_repo(self.repo.id, self.group.id,
                                    username, 'rw')
         assert get_repo_shared_users(self.repo.id, owner) == [self.admin.username, self.user2.username]
+
+
+class GroupReposResolverTest(BaseTestCase):
+    def setUp(self):
+        self.group2 = self.create_group(group_name='test_group2',
+                                        username=self.user.username)
+        seafile_api.set_group_repo(self.repo.id, self.group.id,
+                                   self.user.username, 'rw')
+        seafile_api.set_group_repo(self.repo.id, self.group2.id,
+                                   self.user.username, 'r')
+
+    def tearDown(self):
+        self.remove_group(self.group2.id)
+        self.remove_group()
+        self.remove_repo()
+
+    def test_can_resolve(self):
+        resolver = GroupReposResolver(self.fake_request)
+        group_repos = resolver.resolve([self.group, self.group2])
+
+        assert len(group_repos) == 2
+        assert [r.group.id for r in group_repos] == [self.group.id, self.group2.id]
+        for r in group_repos:
+            assert r.repo_id == self.repo.id
+            assert r.user == self.user.username
+            assert r.user_perm == 'rw'
+            assert r.share_type == 'group'
+
+        # repo shared to both groups is fetched only once
+        assert resolver._repos.keys() == [self.repo.id]
+
+    def test_memoized_on_request(self):
+        resolver = GroupReposResolver.for_request(self.fake_request)
+        assert GroupReposResolver.for_request(self.fake_request) is resolver
+
+class ListDirSortedTest(BaseTestCase):
+    def setUp(self):
+        dir_listing_cache.clear()
+
+    def tearDown(self):
+        dir_listing_cache.clear()
+        self.remove_repo()
+
+    @patch('seahub.utils.repo.is_pro_version')
+    def test_can_list_and_cache(self, mock_is_pro_version):
+        mock_is_pro_version.return_value = False
+
+        folder = self.folder
+        file_path = self.file
+        dir_id = seafile_api.get_dir_id_by_path(self.repo.id, '/')
+
+        dirs, files = list_dir_sorted(self.repo, '/', dir_id,
+                                      self.user.username)
+        assert [d.obj_name for d in dirs] == [folder.lstrip('/')]
+        assert [f.obj_name for f in files] == [file_path.lstrip('/')]
+        assert files[0].permission == 'rw'
+        assert len(dir_listing_cache) == 1
+
+        # served from cache, without listing the dir again
+        with patch('seahub.utils.repo.seafserv_threaded_rpc') as mock_rpc:
+            assert list_dir_sorted(self.repo, '/', dir_id,
+                                   self.user.username) == (dirs, files)
+            assert mock_rpc.list_dir_with_perm.called is False
+
+    @patch('seahub.utils.repo.is_pro_version')
+    def test_not_cached_on_pro(self, mock_is_pro_version):
+        mock_is_pro_version.return_value = True
+
+        dir_id = seafile_api.get_dir_id_by_path(self.repo.id, '/')
+        list_dir_sorted(self.repo, '/', dir_id, self.user.username)
+        assert len(dir_listing_cache) == 0
@@ -0,0 +1,47 @@
+from seahub.test_utils import BaseTestCase
+from seahub.utils.rpc import memoized_seafile_api, start_rpc_cache, \
+    stop_rpc_cache
+
+
+class MemoizedRPCProxyTest(BaseTestCase):
+    def tearDown(self):
+        stop_rpc_cache()
+        self.remove_repo()
+
+    def test_pass_through_without_cache(self):
+        assert memoized_seafile_api.get_repo(self.repo.id).id == self.repo.id
+
+    def test_read_calls_are_memoized(self):
+        rpc_cache = start_rpc_cache()
+
+        repo = memoized_seafile_api.get_repo(self.repo.id)
+        assert memoized_seafile_api.get_repo(self.repo.id).id == repo.id
+        assert rpc_cache.hits == 1
+        assert rpc_cache.misses == 1
+
+    def test_cached_results_are_copied(self):
+        start_rpc_cache()
+
+        repo = memoized_seafile_api.get_repo(self.repo.id)
+        repo.name = 'changed'
+        assert memoized_seafile_api.get_repo(self.repo.id).name != 'changed'
+
+    def test_mutating_call_invalidates(self):
+        rpc_cache = start_rpc_cache()
+
+        assert memoized_seafile_api.get_dir_id_by_path(self.repo.id, '/foo') is None
+        memoized_seafile_api.post_dir(self.repo.id, '/', 'foo',
+                                      self.user.username)
+        assert memoized_seafile_api.get_dir_id_by_path(self.repo.id, '/foo') is not None
+        assert rpc_cache.hits == 0
+        assert rpc_cache.misses == 2
+        assert rpc_cache.invalidations == 1
+
+    def test_mutating_seaserv_call_invalidates(self):
+        from seahub.api2.views import edit_repo
+        rpc_cache = start_rpc_cache()
+
+        assert memoized_seafile_api.get_repo(self.repo.id).name != 'renamed'
+        edit_repo(self.repo.id, 'renamed', '', self.user.username)
+        assert memoized_seafile_api.get_repo(self.repo.id).name == 'renamed'
+        assert rpc_cache.invalidations == 1
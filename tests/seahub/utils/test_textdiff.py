@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase
+from mock import patch
+
+from seahub.utils.htmldiff import HtmlDiff
+from seahub.utils import textdiff
+from seahub.utils.textdiff import make_table, get_opcodes
+
+
+class MakeTableTest(SimpleTestCase):
+    def assert_same_as_htmldiff(self, a, b):
+        for context in (True, False):
+            assert make_table(a, b, context) == \
+                HtmlDiff().make_table(a, b, context)
+
+    def test_same_as_htmldiff(self):
+        lines = [str(i) for i in range(40)]
+        self.assert_same_as_htmldiff(lines, lines)
+        self.assert_same_as_htmldiff(lines, lines[:3] + lines[4:30] + lines[31:])
+        self.assert_same_as_htmldiff(lines[5:], lines)
+        self.assert_same_as_htmldiff([], ['a'])
+        self.assert_same_as_htmldiff(['a', 'b', 'c'], ['a', 'x', 'c'])
+        self.assert_same_as_htmldiff(['hello world'], ['hello world!'])
+        self.assert_same_as_htmldiff(['\tfoo  ', 'x < y & z'],
+                                     ['\tfoo ', 'x < y & z'])
+
+    def test_no_difference(self):
+        assert make_table(['a', 'b'], ['a', 'b'], context=True) == ''
+
+
+class GetOpcodesTest(SimpleTestCase):
+    def apply(self, a, b, opcodes):
+        ret = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                assert a[i1:i2] == b[j1:j2]
+            ret.extend(b[j1:j2])
+        return ret
+
+    def test_moved_block(self):
+        a = ['x%d' % i for i in range(100)]
+        b = a[50:] + a[:50]
+        assert self.apply(a, b, get_opcodes(a, b)) == b
+
+    def test_large_region_without_unique_lines(self):
+        a = ['a', 'b'] * 1000
+        b = ['b', 'a'] * 1000
+        with patch.object(textdiff, 'MAX_MATCH_REGION', 100):
+            opcodes = get_opcodes(a, b)
+        assert self.apply(a, b, opcodes) == b
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from mock import patch
+
+from seahub.utils import user_traffic_over_limit, add_user_traffic
+
+GB = 1024 * 1024 * 1024
+
+
+@patch('seahub.utils.CHECK_SHARE_LINK_TRAFFIC', True)
+@patch('seahub.utils.get_user_traffic_budget')
+class UserTrafficOverLimitTest(SimpleTestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_budget_cached(self, mock_budget):
+        mock_budget.return_value = (GB, 0)
+
+        assert user_traffic_over_limit('a@a.com') is False
+        assert user_traffic_over_limit('a@a.com') is False
+        assert mock_budget.call_count == 1
+
+    def test_traffic_added_optimistically(self, mock_budget):
+        mock_budget.return_value = (GB, GB - 10)
+
+        assert user_traffic_over_limit('a@a.com') is False
+        add_user_traffic('a@a.com', 10)
+        assert user_traffic_over_limit('a@a.com') is True
+        assert user_traffic_over_limit('b@b.com') is False
+        assert mock_budget.call_count == 2
+
+    def test_traffic_reread_after_expire(self, mock_budget):
+        mock_budget.return_value = (GB, 0)
+        user_traffic_over_limit('a@a.com')
+        add_user_traffic('a@a.com', GB)
+
+        cache.clear()
+        # not cached, nothing to add to
+        add_user_traffic('a@a.com', GB)
+        assert user_traffic_over_limit('a@a.com') is False
+        assert mock_budget.call_count == 2
+
+    def test_error_means_over_limit(self, mock_budget):
+        mock_budget.side_effect = Exception('db down')
+
+        assert user_traffic_over_limit('a@a.com') is True
+        assert user_traffic_over_limit('a@a.com') is True
+        assert mock_budget.call_count == 2
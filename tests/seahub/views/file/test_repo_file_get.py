@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from StringIO import StringIO
+
+from mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from seahub.views.file import repo_file_get
+
+
+class RepoFileGetTest(SimpleTestCase):
+    def tearDown(self):
+        cache.clear()
+
+    @patch('seahub.views.file.urllib2.urlopen')
+    def test_detect_encoding(self, mock_urlopen):
+        mock_urlopen.return_value = StringIO(u'中文内容'.encode('gbk'))
+
+        err, content, encoding = repo_file_get('http://fileserver', 'auto')
+        assert err == ''
+        assert encoding == 'gbk'
+        assert content == u'中文内容'
+
+    @patch('seahub.views.file.FILE_ENCODING_DETECT_SAMPLE_SIZE', 4)
+    @patch('seahub.views.file.urllib2.urlopen')
+    def test_detect_encoding_on_truncated_sample(self, mock_urlopen):
+        # sample ends in the middle of a utf-8 character
+        mock_urlopen.return_value = StringIO(u'abc中文'.encode('utf-8'))
+
+        err, content, encoding = repo_file_get('http://fileserver', 'auto')
+        assert encoding == 'utf-8'
+        assert content == u'abc中文'
+
+    @patch('seahub.views.file.urllib2.urlopen')
+    def test_cached_by_obj_id(self, mock_urlopen):
+        mock_urlopen.side_effect = lambda url: StringIO('junk content')
+
+        ret = repo_file_get('http://fileserver', 'auto', 'obj1')
+        assert ret == ('', u'junk content', 'utf-8')
+        assert repo_file_get('http://fileserver', 'auto', 'obj1') == ret
+        assert repo_file_get('http://fileserver', 'utf-8', 'obj1') == ret
+        assert mock_urlopen.call_count == 1
+
+        # not cached without obj_id
+        repo_file_get('http://fileserver', 'auto')
+        assert mock_urlopen.call_count == 2
+
+    @patch('seahub.views.file.TEXT_PREVIEW_CACHE_MAX_SIZE', 4)
+    @patch('seahub.views.file.urllib2.urlopen')
+    def test_content_too_large_to_cache(self, mock_urlopen):
+        mock_urlopen.side_effect = lambda url: StringIO('junk content')
+
+        repo_file_get('http://fileserver', 'auto', 'obj1')
+        ret = repo_file_get('http://fileserver', 'auto', 'obj1')
+        assert ret == ('', u'junk content', 'utf-8')
+        assert mock_urlopen.call_count == 2
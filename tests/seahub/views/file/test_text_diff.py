@@ -0,0 +1,45 @@
+from mock import patch
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from seaserv import seafile_api
+
+from seahub.test_utils import BaseTestCase
+
+
+class TextDiffTest(BaseTestCase):
+    def setUp(self):
+        self.login_as(self.user)
+        self.file_path = self.create_file_with_content('diff.txt')
+        self.commit_id = seafile_api.get_repo(self.repo.id).head_cmmt_id
+        self.url = reverse('text_diff', args=[self.repo.id]) + \
+                   '?commit=%s&p=%s' % (self.commit_id, self.file_path)
+
+    def tearDown(self):
+        cache.clear()
+        self.remove_repo()
+
+    def test_can_diff(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        self.assertTemplateUsed(resp, 'text_diff.html')
+        assert resp.context['diff_too_large'] is False
+        assert 'junk&nbsp;content' in resp.context['diff_result_table']
+
+    @patch('seahub.views.file.TEXT_DIFF_MAX_SIZE', 1)
+    def test_too_large(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert resp.context['diff_too_large'] is True
+        assert resp.context['diff_result_table'] == ''
+
+    @patch('seahub.views.file.get_file_content_by_obj_id')
+    def test_diff_is_cached(self, mock_get_content):
+        mock_get_content.return_value = ('junk content', '')
+
+        self.client.get(self.url)
+        resp = self.client.get(self.url)
+        assert 'junk&nbsp;content' in resp.context['diff_result_table']
+
+        # content is fetched for both revisions on the first request only
+        assert mock_get_content.call_count == 2
@@ -1,13 +1,18 @@
 import os
 from mock import patch
 from django.core.urlresolvers import reverse
+from django.utils import timezone
 from post_office.models import Email
 
 from seahub.base.accounts import User
+from seahub.base.models import UserLastLogin
+from seahub.profile.models import Profile
 from seahub.options.models import (UserOptions, KEY_FORCE_PASSWD_CHANGE,
                                    VAL_FORCE_PASSWD_CHANGE)
 from seahub.test_utils import BaseTestCase
-from seahub.utils.ms_excel import write_xls as real_write_xls
+from seahub.utils.ms_excel import save_xls as real_save_xls
+from seahub.views.sysadmin import iter_export_users, iter_export_groups, \
+    populate_users
 
 from constance import config
 
@@ -126,6 +131,37 @@ class SudoModeTest(BaseTestCase):
         self.assertRedirects(resp, reverse('sys_useradmin'))
 
 
+class PopulateUsersTest(BaseTestCase):
+
+    def test_populate(self):
+        Profile.objects.add_or_update(self.user.username, 'nick')
+        UserLastLogin.objects.create(username=self.user.username,
+                                     last_login=timezone.now())
+
+        users = [User.objects.get(email=self.user.username),
+                 User.objects.get(email=self.admin.username)]
+        populate_users(users, role=True, trial_info=True)
+
+        user, admin = users
+        assert user.name == 'nick'
+        assert admin.name == ''
+        assert user.last_login is not None
+        assert admin.last_login is None
+        assert user.space_quota is not None
+        assert user.is_default is True
+        assert user.is_guest is False
+        assert user.trial_info is None
+
+    @patch('seahub.views.sysadmin._populate_user_quota_usage')
+    def test_without_profile(self, mock_populate_quota):
+        users = [User.objects.get(email=self.user.username)]
+        populate_users(users, profile=False)
+
+        assert mock_populate_quota.call_count == 1
+        assert not hasattr(users[0], 'name')
+        assert not hasattr(users[0], 'is_guest')
+
+
 class SysGroupAdminExportExcelTest(BaseTestCase):
     def setUp(self):
         self.login_as(self.admin)
@@ -134,6 +170,18 @@ class SysGroupAdminExportExcelTest(BaseTestCase):
         resp = self.client.get(reverse('sys_group_admin_export_excel'))
         self.assertEqual(200, resp.status_code)
         assert 'application/ms-excel' in resp._headers['content-type']
+        assert ''.join(resp.streaming_content).startswith('PK')
+
+    def test_export_groups_in_pages(self):
+        group = self.create_group(group_name='another group',
+                                  username=self.user.username)
+
+        groups = list(iter_export_groups(page_size=1))
+        assert self.group.id in [x.id for x in groups]
+        assert group.id in [x.id for x in groups]
+        assert len(groups) == len(set(x.id for x in groups))
+
+        self.remove_group(group.id)
 
 
 class SysUserAdminExportExcelTest(BaseTestCase):
@@ -144,21 +192,41 @@ class SysUserAdminExportExcelTest(BaseTestCase):
         resp = self.client.get(reverse('sys_useradmin_export_excel'))
         self.assertEqual(200, resp.status_code)
         assert 'application/ms-excel' in resp._headers['content-type']
+        assert ''.join(resp.streaming_content).startswith('PK')
 
-    def write_xls(self, sheet_name, head, data_list):
+    def save_xls(self, sheet_name, head, rows):
         assert 'Role' in head
-        return real_write_xls(sheet_name, head, data_list)
+        return real_save_xls(sheet_name, head, rows)
 
-    @patch('seahub.views.sysadmin.write_xls')
+    @patch('seahub.views.sysadmin.save_xls')
     @patch('seahub.views.sysadmin.is_pro_version')
-    def test_can_export_excel_in_pro(self, mock_is_pro_version, mock_write_xls):
+    def test_can_export_excel_in_pro(self, mock_is_pro_version, mock_save_xls):
         mock_is_pro_version.return_value = True
-        mock_write_xls.side_effect = self.write_xls
+        mock_save_xls.side_effect = self.save_xls
 
-        mock_write_xls.assert_called_once()
         resp = self.client.get(reverse('sys_useradmin_export_excel'))
         self.assertEqual(200, resp.status_code)
         assert 'application/ms-excel' in resp._headers['content-type']
+        assert mock_save_xls.call_count == 1
+
+    @patch('seahub.views.sysadmin.ccnet_api.get_emailusers')
+    def test_export_excel_with_rpc_error(self, mock_get_emailusers):
+        mock_get_emailusers.side_effect = Exception('rpc error')
+
+        resp = self.client.get(reverse('sys_useradmin_export_excel'))
+        self.assertEqual(302, resp.status_code)
+
+    def test_export_users_in_pages(self):
+        users = list(iter_export_users(['DB'], page_size=1))
+        emails = [x.email for x in users]
+        assert self.user.username in emails
+        assert self.admin.username in emails
+        assert len(emails) == len(set(emails))
+
+        user = [x for x in users if x.email == self.user.username][0]
+        assert hasattr(user, 'contact_email')
+        assert hasattr(user, 'space_quota')
+        assert hasattr(user, 'last_login')
 
 class BatchAddUserTest(BaseTestCase):
     def setUp(self):
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Compare the indexed pinyin conversion of ``seahub.cconvert`` with the
+previous implementation, which searched the whole data table with a regex
+for every char.
+
+Run from the seahub source directory::
+
+    python tools/bench-cconvert.py --names 5000
+
+Reports table load time, resident memory growth and conversion time for
+a list of random Chinese names.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--names', type=int, default=5000)
+    args = parser.parse_args()
+
+    rss = rss_kb()
+    start = time.time()
+    from seahub import cconvert
+    print 'indexed: load %.1fms, rss +%dKB, %d chars' % (
+        (time.time() - start) * 1000, rss_kb() - rss, len(cconvert.PINYIN_TABLE))
+
+    class RegexCConvert(cconvert.CConvert):
+        """Previous implementation, kept here for comparison only."""
+        def __init__(self):
+            cconvert.CConvert.__init__(self)
+            path = os.path.join(os.path.dirname(cconvert.__file__),
+                                'convert-utf-8.txt')
+            with open(path) as fp:
+                self.data = fp.read().decode('utf-8')
+
+        def getIndex(self, strIn):
+            if strIn == ' ':
+                return self.spliter
+            if set(strIn).issubset(cconvert.PUNCTUATION_SPLITER):
+                return self.spliter
+            if set(strIn).issubset(cconvert.PUNCTUATION_EMPTY):
+                return ""
+            pos = re.search("^" + strIn + "([0-9a-zA-Z]+)", self.data, re.M)
+            if pos is None:
+                return strIn
+            return pos.group(1)[:1] if self.just_shengmu else pos.group(1)
+
+    rss = rss_kb()
+    start = time.time()
+    regex_cc = RegexCConvert()
+    print 'regex:   load %.1fms, rss +%dKB' % (
+        (time.time() - start) * 1000, rss_kb() - rss)
+
+    chars = cconvert.PINYIN_TABLE.keys()
+    random.seed(0)
+    names = [u''.join(random.choice(chars) for i in range(random.randint(2, 4)))
+             for j in range(args.names)]
+
+    for name, cc in (('indexed', cconvert.CConvert()), ('regex', regex_cc)):
+        cc.spliter = ''
+        start = time.time()
+        result = cc.convert_many(names)
+        print '%-8s convert %d names in %.3fs' % (name + ':', len(names),
+                                                 time.time() - start)
+
+if __name__ == '__main__':
+    main()
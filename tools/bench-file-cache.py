@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Compare Django's FileBasedCache with seahub's ShardedFileBasedCache.
+
+Run from the seahub source directory, with the same PYTHONPATH as seahub::
+
+    python tools/bench-file-cache.py --entries 100000
+    python tools/bench-file-cache.py --entries 1000000 --backend sharded
+
+For each backend the cache is filled up to ``MAX_ENTRIES``, then a mix of
+sets (which trigger culling in the stock backend once the cache is full),
+gets and incrs is timed. Latencies are reported as p50/p99/max in
+milliseconds. The sharded backend culls out of the request path, in its
+``cull_file_cache`` command, the duration of one such run is reported too.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+BACKENDS = {
+    'stock': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sharded': 'seahub.base.file_cache.ShardedFileBasedCache',
+}
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+def report(name, latencies):
+    print '  %-6s n=%-7d p50=%.3fms p99=%.3fms max=%.3fms' % (
+        name, len(latencies), percentile(latencies, 0.5) * 1000,
+        percentile(latencies, 0.99) * 1000, max(latencies) * 1000)
+
+def timed(func, *args):
+    start = time.time()
+    func(*args)
+    return time.time() - start
+
+def bench(cache, entries, ops):
+    value = {'nickname': u'nickname', 'avatar': '/media/avatars/default.png'}
+
+    start = time.time()
+    for i in xrange(entries):
+        cache.set('fill_%d' % i, value)
+    print '  fill   %d entries in %.1fs' % (entries, time.time() - start)
+
+    # cache is full now, every new key triggers culling in the stock backend
+    set_lat = [timed(cache.set, 'new_%d' % i, value) for i in xrange(ops)]
+    report('set', set_lat)
+    if hasattr(cache, 'cull'):
+        start = time.time()
+        removed = cache.cull()
+        print '  cull   %d entries in %.1fs' % (removed, time.time() - start)
+
+    keys = ['fill_%d' % random.randint(0, entries - 1) for i in xrange(ops)]
+    get_lat = [timed(cache.get, k) for k in keys]
+    report('get', get_lat)
+
+    cache.set('counter', 0)
+    incr_lat = [timed(cache.incr, 'counter') for i in xrange(ops)]
+    report('incr', incr_lat)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--backend', choices=BACKENDS.keys() + ['all'],
+                        default='all')
+    args = parser.parse_args()
+
+    names = BACKENDS.keys() if args.backend == 'all' else [args.backend]
+    dirs = dict((name, tempfile.mkdtemp(prefix='bench-%s-' % name))
+                for name in names)
+
+    caches_conf = dict((name, {
+        'BACKEND': BACKENDS[name],
+        'LOCATION': dirs[name],
+        'OPTIONS': {'MAX_ENTRIES': args.entries},
+    }) for name in names)
+    caches_conf['default'] = {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+    settings.configure(CACHES=caches_conf)
+
+    from django.core.cache import caches
+    try:
+        for name in sorted(names):
+            print '%s (%s):' % (name, BACKENDS[name])
+            bench(caches[name], args.entries, args.ops)
+    finally:
+        for d in dirs.values():
+            shutil.rmtree(d, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
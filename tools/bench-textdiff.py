@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Compare HtmlDiff.make_table with seahub.utils.textdiff.make_table.
+
+Run from the seahub source directory, with the same PYTHONPATH as seahub::
+
+    python tools/bench-textdiff.py --lines 20000 --changes 300
+    python tools/bench-textdiff.py --lines 5000 --rewrite 0.5 --engine textdiff
+
+A random text of ``--lines`` lines is modified by ``--changes`` random line
+inserts/deletes/edits, and ``--rewrite`` (a ratio) of its lines are replaced
+in one block, which is the quadratic case for HtmlDiff.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seahub.utils.htmldiff import HtmlDiff
+from seahub.utils.textdiff import make_table
+
+ENGINES = {
+    'htmldiff': lambda a, b: HtmlDiff().make_table(a, b, True),
+    'textdiff': lambda a, b: make_table(a, b, context=True),
+}
+
+def gen_texts(lines, changes, rewrite):
+    a = ['%d,%s' % (i, 'x' * random.randint(0, 60)) for i in xrange(lines)]
+    b = list(a)
+    for i in xrange(changes):
+        pos = random.randrange(len(b))
+        op = random.random()
+        if op < 0.3:
+            del b[pos]
+        elif op < 0.6:
+            b.insert(pos, 'new line %d' % i)
+        else:
+            b[pos] += ' changed'
+
+    n = int(len(b) * rewrite)
+    if n:
+        pos = random.randrange(len(b) - n + 1)
+        b[pos:pos + n] = ['rewritten %d' % i for i in xrange(n)]
+    return a, b
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--changes', type=int, default=300)
+    parser.add_argument('--rewrite', type=float, default=0)
+    parser.add_argument('--engine', choices=ENGINES.keys() + ['all'],
+                        default='all')
+    args = parser.parse_args()
+
+    a, b = gen_texts(args.lines, args.changes, args.rewrite)
+    names = ENGINES.keys() if args.engine == 'all' else [args.engine]
+    for name in sorted(names):
+        start = time.time()
+        table = ENGINES[name](a, b)
+        print '%-8s %.3fs, %d bytes of html' % (name, time.time() - start,
+                                                len(table))
+
+if __name__ == '__main__':
+    main()
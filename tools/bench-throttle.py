@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Micro-benchmark of api2 throttle modes ('history' and 'window').
+
+Run from the seahub source directory, with the same environment as
+``manage.py``, so that the configured cache backend is used::
+
+    python tools/bench-throttle.py --rate 10000/day --requests 5000
+
+Each mode is timed on `allow_request` for one client, whose history grows up
+to the rate limit. Only the bench's own throttle keys are deleted from the
+cache, before and after each run.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seahub.settings')
+
+import django
+django.setup()
+
+from seahub.api2.throttling import SimpleRateThrottle
+
+class FakeRequest(object):
+    META = {'REMOTE_ADDR': '10.0.0.1'}
+
+class BenchThrottle(SimpleRateThrottle):
+    def get_cache_key(self, request, view):
+        return 'bench_throttle_%s' % self.mode
+
+def delete_bench_keys(throttle):
+    """Delete the history key and the current/previous window counters of
+    `throttle`.
+    """
+    key = throttle.get_cache_key(None, None)
+    window = int(throttle.timer() // throttle.duration)
+    throttle.cache.delete_many([key] + ['%s_%d' % (key, w)
+                                        for w in (window - 1, window)])
+
+def bench(rate, num):
+    throttle_cls = type('BenchThrottle', (BenchThrottle, ), {'rate': rate})
+    request = FakeRequest()
+
+    delete_bench_keys(throttle_cls())
+    allowed = 0
+    latencies = []
+    for i in xrange(num):
+        start = time.time()
+        if throttle_cls().allow_request(request, None):
+            allowed += 1
+        latencies.append(time.time() - start)
+    delete_bench_keys(throttle_cls())
+
+    latencies.sort()
+    print '%-22s allowed=%-6d avg=%.3fms p99=%.3fms total=%.2fs' % (
+        rate, allowed, sum(latencies) / num * 1000,
+        latencies[int(num * 0.99)] * 1000, sum(latencies))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', default='10000/day')
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    for mode in ('history', 'window'):
+        bench('%s:%s' % (args.rate, mode), args.requests)
+
+if __name__ == '__main__':
+    main()
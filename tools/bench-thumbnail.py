@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2012-2016 Seafile Ltd.
+"""
+Compare creating thumbnails of several sizes one by one, each from a fresh
+decode of the image, with creating them all from a single decode.
+
+Run from the seahub source directory, with the same PYTHONPATH as seahub::
+
+    python tools/bench-thumbnail.py --image photo.jpg
+    python tools/bench-thumbnail.py --width 6000 --height 4000 --sizes 48,96,192,1024
+
+Without ``--image`` a random JPEG of ``--width`` x ``--height`` is used. Each
+mode runs ``--rounds`` times in its own process, wall time per round and the
+peak RSS of the process (including the encoded image) are reported.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from StringIO import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from seahub.settings import THUMBNAIL_EXTENSION
+from seahub.thumbnail.utils import get_rotated_image, _create_thumbnail_common
+
+def per_size(data, thumbnail_files):
+    # what was done before sizes were created together: one download and
+    # decode per size
+    for size, thumbnail_file in thumbnail_files:
+        image = Image.open(StringIO(data))
+        if image.mode not in ["1", "L", "P", "RGB", "RGBA"]:
+            image = image.convert("RGB")
+        image = get_rotated_image(image)
+        image.thumbnail((size, size), Image.ANTIALIAS)
+        image.save(thumbnail_file, THUMBNAIL_EXTENSION)
+
+def single_decode(data, thumbnail_files):
+    _create_thumbnail_common(StringIO(data), thumbnail_files)
+
+MODES = {
+    'per-size': per_size,
+    'single-decode': single_decode,
+}
+
+def run(mode, args, sizes, queue):
+    # read image in the child process, peak RSS of the parent is inherited
+    with open(args.image, 'rb') as f:
+        data = f.read()
+    thumbnail_root = tempfile.mkdtemp(prefix='bench-thumbnail-')
+    try:
+        thumbnail_files = []
+        for size in sizes:
+            os.makedirs(os.path.join(thumbnail_root, str(size)))
+            thumbnail_files.append(
+                (size, os.path.join(thumbnail_root, str(size), 'thumb')))
+
+        times = []
+        for i in xrange(args.rounds):
+            start = time.time()
+            MODES[mode](data, thumbnail_files)
+            times.append(time.time() - start)
+    finally:
+        shutil.rmtree(thumbnail_root, ignore_errors=True)
+
+    queue.put((min(times), sum(times) / len(times),
+               resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+def gen_image(path, width, height):
+    # noise does not compress, so the JPEG is about as large as a photo
+    image = Image.frombytes('RGB', (width, height), os.urandom(width * height * 3))
+    image.save(path, 'jpeg', quality=90)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image')
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--sizes', default='48,96,192,1024')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--mode', choices=MODES.keys() + ['all'],
+                        default='all')
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(',')]
+    tmp_image = None
+    if not args.image:
+        fd, tmp_image = tempfile.mkstemp(prefix='bench-thumbnail-',
+                                         suffix='.jpg')
+        os.close(fd)
+        # in another process, not to raise peak RSS of the benchmarks
+        p = multiprocessing.Process(target=gen_image, args=(
+            tmp_image, args.width, args.height))
+        p.start()
+        p.join()
+        args.image = tmp_image
+    print 'image: %s (%dx%d), sizes: %s' % (
+        (args.image, ) + Image.open(args.image).size + (sizes, ))
+
+    names = MODES.keys() if args.mode == 'all' else [args.mode]
+    try:
+        for name in sorted(names):
+            queue = multiprocessing.Queue()
+            p = multiprocessing.Process(target=run, args=(
+                name, args, sizes, queue))
+            p.start()
+            best, avg, max_rss = queue.get()
+            p.join()
+            print '  %-14s best=%.3fs avg=%.3fs peak_rss=%.1fMB' % (
+                name, best, avg, max_rss / 1024.0)
+    finally:
+        if tmp_image:
+            os.remove(tmp_image)
+
+if __name__ == '__main__':
+    main()